@@ -8,6 +8,37 @@ class Settings(BaseSettings):
     GEMINI_API_KEY: Optional[str] = None
     NODE_ENV: str = "development"
     
+    # Production Server Configuration (gunicorn.conf.py, pre-fork)
+    SERVER_HOST: str = "0.0.0.0"
+    SERVER_WORKERS: int = 4  # Worker processes forked from the preloaded master
+    SERVER_MAX_REQUESTS: int = 10000  # Recycle a worker after this many requests (0 = never)
+    SERVER_MAX_REQUESTS_JITTER: int = 1000  # Random spread so workers don't recycle together
+    SERVER_TIMEOUT: int = 60  # Seconds before a silent worker is killed and replaced
+    SERVER_GRACEFUL_TIMEOUT: int = 30  # Seconds workers get to finish requests on restart
+    
+    # Result Cache Configuration
+    RESULT_CACHE_MAX_SIZE: int = 10000  # Maximum number of cached results per worker
+    RESULT_CACHE_SWEEP_INTERVAL: float = 60.0  # Seconds between background TTL sweeps
+    RESULT_CACHE_L2_ENABLED: bool = True  # Shared SQLite cache for all workers on the host
+    RESULT_CACHE_L2_PATH: str = "data/result_cache.sqlite3"
+    RESULT_CACHE_L2_TTL: int = 3600  # Seconds to keep shared results
+    RESULT_SET_TTL: int = 600  # Seconds a paginated result set (cursor handle) stays valid, 410 afterwards
+    RESULT_SET_MAX_RESULTS: int = 1000  # Ranked recipes stored per result set
+    RESULT_SET_CURSOR_SECRET: Optional[str] = None  # HMAC key for cursors (default: random key shared via the result store)
+    RAG_RANKING_CACHE_TTL: int = 3600  # Seconds to keep RAG retrieval + rerank results
+    SINGLEFLIGHT_ENABLED: bool = True  # Coalesce identical concurrent /recommend and /rag-recommend requests
+    
+    # Fridge Storage Configuration (persisted fridges with materialized recommendations)
+    FRIDGE_DB_PATH: str = "data/fridge.sqlite3"
+    FRIDGE_CANDIDATE_POOL: int = 500  # Candidate recipes kept per fridge (retrieved + ingredient matches)
+    FRIDGE_FULL_REFRESH_EVERY: int = 20  # Incremental updates before the retrieval is rerun
+    FRIDGE_REFRESH_RETRIES: int = 3  # Recomputations when the fridge changes while its state is computed
+    
+    # Recipe Data Configuration
+    RECIPE_STORE_PATH: str = "data/recipes.store"  # Columnar binary store built from recipes.json
+    RECIPE_COMPRESS_TEXT: bool = True  # Keep instructions zlib-compressed in memory (JSON fallback only)
+    GC_FREEZE_AFTER_LOAD: bool = True  # gc.freeze() the recipe corpus after load
+    
     # Embedding Model Configuration
     EMBEDDING_MODEL: str = "all-MiniLM-L6-v2"  # English-only, fast, 384 dimensions
     EMBEDDING_DIMENSION: int = 384
@@ -16,6 +47,26 @@ class Settings(BaseSettings):
     FAISS_INDEX_TYPE: str = "IndexFlatL2"  # Options: IndexFlatL2, IndexIVFFlat, IndexHNSW
     FAISS_METRIC: str = "L2"  # Options: L2 (Euclidean), IP (Inner Product)
     FAISS_INDEX_PATH: str = "data/recipe_index.faiss"
+    EXACT_SEARCH_FALLBACK: bool = True  # Search recipe_embeddings.npy with NumPy if the FAISS index cannot be loaded
+    EXACT_SEARCH_DTYPE: str = "float32"  # float32 (memory-mapped, shared) or float16 (half-size private copy, slower: blocks are widened per search)
+    EXACT_SEARCH_BLOCK_ROWS: int = 16384  # Embedding rows per matrix product block
+    
+    # Startup Warm-up Configuration
+    WARMUP_ENABLED: bool = True  # Load and warm all models in a background task at startup (see /ready)
+    WARMUP_BATCH_SIZE: int = 50  # Recipes per dummy rerank/encode batch (matches default retrieval_top_k)
+    WARMUP_RETRY_BASE_DELAY: float = 5.0  # Seconds before retrying failed components (doubles per retry)
+    WARMUP_RETRY_MAX_DELAY: float = 300.0  # Upper bound of the retry backoff
+    
+    # Cache Pre-warming Configuration (popular ingredient sets, background)
+    CACHE_PREWARM_ENABLED: bool = True  # Pre-compute /recommend and RAG rankings after warm-up
+    CACHE_PREWARM_SETS: int = 100  # Number of popular ingredient sets to warm
+    CACHE_PREWARM_TOP_INGREDIENTS: int = 40  # Most frequent ingredients combined into sets
+    CACHE_PREWARM_MAX_SET_SIZE: int = 3  # Largest ingredient combination considered
+    CACHE_PREWARM_BATCH_SIZE: int = 16  # Ingredient sets encoded per batched model call
+    CACHE_PREWARM_RATE: float = 5.0  # Maximum ingredient sets warmed per second
+    CACHE_PREWARM_MAX_IN_FLIGHT: int = 4  # Pause while more live requests than this are in flight
+    CACHE_PREWARM_INTERVAL: int = 1800  # Seconds between re-warm runs (0 = startup only)
+    CACHE_PREWARM_QUERY_LOG_LINES: int = 50000  # Recent query log records scanned for popular sets
     
     # Reranker Configuration
     RERANKER_MODEL: str = "cross-encoder/ms-marco-MiniLM-L-6-v2"  # Cross-encoder for re-ranking
@@ -27,6 +78,37 @@ class Settings(BaseSettings):
     GEMINI_MAX_TOKENS: int = 2000  # Maximum tokens for LLM response
     GEMINI_TEMPERATURE: float = 0.7  # Temperature for creativity (0.0-1.0)
     GEMINI_ENABLED: bool = True  # Enable/disable LLM explanations
+    GEMINI_API_BASE_URL: str = "https://generativelanguage.googleapis.com"  # Point to a local fake server for testing
+    GEMINI_TIMEOUT_SECONDS: float = 15.0  # Per-call deadline
+    GEMINI_MAX_CONCURRENCY: int = 8  # Maximum in-flight Gemini requests per worker
+    GEMINI_HEDGE_ENABLED: bool = False  # Send a hedged request when a call exceeds the recent p95 latency
+    GEMINI_BREAKER_FAILURE_THRESHOLD: int = 5  # Consecutive failures before the circuit opens
+    GEMINI_BREAKER_RESET_SECONDS: float = 30.0  # Seconds before a trial request is allowed again
+    LLM_FRAGMENT_CACHE_TTL: int = 1800  # Seconds to keep per-recipe explanation fragments
+    LLM_FRAGMENT_CACHE_MAX_SIZE: int = 5000  # Maximum number of cached fragments
+    LLM_PROMPT_TOKEN_BUDGET: int = 1200  # Approximate maximum prompt size in tokens
+    RECIPE_SUMMARIES_PATH: str = "data/recipe_summaries.json"  # Compact summaries written at index-build time
+    
+    # Query Log Configuration (sampled JSONL of normalized requests, see scripts/replay_queries.py)
+    QUERY_LOG_ENABLED: bool = False  # Capture sampled recommendation requests
+    QUERY_LOG_SAMPLE_RATE: float = 0.05  # Fraction of requests logged
+    QUERY_LOG_PATH: str = "data/query_log.jsonl"
+    QUERY_LOG_MAX_BYTES: int = 100 * 1024 * 1024  # Rotate to .1 beyond this size
+    QUERY_LOG_MAX_QUEUE: int = 10000  # Records buffered for the writer thread (dropped beyond)
+    
+    # Profiling Configuration (opt-in, see /api/admin/profiling)
+    PROFILING_ENABLED: bool = False  # Allow on-demand cProfile/stack/tracemalloc captures
+    PROFILING_ADMIN_TOKEN: Optional[str] = None  # Required in X-Admin-Token for profiling control
+    PROFILING_OUTPUT_DIR: str = "data/profiles"  # Where captures are written
+    PROFILING_SAMPLE_INTERVAL: float = 0.005  # Seconds between stack samples (stack mode)
+    PROFILING_TRACEMALLOC_FRAMES: int = 10  # Traceback depth recorded per allocation
+    
+    # Semantic Cache Configuration (LLM explanations)
+    SEMANTIC_CACHE_ENABLED: bool = True  # Enable/disable semantic explanation cache
+    SEMANTIC_CACHE_SIMILARITY_THRESHOLD: float = 0.95  # Minimum cosine similarity of query embeddings
+    SEMANTIC_CACHE_MIN_RECIPE_OVERLAP: float = 0.8  # Minimum Jaccard overlap of recommended recipes
+    SEMANTIC_CACHE_MAX_ENTRIES: int = 2000  # Maximum number of stored explanations
+    SEMANTIC_CACHE_TTL: int = 3600  # Seconds to keep stored explanations
 
     class Config:
         env_file = ".env"
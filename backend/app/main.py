@@ -1,14 +1,28 @@
+import time
+
+_import_started = time.perf_counter()
+
 from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse, Response
 from fastapi.middleware.cors import CORSMiddleware
 from datetime import datetime
-import time
 import logging
 from app.config import settings
-from app.routes import recipes, fridge
+from app.routes import recipes, ingredients, fridge, admin
 from app.services.faiss_service import faiss_service
 from app.services.reranker_service import reranker_service
 from app.services.llm_service import llm_service
 from app.services.rag_pipeline import rag_pipeline
+from app.services.semantic_cache import semantic_cache
+from app.services.warmup_service import warmup_service
+from app.services.prewarm_service import prewarm_service
+from app.services.query_log_service import query_log_service
+from app.services import service_metrics  # noqa: F401 (registers /metrics collectors)
+from app.utils.lazy_import import get_import_times
+from app.utils.metrics import registry, CONTENT_TYPE, HTTP_IN_FLIGHT, HTTP_REQUEST_DURATION
+
+# Import time of the app (heavy ML dependencies are imported lazily, see app.utils.lazy_import)
+APP_IMPORT_MS = round((time.perf_counter() - _import_started) * 1000, 1)
 
 # Setup logger
 logger = logging.getLogger(__name__)
@@ -24,8 +38,22 @@ app = FastAPI(
 @app.middleware("http")
 async def add_process_time_header(request: Request, call_next):
     start_time = time.time()
-    response = await call_next(request)
-    process_time = time.time() - start_time
+    HTTP_IN_FLIGHT.inc()
+    status = 500
+    try:
+        response = await call_next(request)
+        status = response.status_code
+    finally:
+        HTTP_IN_FLIGHT.dec()
+        process_time = time.time() - start_time
+        # Route template (not the raw path) keeps label cardinality bounded
+        route = request.scope.get("route")
+        HTTP_REQUEST_DURATION.observe(
+            process_time,
+            method=request.method,
+            route=route.path if route is not None else "unmatched",
+            status=status
+        )
     response.headers["X-Process-Time"] = str(round(process_time * 1000, 2))  # ms
     return response
 
@@ -36,7 +64,7 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
-    expose_headers=["X-Process-Time"],  # Frontend'in görebilmesi için
+    expose_headers=["X-Process-Time", "Server-Timing"],  # Frontend'in görebilmesi için
 )
 
 
@@ -52,11 +80,13 @@ async def startup_event():
     4. RAG Pipeline (coordinates all components)
     """
     logger.info("🚀 Starting Smart Fridge Chef API...")
+    logger.info(f"⏱️  App import time: {APP_IMPORT_MS}ms")
     
     # Step 1: Load FAISS index (Retriever)
     try:
         logger.info("📦 Loading FAISS index (Retriever)...")
-        success = faiss_service.load_index()
+        # Already loaded when the app was preloaded by a pre-fork master (gunicorn.conf.py)
+        success = faiss_service.is_loaded() or faiss_service.load_index()
         
         if success:
             index_info = faiss_service.get_index_info()
@@ -104,9 +134,29 @@ async def startup_event():
     logger.info(f"      - Reranker: {'✅' if reranker_service.enabled else '❌'}")
     logger.info(f"      - Generator (LLM): {'✅' if (llm_service.enabled and llm_service.api_key) else '❌'}")
     
+    # Step 5: Warm up models in the background (/ready reports progress)
+    if warmup_service.enabled:
+        warmup_service.start()
+        logger.info("🔥 Model warm-up started in background (see /ready)")
+    
+    # Step 6: Pre-warm caches for popular ingredient sets once models are warm
+    if prewarm_service.enabled:
+        prewarm_service.start()
+        logger.info("🔥 Cache pre-warming scheduled (popular ingredient sets)")
+    
     logger.info("✅ API startup completed - RAG Pipeline ready")
 
 
+# Shutdown event - Release persistent clients
+@app.on_event("shutdown")
+async def shutdown_event():
+    """Stop background warm-up retries and cache pre-warming, flush the query log and close the persistent Gemini HTTP client"""
+    warmup_service.stop()
+    prewarm_service.stop()
+    query_log_service.flush()
+    llm_service.close()
+
+
 # Health check endpoint
 @app.get("/health")
 async def health_check():
@@ -131,15 +181,46 @@ async def health_check():
             "generator": {
                 "available": llm_service.is_available(),
                 "model": llm_service.model_name if llm_service.enabled else None,
-                "has_api_key": bool(llm_service.api_key) if llm_service.enabled else False
+                "has_api_key": bool(llm_service.api_key) if llm_service.enabled else False,
+                "circuit_breaker": llm_service.breaker.get_state(),
+                "semantic_cache": semantic_cache.get_stats()
             }
-        }
+        },
+        "cache_prewarm": prewarm_service.get_status(),
+        "query_log": query_log_service.get_stats()
     }
 
 
+# Readiness endpoint
+@app.get("/ready")
+async def readiness_check():
+    """
+    Readiness probe: 200 once all required models are loaded and warm, 503 while warming up
+    or while a required component failed (retried in the background); reranker and
+    generator failures only set "degraded"
+    Includes per-component status and load timings
+    """
+    status = warmup_service.get_status()
+    status["startup_profile"] = {"app_import_ms": APP_IMPORT_MS, "lazy_imports_ms": get_import_times()}
+    return JSONResponse(status_code=200 if status["ready"] else 503, content=status)
+
+
+# Metrics endpoint
+@app.get("/metrics")
+async def metrics():
+    """
+    Prometheus metrics (text exposition format)
+    Stage latency histograms, cache hit/miss counters, Gemini queue depth, model load timings
+    Values are per worker process
+    """
+    return Response(content=registry.render(), media_type=CONTENT_TYPE)
+
+
 # Include routers
 app.include_router(recipes.router, prefix="/api")
+app.include_router(ingredients.router, prefix="/api")
 app.include_router(fridge.router, prefix="/api")
+app.include_router(admin.router, prefix="/api")
 
 
 # Root endpoint
@@ -152,7 +233,8 @@ async def root():
         "message": "Smart Fridge Chef API",
         "version": "1.0.0",
         "docs": "/docs",
-        "health": "/health"
+        "health": "/health",
+        "ready": "/ready"
     }
 
 
@@ -1,5 +1,6 @@
 from pydantic import BaseModel
 from typing import List
+from app.models.recipe import RecipeWithMatch
 
 
 class Ingredient(BaseModel):
@@ -15,3 +16,11 @@ class FridgeResponse(BaseModel):
     message: str
     ingredients: List[str]
 
+
+class FridgeRecommendationsResponse(BaseModel):
+    fridge_id: str
+    ingredients: List[str]
+    recommendations: List[RecipeWithMatch]
+    count: int
+    search_method: str  # "vector" or "string_matching"
+    refresh: str  # "materialized" (stored ranking served) or "full" (rematerialized)
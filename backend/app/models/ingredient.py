@@ -0,0 +1,13 @@
+from pydantic import BaseModel
+from typing import List
+
+
+class IngredientSuggestion(BaseModel):
+    name: str
+    count: int  # Number of recipes using the ingredient
+
+
+class IngredientSuggestResponse(BaseModel):
+    query: str
+    suggestions: List[IngredientSuggestion]
+    total: int  # Number of matching ingredients (before the limit)
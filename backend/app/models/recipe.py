@@ -1,5 +1,6 @@
 from pydantic import BaseModel, Field
-from typing import List, Optional
+from typing import List, Optional, Any, Dict
+from array import array
 
 
 class Recipe(BaseModel):
@@ -10,6 +11,54 @@ class Recipe(BaseModel):
     Cleaned_Ingredients: str  # Stored as a stringified list
 
 
+class CompactRecipe:
+    """
+    Memory-compact, read-only recipe record used for the in-memory corpus
+    Title/Image_Name are interned; Instructions and Cleaned_Ingredients are
+    fetched lazily from a text source (columnar store or compressed columns)
+    Exposes the same field names as Recipe
+    """
+    __slots__ = ("id", "Title", "Image_Name", "Ingredients", "ingredient_ids", "_text")
+    
+    def __init__(
+        self,
+        id: int,
+        title: str,
+        image_name: str,
+        ingredients: str,
+        text_source: Any,
+        ingredient_ids: Optional[array] = None
+    ):
+        self.id = id
+        self.Title = title
+        self.Image_Name = image_name
+        self.Ingredients = ingredients
+        self.ingredient_ids = ingredient_ids  # Canonical ingredient IDs (None if not precomputed)
+        self._text = text_source
+    
+    @property
+    def Instructions(self) -> str:
+        return self._text.get("Instructions", self.id)
+    
+    @property
+    def Cleaned_Ingredients(self) -> str:
+        return self._text.get("Cleaned_Ingredients", self.id)
+    
+    def dict(self) -> dict:
+        """Full field dict (same keys as Recipe.dict())"""
+        return {
+            "Title": self.Title,
+            "Ingredients": self.Ingredients,
+            "Instructions": self.Instructions,
+            "Image_Name": self.Image_Name,
+            "Cleaned_Ingredients": self.Cleaned_Ingredients
+        }
+    
+    def to_recipe(self) -> Recipe:
+        """Materialize as a Recipe model (no re-validation)"""
+        return Recipe.model_construct(**self.dict())
+
+
 class RecipeWithMatch(Recipe):
     matchingCount: int
     matchingIngredients: List[str]
@@ -63,6 +112,7 @@ class RAGRecommendRequest(BaseModel):
     explain: Optional[bool] = True
     top_k: Optional[int] = 10
     retrieval_top_k: Optional[int] = 50
+    use_semantic_cache: Optional[bool] = True
 
 
 class RAGMetadata(BaseModel):
@@ -73,6 +123,12 @@ class RAGMetadata(BaseModel):
     retriever_used: bool
     reranker_used: bool
     llm_used: bool
+    semantic_cache_hit: bool = False
+    ranking_cache_hit: bool = False  # Retrieval + reranking served from cache
+    prompt_tokens: Optional[int] = None
+    prompt_excluded_recipes: Optional[int] = None  # Recipes left out of the prompt by the token budget
+    fallback_fragments: Optional[int] = None  # Recipes explained without a Gemini fragment
+    stage_timings_ms: Dict[str, float] = Field(default_factory=dict)  # Per-stage durations of this request
 
 
 class RAGRecommendResponse(BaseModel):
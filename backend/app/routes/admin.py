@@ -0,0 +1,58 @@
+from fastapi import APIRouter, HTTPException, Header, Query
+from typing import Optional
+from app.services.profiling_service import profiling_service, PROFILE_MODES
+
+router = APIRouter(prefix="/admin/profiling", tags=["admin"])
+
+
+def _authorize(admin_token: Optional[str]):
+    """Profiling endpoints are hidden unless enabled, and require the admin token"""
+    if not profiling_service.enabled:
+        raise HTTPException(status_code=404, detail="Not Found")
+    if not profiling_service.is_authorized(admin_token):
+        raise HTTPException(status_code=403, detail="Invalid admin token")
+
+
+@router.get("/", response_model=dict)
+async def get_profiling_status(x_admin_token: Optional[str] = Header(None)):
+    """
+    Profiling status: armed request budget, running captures and written capture files
+    """
+    _authorize(x_admin_token)
+    return profiling_service.get_status()
+
+
+@router.post("/arm", response_model=dict)
+async def arm_profiling(
+    requests: int = Query(1, ge=1, le=1000, description="Number of requests to profile"),
+    mode: str = Query("cprofile", description=f"Profile mode: {', '.join(PROFILE_MODES)}"),
+    x_admin_token: Optional[str] = Header(None)
+):
+    """
+    Profile the next N recommendation requests (cProfile .prof or sampled stacks .folded)
+    
+    The budget is armed only in the worker process that answers this request (`pid`
+    in the response); other workers keep serving unprofiled. With several workers,
+    arm repeatedly until the pids of interest are covered, or profile individual
+    requests with the X-Profile header.
+    """
+    _authorize(x_admin_token)
+    if mode not in PROFILE_MODES:
+        raise HTTPException(status_code=400, detail=f"mode must be one of {', '.join(PROFILE_MODES)}")
+    profiling_service.arm(requests, mode)
+    return profiling_service.get_status()
+
+
+@router.post("/allocations", response_model=dict)
+async def capture_allocations(
+    seconds: float = Query(30.0, gt=0, le=3600, description="Capture window in seconds"),
+    top: int = Query(50, ge=1, le=1000, description="Number of allocation sites to report"),
+    x_admin_token: Optional[str] = Header(None)
+):
+    """
+    Start a tracemalloc capture: allocation growth between now and the end of the window
+    """
+    _authorize(x_admin_token)
+    if not profiling_service.capture_allocations(seconds, top):
+        raise HTTPException(status_code=409, detail="An allocation capture is already running")
+    return profiling_service.get_status()
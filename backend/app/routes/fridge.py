@@ -1,33 +1,96 @@
-from fastapi import APIRouter, HTTPException
-from app.models.fridge import FridgeRequest, FridgeResponse
+from fastapi import APIRouter, HTTPException, Query, Response
+from starlette.concurrency import run_in_threadpool
+import logging
+from app.models.fridge import FridgeRequest, FridgeResponse, FridgeRecommendationsResponse
+from app.services.fridge_service import fridge_service
+from app.services.recipe_service import recipe_service
+from app.utils import json_fragments
+
+# Setup logger
+logger = logging.getLogger(__name__)
 
 router = APIRouter(prefix="/fridge", tags=["fridge"])
 
+# Fridges are identified by a client-chosen ID (single shared fridge if omitted)
+FridgeId = Query("default", min_length=1, max_length=64, pattern=r"^[A-Za-z0-9_-]+$")
+
 
 @router.post("/ingredients", response_model=FridgeResponse)
-async def save_ingredients(request: FridgeRequest):
+async def save_ingredients(request: FridgeRequest, fridge_id: str = FridgeId):
     """
-    Save fridge ingredients (placeholder - will be connected to database later)
+    Replace the fridge contents and rematerialize its recommendations
     """
     try:
-        # TODO: Save to database when implemented
-        return FridgeResponse(
-            success=True,
-            message="Ingredients saved",
-            ingredients=request.ingredients
-        )
+        ingredients = await run_in_threadpool(fridge_service.set_ingredients, fridge_id, request.ingredients)
+        return FridgeResponse(success=True, message="Ingredients saved", ingredients=ingredients)
     except Exception as e:
+        logger.error(f"Error saving fridge ingredients: {e}", exc_info=True)
         raise HTTPException(status_code=500, detail=f"Failed to save ingredients: {str(e)}")
 
 
 @router.get("/ingredients", response_model=dict)
-async def get_ingredients():
+async def get_ingredients(fridge_id: str = FridgeId):
     """
-    Get saved fridge ingredients (placeholder - will be connected to database later)
+    Get saved fridge ingredients (in the order they were added)
     """
     try:
-        # TODO: Retrieve from database when implemented
-        return {"ingredients": []}
+        return {"ingredients": await run_in_threadpool(fridge_service.get_ingredients, fridge_id)}
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Failed to fetch ingredients: {str(e)}")
 
+
+@router.post("/ingredients/{ingredient}", response_model=FridgeResponse)
+async def add_ingredient(ingredient: str, fridge_id: str = FridgeId):
+    """
+    Add one ingredient; the stored recommendations are updated incrementally
+    """
+    if not fridge_service.normalize(ingredient):
+        raise HTTPException(status_code=400, detail="Ingredient name is required")
+    try:
+        ingredients, added = await run_in_threadpool(fridge_service.add_ingredient, fridge_id, ingredient)
+        message = "Ingredient added" if added else "Ingredient already in fridge"
+        return FridgeResponse(success=True, message=message, ingredients=ingredients)
+    except Exception as e:
+        logger.error(f"Error adding fridge ingredient: {e}", exc_info=True)
+        raise HTTPException(status_code=500, detail=f"Failed to add ingredient: {str(e)}")
+
+
+@router.delete("/ingredients/{ingredient}", response_model=FridgeResponse)
+async def remove_ingredient(ingredient: str, fridge_id: str = FridgeId):
+    """
+    Remove one ingredient; the stored recommendations are updated incrementally
+    """
+    try:
+        ingredients, removed = await run_in_threadpool(fridge_service.remove_ingredient, fridge_id, ingredient)
+    except Exception as e:
+        logger.error(f"Error removing fridge ingredient: {e}", exc_info=True)
+        raise HTTPException(status_code=500, detail=f"Failed to remove ingredient: {str(e)}")
+    if not removed:
+        raise HTTPException(status_code=404, detail="Ingredient not in fridge")
+    return FridgeResponse(success=True, message="Ingredient removed", ingredients=ingredients)
+
+
+@router.get("/recommendations", response_model=FridgeRecommendationsResponse)
+async def get_recommendations(fridge_id: str = FridgeId, limit: int = Query(50, ge=1, le=500)):
+    """
+    Materialized recommendations for the fridge contents, most matching ingredients first
+    
+    Served from the stored ranking; rematerialized only if missing or stale.
+    """
+    try:
+        ingredients, ranked, search_method, refresh = await run_in_threadpool(
+            fridge_service.get_recommendations, fridge_id, limit
+        )
+        # Fast path: splice pre-serialized recipe JSON (same shape as FridgeRecommendationsResponse)
+        content = json_fragments.json_object([
+            ("fridge_id", json_fragments.dumps(fridge_id)),
+            ("ingredients", json_fragments.dumps(ingredients)),
+            ("recommendations", recipe_service.render_results(ranked)),
+            ("count", json_fragments.dumps(len(ranked))),
+            ("search_method", json_fragments.dumps(search_method)),
+            ("refresh", json_fragments.dumps(refresh))
+        ])
+        return Response(content=content, media_type="application/json")
+    except Exception as e:
+        logger.error(f"Error fetching fridge recommendations: {e}", exc_info=True)
+        raise HTTPException(status_code=500, detail=f"Failed to fetch recommendations: {str(e)}")
@@ -0,0 +1,29 @@
+from fastapi import APIRouter, Query, Response
+from starlette.concurrency import run_in_threadpool
+from app.models.ingredient import IngredientSuggestResponse
+from app.services.ingredient_service import ingredient_suggest_service
+
+router = APIRouter(prefix="/ingredients", tags=["ingredients"])
+
+# The vocabulary only changes on deploy, so clients and proxies may cache suggestions
+SUGGEST_CACHE_CONTROL = "public, max-age=3600"
+
+
+@router.get("/suggest", response_model=IngredientSuggestResponse)
+async def suggest_ingredients(
+    response: Response,
+    q: str = Query("", max_length=100, description="Typed prefix of an ingredient name (any word)"),
+    limit: int = Query(10, ge=1, le=50)
+):
+    """
+    Autocomplete canonical ingredient names, most used in recipes first
+    
+    Served on the event loop: the index is built at startup and a lookup is a
+    binary search taking microseconds. An empty query returns the most used ingredients.
+    """
+    if not ingredient_suggest_service.is_built():
+        # Only before warm-up has built the index (or with warm-up disabled)
+        await run_in_threadpool(ingredient_suggest_service.build)
+    suggestions, total = ingredient_suggest_service.suggest(q, limit)
+    response.headers["Cache-Control"] = SUGGEST_CACHE_CONTROL
+    return IngredientSuggestResponse(query=q, suggestions=suggestions, total=total)
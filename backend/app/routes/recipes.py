@@ -1,10 +1,10 @@
-from fastapi import APIRouter, HTTPException, Query
+from fastapi import APIRouter, HTTPException, Header, Query, Response
 from typing import List, Optional
 import time
 import logging
+from app.config import settings
 from app.models.recipe import (
     Recipe,
-    RecipeWithMatch,
     RecipeRecommendRequest,
     RecipeRecommendResponse,
     RecipeSearchRequest,
@@ -17,39 +17,78 @@ from app.services.recipe_service import recipe_service
 from app.services.faiss_service import faiss_service
 from app.services.embedding_service import embedding_service
 from app.services.rag_pipeline import rag_pipeline
+from app.services.profiling_service import profiling_service
+from app.services.query_log_service import query_log_service
+from app.utils import json_fragments
+from app.utils.helpers import encode_cursor, decode_cursor
+from app.utils.metrics import StageTimer, format_server_timing
+from app.utils.singleflight import SingleFlight, request_key
 
 # Setup logger
 logger = logging.getLogger(__name__)
 
 router = APIRouter(prefix="/recipes", tags=["recipes"])
 
+# Identical concurrent requests share one computation (run in the thread pool, off the event loop)
+recommend_flight = SingleFlight("recommend", enabled=settings.SINGLEFLIGHT_ENABLED)
+rag_flight = SingleFlight("rag_recommend", enabled=settings.SINGLEFLIGHT_ENABLED)
+
 
 @router.get("/", response_model=dict)
 async def get_recipes(
     ingredients: Optional[str] = Query(None, description="Comma-separated list of ingredients"),
     limit: int = Query(50, ge=1, le=100),
-    offset: int = Query(0, ge=0)
+    offset: int = Query(0, ge=0),
+    cursor: Optional[str] = Query(None, description="Opaque cursor from a previous page (next_cursor)")
 ):
     """
     Get all recipes with optional filtering by ingredients
+    
+    Ingredient queries are ranked once and stored as a result set shared by all
+    workers; follow `next_cursor` to page through it without re-running the ranking
+    (410 once the result set expired).
     """
     try:
-        if ingredients:
-            # Filter by ingredients
-            ingredient_list = [ing.strip() for ing in ingredients.split(',')]
-            filtered_recipes = recipe_service.find_suitable_recipes(ingredient_list)
-            recipes = filtered_recipes[offset:offset + limit]
-            total = len(filtered_recipes)
-        else:
-            # Get all recipes
-            recipes = recipe_service.get_all_recipes(limit, offset)
-            total = recipe_service.get_total_count()
+        if cursor or ingredients:
+            secret = recipe_service.cursor_secret()
+            if cursor:
+                decoded = decode_cursor(cursor, secret)
+                if decoded is None:
+                    raise HTTPException(status_code=400, detail="Invalid cursor")
+                handle, offset = decoded
+                ranked = recipe_service.get_result_set(handle)
+                if ranked is None:
+                    raise HTTPException(status_code=410, detail="Cursor expired, please restart the search")
+            else:
+                # Filter by ingredients
+                ingredient_list = [ing.strip() for ing in ingredients.split(',')]
+                handle, ranked = recipe_service.open_result_set(ingredient_list)
+            
+            page = ranked[offset:offset + limit]
+            next_offset = offset + len(page)
+            next_cursor = encode_cursor(handle, next_offset, secret) if next_offset < len(ranked) else None
+            # Splice pre-serialized recipe JSON instead of building models
+            return Response(
+                content=json_fragments.json_object([
+                    ("recipes", recipe_service.render_results(page)),
+                    ("total", json_fragments.dumps(len(ranked))),
+                    ("count", json_fragments.dumps(len(page))),
+                    ("next_cursor", json_fragments.dumps(next_cursor))
+                ]),
+                media_type="application/json"
+            )
+        
+        # Get all recipes
+        recipes = [recipe.to_recipe() for recipe in recipe_service.get_all_recipes(limit, offset)]
+        total = recipe_service.get_total_count()
         
         return {
             "recipes": recipes,
             "total": total,
             "count": len(recipes)
         }
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Failed to fetch recipes: {str(e)}")
 
@@ -80,6 +119,7 @@ async def recommend_recipes(request: RecipeRecommendRequest):
     Uses FAISS vector search if available, falls back to string matching.
     """
     start_time = time.time()
+    timer = StageTimer()
     
     try:
         if not request.ingredients:
@@ -94,22 +134,38 @@ async def recommend_recipes(request: RecipeRecommendRequest):
         
         logger.info(f"Recipe recommendation request: {len(request.ingredients)} ingredients, method: {search_method}")
         
-        # Get recommendations
-        recommendations = recipe_service.find_suitable_recipes(
-            user_ingredients=request.ingredients,
-            use_vector_search=use_vector_search,
-            top_k=top_k
-        )
+        # Get recommendations (coalesced with identical in-flight requests, same key as the result cache)
+        with timer.stage("retrieval"):
+            ranked = await recommend_flight.do(
+                request_key(["recommend", sorted(request.ingredients), search_method, top_k]),
+                recipe_service.rank_recipes,
+                user_ingredients=request.ingredients,
+                use_vector_search=use_vector_search,
+                top_k=top_k
+            )
+        
+        # Fast path: splice pre-serialized recipe JSON (same shape as RecipeRecommendResponse)
+        with timer.stage("serialization"):
+            content = json_fragments.json_object([
+                ("recommendations", recipe_service.render_results(ranked)),
+                ("count", json_fragments.dumps(len(ranked))),
+                ("userIngredients", json_fragments.dumps(request.ingredients)),
+                ("search_method", json_fragments.dumps(search_method))
+            ])
         
         process_time = time.time() - start_time
-        logger.info(f"Recommendations generated in {process_time:.3f}s: {len(recommendations)} results")
+        logger.info(f"Recommendations generated in {process_time:.3f}s: {len(ranked)} results")
         
-        return RecipeRecommendResponse(
-            recommendations=recommendations,
-            count=len(recommendations),
-            userIngredients=request.ingredients,
-            search_method=search_method
-        )
+        if query_log_service.should_sample():
+            query_log_service.record(
+                "recommend",
+                {"ingredients": request.ingredients, "use_vector_search": use_vector_search, "top_k": top_k},
+                duration_ms=process_time * 1000,
+                stage_timings_ms=timer.timings,
+                results=[recipe.Image_Name for recipe in recipe_service.get_many(idx for idx, _ in ranked)]
+            )
+        
+        return Response(content=content, media_type="application/json")
     except HTTPException:
         raise
     except Exception as e:
@@ -117,6 +173,19 @@ async def recommend_recipes(request: RecipeRecommendRequest):
         raise HTTPException(status_code=500, detail=f"Failed to generate recommendations: {str(e)}")
 
 
+def _search_response(recipe_ids: List[int], query: str, search_method: str) -> Response:
+    """RecipeSearchResponse JSON spliced from pre-serialized recipe fragments"""
+    return Response(
+        content=json_fragments.json_object([
+            ("recipes", recipe_service.render_results([(recipe_id, []) for recipe_id in recipe_ids])),
+            ("count", json_fragments.dumps(len(recipe_ids))),
+            ("query", json_fragments.dumps(query)),
+            ("search_method", json_fragments.dumps(search_method))
+        ]),
+        media_type="application/json"
+    )
+
+
 @router.post("/search", response_model=RecipeSearchResponse)
 async def search_recipes(request: RecipeSearchRequest):
     """
@@ -147,31 +216,14 @@ async def search_recipes(request: RecipeSearchRequest):
                     embedding_service=embedding_service
                 )
                 
-                # Convert results to RecipeWithMatch
-                results = []
-                recipes = recipe_service.get_all_recipes(limit=recipe_service.get_total_count())
-                
-                for idx, dist in zip(indices, distances):
-                    if idx < len(recipes):
-                        recipe = recipes[idx]
-                        # For text search, we don't have ingredient matching, so set empty
-                        results.append(
-                            RecipeWithMatch(
-                                **recipe.dict(),
-                                matchingCount=0,
-                                matchingIngredients=[]
-                            )
-                        )
+                # Map FAISS rows to recipe IDs (no corpus copy)
+                recipe_ids = recipe_service.recipe_ids_for_rows(indices)
                 
                 process_time = time.time() - start_time
-                logger.info(f"Text search completed in {process_time:.3f}s: {len(results)} results")
+                logger.info(f"Text search completed in {process_time:.3f}s: {len(recipe_ids)} results")
                 
-                return RecipeSearchResponse(
-                    recipes=results,
-                    count=len(results),
-                    query=request.query,
-                    search_method="vector"
-                )
+                # For text search, we don't have ingredient matching, so matches are empty
+                return _search_response(recipe_ids, request.query, "vector")
                 
             except Exception as e:
                 logger.warning(f"Vector search failed: {e}, falling back to string matching")
@@ -179,32 +231,19 @@ async def search_recipes(request: RecipeSearchRequest):
         
         # Fallback: Simple string matching in recipe titles
         logger.info(f"Text search request: '{request.query}', method: string_matching")
-        recipes = recipe_service.get_all_recipes(limit=recipe_service.get_total_count())
-        
         query_lower = request.query.lower()
-        results = []
+        recipe_ids = []
         
-        for recipe in recipes:
+        for recipe in recipe_service.iter_recipes():
             if query_lower in recipe.Title.lower():
-                results.append(
-                    RecipeWithMatch(
-                        **recipe.dict(),
-                        matchingCount=0,
-                        matchingIngredients=[]
-                    )
-                )
-                if len(results) >= top_k:
+                recipe_ids.append(recipe.id)
+                if len(recipe_ids) >= top_k:
                     break
         
         process_time = time.time() - start_time
-        logger.info(f"Text search completed in {process_time:.3f}s: {len(results)} results")
+        logger.info(f"Text search completed in {process_time:.3f}s: {len(recipe_ids)} results")
         
-        return RecipeSearchResponse(
-            recipes=results,
-            count=len(results),
-            query=request.query,
-            search_method="string_matching"
-        )
+        return _search_response(recipe_ids, request.query, "string_matching")
         
     except HTTPException:
         raise
@@ -214,7 +253,12 @@ async def search_recipes(request: RecipeSearchRequest):
 
 
 @router.post("/rag-recommend", response_model=RAGRecommendResponse)
-async def rag_recommend(request: RAGRecommendRequest):
+async def rag_recommend(
+    request: RAGRecommendRequest,
+    response: Response,
+    x_profile: Optional[str] = Header(None),
+    x_admin_token: Optional[str] = Header(None)
+):
     """
     RAG-based recipe recommendations with explanations
     
@@ -231,13 +275,17 @@ async def rag_recommend(request: RAGRecommendRequest):
         "excluded_ingredients": ["mushroom"],
         "explain": true,
         "top_k": 10,
-        "retrieval_top_k": 50
+        "retrieval_top_k": 50,
+        "use_semantic_cache": true
     }
     
     Response includes:
     - recipes: Top-k reranked recipes
     - explanation: LLM-generated explanation (if explain=true)
-    - metadata: Pipeline execution details
+    - metadata: Pipeline execution details (incl. per-stage timings, also sent as Server-Timing header)
+    
+    With profiling enabled, `X-Profile: cprofile|stack` plus a valid `X-Admin-Token`
+    captures a profile of this request (see /api/admin/profiling).
     """
     start_time = time.time()
     
@@ -265,23 +313,65 @@ async def rag_recommend(request: RAGRecommendRequest):
             f"top_k={top_k}, explain={explain}"
         )
         
-        # Process through RAG pipeline
-        result = rag_pipeline.process(
-            user_ingredients=request.ingredients,
-            user_preferences=preferences_dict,
-            excluded_ingredients=request.excluded_ingredients or [],
-            top_k=top_k,
-            explain=explain,
-            retrieval_top_k=retrieval_top_k
+        use_semantic_cache = request.use_semantic_cache if request.use_semantic_cache is not None else True
+        requested_profile = x_profile if profiling_service.is_authorized(x_admin_token) else None
+        
+        def run_pipeline():
+            # Profiled in the worker thread that runs it (if sampled)
+            with profiling_service.profile("rag-recommend", requested_profile):
+                return rag_pipeline.process(
+                    user_ingredients=request.ingredients,
+                    user_preferences=preferences_dict,
+                    excluded_ingredients=request.excluded_ingredients or [],
+                    top_k=top_k,
+                    explain=explain,
+                    retrieval_top_k=retrieval_top_k,
+                    use_semantic_cache=use_semantic_cache
+                )
+        
+        # Process through RAG pipeline, coalesced with identical in-flight requests
+        result = await rag_flight.do(
+            request_key({
+                "ingredients": sorted(request.ingredients),
+                "preferences": preferences_dict,
+                "excluded": sorted(request.excluded_ingredients or []),
+                "top_k": top_k,
+                "explain": explain,
+                "retrieval_top_k": retrieval_top_k,
+                "use_semantic_cache": use_semantic_cache,
+                "profile": requested_profile
+            }),
+            run_pipeline
         )
         
         process_time = time.time() - start_time
+        response.headers["Server-Timing"] = format_server_timing({
+            **result['metadata'].get('stage_timings_ms', {}),
+            "total": process_time * 1000
+        })
         logger.info(
             f"RAG pipeline completed in {process_time:.3f}s: "
             f"{len(result['recipes'])} recipes, "
             f"explanation={'yes' if result['explanation'] else 'no'}"
         )
         
+        if query_log_service.should_sample():
+            query_log_service.record(
+                "rag-recommend",
+                {
+                    "ingredients": request.ingredients,
+                    "preferences": preferences_dict,
+                    "excluded_ingredients": request.excluded_ingredients,
+                    "top_k": top_k,
+                    "retrieval_top_k": retrieval_top_k,
+                    "explain": explain,
+                    "use_semantic_cache": use_semantic_cache
+                },
+                duration_ms=process_time * 1000,
+                stage_timings_ms=result['metadata'].get('stage_timings_ms'),
+                results=[recipe.Image_Name for recipe in result['recipes']]
+            )
+        
         return RAGRecommendResponse(
             recipes=result['recipes'],
             explanation=result['explanation'],
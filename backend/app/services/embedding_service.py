@@ -7,9 +7,12 @@ import os
 import logging
 from typing import List, Optional
 import numpy as np
-from sentence_transformers import SentenceTransformer
 from app.config import settings
 from app.models.recipe import Recipe
+from app.utils.lazy_import import lazy_import
+from app.utils.metrics import STAGE_DURATION
+
+sentence_transformers = lazy_import("sentence_transformers")  # Pulls in torch, imported on first model load
 
 # Setup logger
 logger = logging.getLogger(__name__)
@@ -22,7 +25,7 @@ class EmbeddingService:
     """
     
     def __init__(self):
-        self.model: Optional[SentenceTransformer] = None
+        self.model: Optional["sentence_transformers.SentenceTransformer"] = None
         self.model_name = settings.EMBEDDING_MODEL
         self.dimension = settings.EMBEDDING_DIMENSION
         self._model_loaded = False
@@ -32,7 +35,7 @@ class EmbeddingService:
         if not self._model_loaded:
             logger.info(f"Loading embedding model: {self.model_name}...")
             try:
-                self.model = SentenceTransformer(self.model_name)
+                self.model = sentence_transformers.SentenceTransformer(self.model_name)
                 self._model_loaded = True
                 logger.info(f"Embedding model loaded successfully (dimension: {self.dimension})")
             except Exception as e:
@@ -127,9 +130,38 @@ class EmbeddingService:
         if not self._model_loaded:
             self._load_model()
         
-        embedding = self.model.encode(text, convert_to_numpy=True)
+        with STAGE_DURATION.time(stage="embedding"):
+            embedding = self.model.encode(text, convert_to_numpy=True)
         return embedding
     
+    def encode_texts(self, texts: List[str], batch_size: int = 32) -> np.ndarray:
+        """
+        Generate embeddings for multiple texts in one batched model call
+        
+        Args:
+            texts: Input text strings (e.g., ingredient queries)
+            batch_size: Number of texts to process at once
+            
+        Returns:
+            numpy array of shape (num_texts, dimension)
+        """
+        if not self._model_loaded:
+            self._load_model()
+        
+        with STAGE_DURATION.time(stage="embedding_batch"):
+            return self.model.encode(texts, batch_size=batch_size, convert_to_numpy=True, show_progress_bar=False)
+    
+    def warm_up(self, texts: List[str]):
+        """
+        Load the model and run dummy inference (single query + batch) to warm kernels and allocators
+        
+        Raises:
+            RuntimeError: If the model cannot be loaded
+        """
+        self._load_model()
+        self.model.encode(texts[0], convert_to_numpy=True)
+        self.model.encode(texts, convert_to_numpy=True, show_progress_bar=False)
+    
     def get_model_info(self) -> dict:
         """Get information about the loaded model"""
         return {
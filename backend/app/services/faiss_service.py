@@ -6,12 +6,17 @@ Handles vector similarity search using FAISS index
 import os
 import json
 import numpy as np
-import faiss
 from pathlib import Path
 from typing import List, Tuple, Optional
 import logging
 from app.config import settings
 from app.models.recipe import Recipe
+from app.utils.helpers import build_recipe_summary
+from app.utils.lazy_import import lazy_import
+from app.utils.exact_search import ExactSearchIndex
+from app.utils.metrics import STAGE_DURATION
+
+faiss = lazy_import("faiss")  # Imported on first index load/build
 
 # Setup logger
 logger = logging.getLogger(__name__)
@@ -21,18 +26,25 @@ class FAISSService:
     """
     Service for FAISS-based similarity search
     Manages index creation, loading, and searching
+    
+    If the FAISS index cannot be loaded, an exact NumPy index over the memory-mapped
+    recipe_embeddings.npy (same interface and results as the flat FAISS index) is used instead.
     """
     
     def __init__(self):
-        self.index: Optional[faiss.Index] = None
+        self.index: Optional["faiss.Index"] = None
         self.embeddings: Optional[np.ndarray] = None
         self.recipes: Optional[List[Recipe]] = None
+        self.row_metadata: Optional[List[Tuple[str, str]]] = None  # (title, image_name) per index row
         self.index_path = Path(__file__).parent.parent.parent / settings.FAISS_INDEX_PATH
         self.metadata_path = self.index_path.parent / 'recipe_index_metadata.json'
+        self.summaries_path = Path(__file__).parent.parent.parent / settings.RECIPE_SUMMARIES_PATH
+        self.embeddings_path = self.index_path.parent / 'recipe_embeddings.npy'
+        self.embeddings_metadata_path = self.index_path.parent / 'recipe_embeddings_metadata.json'
         self.dimension = settings.EMBEDDING_DIMENSION
         self._index_loaded = False
     
-    def _create_index(self) -> faiss.Index:
+    def _create_index(self) -> "faiss.Index":
         """
         Create a new FAISS index based on configuration
         """
@@ -90,6 +102,7 @@ class FAISSService:
             self.index = index
             self.embeddings = embeddings_normalized
             self.recipes = recipes
+            self.row_metadata = [(recipe.Title, recipe.Image_Name) for recipe in recipes]
             self._index_loaded = True
             
             # Save to disk
@@ -132,11 +145,43 @@ class FAISSService:
             
             logger.info(f"Metadata saved to: {self.metadata_path}")
             
+            # Save compact recipe summaries (used by the LLM prompt builder)
+            summaries = [
+                {
+                    "title": recipe.Title,
+                    "image_name": recipe.Image_Name,
+                    "summary": build_recipe_summary(
+                        recipe.Title,
+                        recipe.Cleaned_Ingredients or recipe.Ingredients,
+                        recipe.Instructions or ""
+                    )
+                }
+                for recipe in self.recipes
+            ]
+            
+            with open(self.summaries_path, 'w', encoding='utf-8') as f:
+                json.dump(summaries, f, ensure_ascii=False)
+            
+            logger.info(f"Recipe summaries saved to: {self.summaries_path}")
+            
         except Exception as e:
             logger.error(f"Error saving FAISS index: {e}", exc_info=True)
             raise
     
     def load_index(self) -> bool:
+        """
+        Load FAISS index from disk, or the exact NumPy fallback index if that fails
+        
+        Returns:
+            True if successful, False otherwise
+        """
+        if self._load_faiss_index():
+            return True
+        if settings.EXACT_SEARCH_FALLBACK:
+            return self._load_exact_index()
+        return False
+    
+    def _load_faiss_index(self) -> bool:
         """
         Load FAISS index from disk
         
@@ -188,6 +233,7 @@ class FAISSService:
             logger.info(f"  Dimension: {self.dimension}")
             
             # Load metadata
+            self.row_metadata = None
             if self.metadata_path.exists():
                 try:
                     with open(self.metadata_path, 'r', encoding='utf-8') as f:
@@ -200,15 +246,18 @@ class FAISSService:
                             f"doesn't match index ({self.index.ntotal})"
                         )
                     else:
+                        self.row_metadata = [
+                            (entry.get("title", ""), entry.get("image_name", ""))
+                            for entry in sorted(metadata.get("recipes", []), key=lambda entry: entry["index"])
+                        ]
                         logger.info(f"Metadata loaded: {metadata.get('num_vectors', 'unknown')} vectors")
                 except Exception as e:
                     logger.warning(f"Failed to load metadata: {e}")
             
-            # Load embeddings (for reference, not required for search)
-            embeddings_path = self.index_path.parent / 'recipe_embeddings.npy'
-            if embeddings_path.exists():
+            # Load embeddings (for reference, not required for search; memory-mapped, not copied)
+            if self.embeddings_path.exists():
                 try:
-                    self.embeddings = np.load(embeddings_path)
+                    self.embeddings = np.load(self.embeddings_path, mmap_mode='r')
                     logger.debug(f"Embeddings loaded: {self.embeddings.shape}")
                 except Exception as e:
                     logger.debug(f"Failed to load embeddings file (optional): {e}")
@@ -229,6 +278,64 @@ class FAISSService:
             logger.warning("Vector search will not be available. Using fallback search methods.")
             return False
     
+    def _load_exact_index(self) -> bool:
+        """
+        Load the exact NumPy index over recipe_embeddings.npy (FAISS index unavailable)
+        
+        Returns:
+            True if successful, False otherwise
+        """
+        self.index = None
+        try:
+            if not self.embeddings_path.exists():
+                logger.warning(f"Embeddings file not found for exact search fallback: {self.embeddings_path}")
+                return False
+            
+            index = ExactSearchIndex.from_file(
+                self.embeddings_path,
+                metric="IP" if settings.FAISS_INDEX_TYPE == "IndexFlatIP" else "L2",
+                dtype=settings.EXACT_SEARCH_DTYPE,
+                block_rows=settings.EXACT_SEARCH_BLOCK_ROWS
+            )
+            if index.ntotal == 0 or index.d != self.dimension:
+                logger.error(
+                    f"Embeddings file unusable for exact search: {index.ntotal} vectors, "
+                    f"dimension {index.d} (expected {self.dimension})"
+                )
+                return False
+            
+            # Row order of the embeddings file (written together with it)
+            self.row_metadata = None
+            if self.embeddings_metadata_path.exists():
+                try:
+                    with open(self.embeddings_metadata_path, 'r', encoding='utf-8') as f:
+                        metadata = json.load(f)
+                    mapping = metadata.get("recipe_mapping", [])
+                    if len(mapping) == index.ntotal:
+                        self.row_metadata = [
+                            (entry.get("title", ""), entry.get("image_name", ""))
+                            for entry in sorted(mapping, key=lambda entry: entry["index"])
+                        ]
+                    else:
+                        logger.warning(
+                            f"Embeddings metadata rows ({len(mapping)}) don't match embeddings ({index.ntotal})"
+                        )
+                except Exception as e:
+                    logger.warning(f"Failed to load embeddings metadata: {e}")
+            
+            self.index = index
+            self.embeddings = index.embeddings
+            self._index_loaded = True
+            logger.warning(
+                f"Using exact NumPy search over {self.embeddings_path.name} instead of FAISS "
+                f"({index.ntotal} vectors, {settings.EXACT_SEARCH_DTYPE})"
+            )
+            return True
+            
+        except Exception as e:
+            logger.error(f"Error loading exact search fallback: {e}", exc_info=True)
+            return False
+    
     def is_loaded(self) -> bool:
         """
         Check if FAISS index is loaded and ready for search
@@ -289,6 +396,40 @@ class FAISSService:
                 f"got {query_vector.shape[0]}"
             )
         
+        # Reshape query to (1, dimension) and return the flattened single row
+        distances, indices = self.search_batch(query_vector.reshape(1, -1), k)
+        return distances[0], indices[0]
+    
+    def search_batch(
+        self,
+        query_vectors: np.ndarray,
+        k: int = 10
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Search for similar vectors of several queries in one index call
+        
+        Args:
+            query_vectors: Query embeddings of shape (num_queries, dimension)
+            k: Number of results to return per query
+            
+        Returns:
+            Tuple of (distances, indices), each of shape (num_queries, k), best first
+            
+        Raises:
+            RuntimeError: If index is not loaded or the search fails
+            ValueError: If the query matrix has wrong shape or dimension
+        """
+        self._ensure_index_loaded()
+        
+        if query_vectors is None or query_vectors.size == 0:
+            raise ValueError("Query vectors cannot be empty")
+        
+        if query_vectors.ndim != 2 or query_vectors.shape[1] != self.dimension:
+            raise ValueError(
+                f"Query matrix shape mismatch: expected (n, {self.dimension}), "
+                f"got {query_vectors.shape}"
+            )
+        
         # Validate k
         if k <= 0:
             raise ValueError(f"k must be positive, got {k}")
@@ -301,16 +442,12 @@ class FAISSService:
             k = self.index.ntotal
         
         try:
-            # Reshape query to (1, dimension) for FAISS
-            query_reshaped = query_vector.reshape(1, -1).astype('float32')
-            
             # Search
-            distances, indices = self.index.search(query_reshaped, k)
-            
-            logger.debug(f"FAISS search completed: {len(indices[0])} results")
+            with STAGE_DURATION.time(stage="faiss_search"):
+                distances, indices = self.index.search(np.ascontiguousarray(query_vectors, dtype='float32'), k)
             
-            # Return flattened results
-            return distances[0], indices[0]
+            logger.debug(f"FAISS search completed: {len(query_vectors)} queries x {indices.shape[1]} results")
+            return distances, indices
             
         except Exception as e:
             logger.error(f"Error during FAISS search: {e}", exc_info=True)
@@ -359,6 +496,11 @@ class FAISSService:
             logger.error(f"Error in text search: {e}", exc_info=True)
             raise RuntimeError(f"Text search failed: {e}") from e
     
+    @staticmethod
+    def build_ingredient_query(ingredients: List[str]) -> str:
+        """Create query text from a list of ingredients"""
+        return f"Recipe with ingredients: {', '.join(ingredients)}"
+    
     def search_by_ingredients(
         self,
         ingredients: List[str],
@@ -387,7 +529,7 @@ class FAISSService:
         
         try:
             # Create query text from ingredients
-            query_text = f"Recipe with ingredients: {', '.join(ingredients)}"
+            query_text = self.build_ingredient_query(ingredients)
             logger.debug(f"Searching by ingredients: {ingredients}")
             
             return self.search_by_text(query_text, k, embedding_service)
@@ -0,0 +1,267 @@
+"""
+Fridge Service
+Persists fridge contents (SQLite) and a materialized recommendation set per fridge
+Adding or removing one ingredient updates the stored ranking incrementally: match
+counts of the existing candidate pool are updated in place and recipes containing an
+added ingredient join the pool, without rerunning retrieval
+States are computed outside write transactions and stored with a compare-and-set on
+the fridge contents, so retrieval never runs while the database write lock is held
+"""
+
+import time
+import logging
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+from app.config import settings
+from app.services.recipe_service import recipe_service
+from app.services.faiss_service import faiss_service
+from app.utils.fridge_store import FridgeStore
+from app.utils.metrics import FRIDGE_REFRESH_DURATION
+
+# Setup logger
+logger = logging.getLogger(__name__)
+
+NOT_RETRIEVED = -1  # Pool entry added by ingredient match, not by vector retrieval
+
+
+class FridgeService:
+    """
+    Fridge persistence with materialized, incrementally maintained recommendations
+    
+    The state of a fridge is a candidate pool of [recipe ID, retrieval rank, matching
+    ingredients] entries, ranked by matching count, then retrieval rank. A full refresh
+    retrieves FRIDGE_CANDIDATE_POOL recipes for the whole fridge (vector search, or
+    string matching without an index) and adds the recipes containing each canonical
+    fridge ingredient. Incremental updates keep the retrieval part as it was, so they
+    drift slowly from a full refresh; a full refresh runs every FRIDGE_FULL_REFRESH_EVERY
+    updates and whenever the dataset/index version or search method changes.
+    
+    A computed state is stored only if the fridge still holds the ingredients it was
+    computed for; otherwise it is recomputed for the new contents (up to
+    FRIDGE_REFRESH_RETRIES times, after which the next read rematerializes it).
+    """
+    
+    def __init__(self):
+        self.store = FridgeStore(Path(__file__).parent.parent.parent / settings.FRIDGE_DB_PATH)
+        self.pool_size = settings.FRIDGE_CANDIDATE_POOL
+        self.full_refresh_every = settings.FRIDGE_FULL_REFRESH_EVERY
+        self.refresh_retries = settings.FRIDGE_REFRESH_RETRIES
+        self._data_version: Optional[str] = None
+    
+    @staticmethod
+    def normalize(ingredient: str) -> str:
+        return ingredient.strip().lower()
+    
+    def _version(self) -> str:
+        if self._data_version is None:
+            self._data_version = recipe_service.data_version()
+        return self._data_version
+    
+    @staticmethod
+    def _search_method() -> str:
+        return "vector" if faiss_service.is_loaded() else "string_matching"
+    
+    def _rank_pool(self, pool: Dict[int, list]) -> List[list]:
+        """Sort pool entries, drop recipes no longer matching anything (unless retrieved), trim to the pool size"""
+        entries = [
+            [recipe_id, retrieval_rank, matching]
+            for recipe_id, (retrieval_rank, matching) in pool.items()
+            if matching or retrieval_rank != NOT_RETRIEVED
+        ]
+        entries.sort(key=lambda entry: (
+            -len(entry[2]),
+            entry[1] if entry[1] != NOT_RETRIEVED else self.pool_size,
+            entry[0]
+        ))
+        return entries[:self.pool_size]
+    
+    def _add_ingredient_matches(self, pool: Dict[int, list], ingredients: List[str], ingredient: str):
+        """Add recipes containing a canonical ingredient to the pool (no-op for other names)"""
+        recipe_ids = recipe_service.recipes_with_ingredient(ingredient)
+        for recipe_id in recipe_ids or ():
+            if recipe_id not in pool:
+                pool[recipe_id] = [NOT_RETRIEVED, recipe_service.match_ingredients(recipe_id, ingredients)]
+    
+    def _full_state(self, ingredients: List[str]) -> dict:
+        """Materialize recommendations from scratch: retrieval for the whole fridge plus ingredient matches"""
+        pool: Dict[int, list] = {}
+        if ingredients:
+            ranked = recipe_service.rank_recipes(ingredients, use_vector_search=True, top_k=self.pool_size)
+            for retrieval_rank, (recipe_id, _) in enumerate(ranked):
+                # Matching lists of cached rankings may follow another request's ingredient order
+                pool[recipe_id] = [retrieval_rank, recipe_service.match_ingredients(recipe_id, ingredients)]
+            for ingredient in ingredients:
+                self._add_ingredient_matches(pool, ingredients, ingredient)
+        return {
+            "ingredients": ingredients,
+            "search_method": self._search_method(),
+            "updates": 0,
+            "pool": self._rank_pool(pool)
+        }
+    
+    def _incremental_state(self, state: dict, ingredients: List[str], added: Optional[str], removed: Optional[str]) -> dict:
+        """Apply one added or removed ingredient to a materialized state"""
+        pool = {recipe_id: [retrieval_rank, matching] for recipe_id, retrieval_rank, matching in state["pool"]}
+        if added is not None:
+            for recipe_id, entry in pool.items():
+                if recipe_service.match_ingredients(recipe_id, [added]):
+                    entry[1].append(added)
+            self._add_ingredient_matches(pool, ingredients, added)
+        if removed is not None:
+            for entry in pool.values():
+                if removed in entry[1]:
+                    entry[1].remove(removed)
+        return {
+            "ingredients": ingredients,
+            "search_method": state["search_method"],
+            "updates": state["updates"] + 1,
+            "pool": self._rank_pool(pool)
+        }
+    
+    def _is_current(self, state: Optional[dict], ingredients: List[str]) -> bool:
+        return (
+            state is not None
+            and state["ingredients"] == ingredients
+            and state["search_method"] == self._search_method()
+        )
+    
+    def _compute(
+        self,
+        ingredients: List[str],
+        state: Optional[dict] = None,
+        previous: Optional[List[str]] = None,
+        added: Optional[str] = None,
+        removed: Optional[str] = None
+    ) -> Tuple[dict, str]:
+        """
+        Compute the materialized state after a change (no store access)
+        
+        Incremental only if `state` was materialized for `previous` (the contents
+        before this one added or removed ingredient)
+        
+        Returns:
+            Tuple of (new state, refresh mode: "incremental" or "full")
+        """
+        started = time.perf_counter()
+        incremental = (
+            (added is not None or removed is not None)
+            and self._is_current(state, previous)
+            and state["updates"] + 1 < self.full_refresh_every
+        )
+        if incremental:
+            new_state, mode = self._incremental_state(state, ingredients, added, removed), "incremental"
+        else:
+            new_state, mode = self._full_state(ingredients), "full"
+        FRIDGE_REFRESH_DURATION.observe(time.perf_counter() - started, mode=mode)
+        return new_state, mode
+    
+    def _refresh(
+        self,
+        fridge_id: str,
+        ingredients: List[str],
+        state: Optional[dict] = None,
+        previous: Optional[List[str]] = None,
+        added: Optional[str] = None,
+        removed: Optional[str] = None
+    ) -> Tuple[dict, str]:
+        """
+        Compute the state for `ingredients` outside any transaction, then store it if the
+        fridge still holds exactly those ingredients (compare-and-set in a short transaction)
+        
+        If the contents changed meanwhile, a state another request already stored for the
+        new contents is kept; otherwise the state is recomputed (full) for the new contents.
+        
+        Returns:
+            Tuple of (state, refresh mode: "incremental", "full" or "materialized")
+        """
+        for _ in range(self.refresh_retries + 1):
+            new_state, mode = self._compute(ingredients, state, previous, added, removed)
+            with self.store.transaction():
+                current = self.store.get_ingredients(fridge_id)
+                if current == ingredients:
+                    self.store.set_state(fridge_id, self._version(), new_state)
+                    return new_state, mode
+                stored = self.store.get_state(fridge_id, self._version())
+            if self._is_current(stored, current):
+                return stored, "materialized"
+            ingredients, state, added, removed = current, None, None, None
+        logger.warning(f"Fridge {fridge_id} kept changing during refresh, state not stored")
+        return new_state, mode
+    
+    def get_ingredients(self, fridge_id: str) -> List[str]:
+        return self.store.get_ingredients(fridge_id)
+    
+    def set_ingredients(self, fridge_id: str, ingredients: List[str]) -> List[str]:
+        """
+        Replace the fridge contents and rematerialize its recommendations
+        
+        Args:
+            fridge_id: Fridge identifier
+            ingredients: Ingredient names (normalized, duplicates dropped)
+        
+        Returns:
+            Stored ingredients
+        """
+        ingredients = list(dict.fromkeys(name for name in map(self.normalize, ingredients) if name))
+        with self.store.transaction():
+            self.store.replace_ingredients(fridge_id, ingredients)
+        self._refresh(fridge_id, ingredients)
+        return ingredients
+    
+    def add_ingredient(self, fridge_id: str, ingredient: str) -> Tuple[List[str], bool]:
+        """
+        Add one ingredient and update the recommendations incrementally
+        
+        Returns:
+            Tuple of (stored ingredients, whether the ingredient was added)
+        """
+        ingredient = self.normalize(ingredient)
+        with self.store.transaction():
+            previous = self.store.get_ingredients(fridge_id)
+            added = self.store.add_ingredient(fridge_id, ingredient)
+            ingredients = self.store.get_ingredients(fridge_id)
+            state = self.store.get_state(fridge_id, self._version()) if added else None
+        if added:
+            self._refresh(fridge_id, ingredients, state, previous, added=ingredient)
+        return ingredients, added
+    
+    def remove_ingredient(self, fridge_id: str, ingredient: str) -> Tuple[List[str], bool]:
+        """
+        Remove one ingredient and update the recommendations incrementally
+        
+        Returns:
+            Tuple of (stored ingredients, whether the ingredient was in the fridge)
+        """
+        ingredient = self.normalize(ingredient)
+        with self.store.transaction():
+            previous = self.store.get_ingredients(fridge_id)
+            removed = self.store.remove_ingredient(fridge_id, ingredient)
+            ingredients = self.store.get_ingredients(fridge_id)
+            state = self.store.get_state(fridge_id, self._version()) if removed else None
+        if removed:
+            self._refresh(fridge_id, ingredients, state, previous, removed=ingredient)
+        return ingredients, removed
+    
+    def get_recommendations(self, fridge_id: str, limit: int = 50) -> Tuple[List[str], List[Tuple[int, List[str]]], str, str]:
+        """
+        Materialized recommendations of a fridge (rematerialized if missing or stale)
+        
+        Args:
+            fridge_id: Fridge identifier
+            limit: Maximum number of recommendations
+        
+        Returns:
+            Tuple of (ingredients, ranked (recipe ID, matching ingredients) pairs,
+            search method, refresh mode: "materialized" or "full")
+        """
+        ingredients = self.store.get_ingredients(fridge_id)
+        state = self.store.get_state(fridge_id, self._version())
+        mode = "materialized"
+        if not self._is_current(state, ingredients):
+            state, mode = self._refresh(fridge_id, ingredients)
+        ranked = [(recipe_id, matching) for recipe_id, _, matching in state["pool"][:limit]]
+        return state["ingredients"], ranked, state["search_method"], mode
+
+
+# Singleton instance
+fridge_service = FridgeService()
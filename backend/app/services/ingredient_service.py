@@ -0,0 +1,137 @@
+"""
+Ingredient Suggest Service
+Prefix autocomplete over the canonical ingredient vocabulary (data/ingredients.json),
+ranked by how many recipes use each ingredient
+Built once from the recipe corpus (startup warm-up / pre-fork preload); lookups are
+a binary search over a sorted key array and take microseconds
+"""
+
+import time
+import heapq
+import logging
+import threading
+import unicodedata
+from array import array
+from bisect import bisect_left
+from typing import Dict, List, Optional, Tuple
+from app.services.recipe_service import recipe_service
+from app.utils.vocabulary import ingredient_vocabulary
+
+# Setup logger
+logger = logging.getLogger(__name__)
+
+
+def fold(text: str) -> str:
+    """Lowercase and strip accents (so "acai" also finds "açai")"""
+    decomposed = unicodedata.normalize("NFKD", text.strip().lower())
+    return "".join(char for char in decomposed if not unicodedata.combining(char))
+
+
+class IngredientSuggestService:
+    """
+    Sorted-array prefix index over canonical ingredient names
+    
+    Every word start of a name is a key ("ahi tuna" is found by "ahi" and "tu"),
+    so the keys matching a prefix form one contiguous range found with two bisects.
+    Matches are ranked by recipe frequency (canonical ingredient IDs per recipe,
+    the same substring semantics as ingredient match counting).
+    """
+    
+    def __init__(self):
+        self._keys: List[str] = []
+        self._key_ids = array('H')
+        self._names: List[str] = []
+        self._frequency = array('I')
+        self._popular: List[int] = []
+        self._ranked_by_initial: Dict[str, List[int]] = {}
+        self._lock = threading.Lock()
+        self._built = False
+        self._build_ms: Optional[float] = None
+    
+    def build(self, force: bool = False):
+        """Count recipe frequencies and build the sorted prefix keys (once, unless forced)"""
+        with self._lock:
+            if self._built and not force:
+                return
+            started = time.perf_counter()
+            names = ingredient_vocabulary.names
+            
+            frequency = array('I', [0] * len(names))
+            for recipe in recipe_service.iter_recipes():
+                ids = recipe.ingredient_ids
+                if ids is None:
+                    ids = ingredient_vocabulary.match_ids(recipe.Ingredients)
+                for ingredient_id in set(ids):
+                    frequency[ingredient_id] += 1
+            
+            entries: List[Tuple[str, int]] = []
+            for ingredient_id, name in enumerate(names):
+                folded = fold(name)
+                entries.append((folded, ingredient_id))
+                entries.extend(
+                    (folded[i + 1:], ingredient_id) for i, char in enumerate(folded) if char in " -" and folded[i + 1:]
+                )
+            entries.sort()
+            
+            self._keys = [key for key, _ in entries]
+            self._key_ids = array('H', [ingredient_id for _, ingredient_id in entries])
+            self._names = names
+            self._frequency = frequency
+            self._popular = sorted(range(len(names)), key=lambda i: (-frequency[i], names[i]))
+            # One-character prefixes match the widest ranges; keep their rankings precomputed
+            self._ranked_by_initial = {}
+            for key, ingredient_id in entries:
+                self._ranked_by_initial.setdefault(key[0], set()).add(ingredient_id)
+            self._ranked_by_initial = {
+                initial: sorted(ids, key=lambda i: (-frequency[i], names[i]))
+                for initial, ids in self._ranked_by_initial.items()
+            }
+            self._build_ms = round((time.perf_counter() - started) * 1000, 1)
+            self._built = True
+        logger.info(f"🔤 Ingredient suggest index: {len(names)} ingredients, {len(entries)} keys in {self._build_ms}ms")
+    
+    def is_built(self) -> bool:
+        return self._built
+    
+    def suggest(self, query: str, limit: int = 10) -> Tuple[List[dict], int]:
+        """
+        Ingredients with a word starting with the query, most used first
+        
+        Args:
+            query: Typed prefix (case- and accent-insensitive); empty returns the most used ingredients
+            limit: Maximum number of suggestions
+        
+        Returns:
+            Tuple of (suggestions as {"name", "count"} dicts, total number of matches)
+        """
+        if not self._built:
+            self.build()
+        
+        prefix = fold(query)
+        if not prefix:
+            ids = self._popular[:limit]
+            total = len(self._popular)
+        elif len(prefix) == 1:
+            ranked = self._ranked_by_initial.get(prefix, [])
+            ids = ranked[:limit]
+            total = len(ranked)
+        else:
+            start = bisect_left(self._keys, prefix)
+            end = bisect_left(self._keys, prefix + "\uffff", start)
+            matched = set(self._key_ids[start:end])
+            total = len(matched)
+            ids = heapq.nsmallest(limit, matched, key=lambda i: (-self._frequency[i], self._names[i]))
+        
+        return [{"name": self._names[i], "count": self._frequency[i]} for i in ids], total
+    
+    def get_stats(self) -> dict:
+        return {
+            "built": self._built,
+            "ingredients": len(self._names),
+            "keys": len(self._keys),
+            "build_ms": self._build_ms
+        }
+
+
+# Singleton instance
+ingredient_suggest_service = IngredientSuggestService()
@@ -1,18 +1,48 @@
 """
 LLM Service
-Handles text generation using Google Gemini API
+Handles text generation using Google Gemini API (REST, persistent HTTP client)
 Provides explanations for recipe recommendations
+Guards calls with a deadline, concurrency cap, optional hedging and a circuit breaker
 """
 
+import re
+import json
+import time
 import logging
-from typing import List, Optional, Dict, Any
-import google.generativeai as genai
+import threading
+from collections import deque
+from pathlib import Path
+from concurrent.futures import ThreadPoolExecutor, Future, wait, FIRST_COMPLETED
+from typing import List, Optional, Dict, Any, Tuple
 from app.config import settings
 from app.models.recipe import Recipe
+from app.utils.cache import BoundedCache
+from app.utils.circuit_breaker import CircuitBreaker
+from app.utils.helpers import build_recipe_summary, split_ingredient_items, short_ingredient_name
+from app.utils.lazy_import import lazy_import
+from app.utils.metrics import STAGE_DURATION
+
+httpx = lazy_import("httpx")  # Imported when the Gemini client is created
 
 # Setup logger
 logger = logging.getLogger(__name__)
 
+_FRAGMENT_PATTERN = re.compile(r'^\[(\d+)\]\s*(.*)$')
+_SUMMARY_PATTERN = re.compile(r'^\**SUMMARY\**:\**\s*', re.IGNORECASE)
+
+_SYSTEM_PROMPT = """You are a friendly professional chef. For each numbered recipe, explain in 1-2 sentences why it fits the user's ingredients, name missing ingredients with alternatives, and respect dietary preferences.
+
+Response format (follow exactly, English):
+[1] explanation for recipe 1
+[2] explanation for recipe 2
+...
+SUMMARY: 2-3 sentence summary of all recommended recipes"""
+
+
+def estimate_tokens(text: str) -> int:
+    """Approximate token count (~4 characters per token for English text)"""
+    return len(text) // 4 + 1
+
 
 class LLMService:
     """
@@ -26,8 +56,27 @@ class LLMService:
         self.max_tokens = settings.GEMINI_MAX_TOKENS
         self.temperature = settings.GEMINI_TEMPERATURE
         self.enabled = settings.GEMINI_ENABLED
-        self.model: Optional[genai.GenerativeModel] = None
+        self.base_url = settings.GEMINI_API_BASE_URL
+        self.timeout = settings.GEMINI_TIMEOUT_SECONDS
+        self.max_concurrency = settings.GEMINI_MAX_CONCURRENCY
+        self.hedge_enabled = settings.GEMINI_HEDGE_ENABLED
+        self.model: Optional["httpx.Client"] = None  # Persistent HTTP client (connection reuse)
         self._model_loaded = False
+        self.fragment_ttl = settings.LLM_FRAGMENT_CACHE_TTL
+        self.fragment_cache = BoundedCache(max_size=settings.LLM_FRAGMENT_CACHE_MAX_SIZE)
+        self.prompt_token_budget = settings.LLM_PROMPT_TOKEN_BUDGET
+        self.summaries_path = Path(__file__).parent.parent.parent / settings.RECIPE_SUMMARIES_PATH
+        self._summaries: Optional[Dict[Tuple[str, str], str]] = None
+        self.breaker = CircuitBreaker(
+            failure_threshold=settings.GEMINI_BREAKER_FAILURE_THRESHOLD,
+            reset_timeout=settings.GEMINI_BREAKER_RESET_SECONDS
+        )
+        self._semaphore = threading.BoundedSemaphore(self.max_concurrency)
+        self._in_flight = 0
+        self._in_flight_lock = threading.Lock()
+        self._queued = 0  # Callers waiting for a concurrency slot
+        self._latencies = deque(maxlen=200)  # Recent successful call latencies (seconds)
+        self._executor: Optional[ThreadPoolExecutor] = None
     
     def _load_model(self):
         """Initialize Gemini API client and load model"""
@@ -43,9 +92,21 @@ class LLMService:
         
         if not self._model_loaded:
             try:
-                logger.info(f"Initializing Gemini API: {self.model_name}")
-                genai.configure(api_key=self.api_key)
-                self.model = genai.GenerativeModel(self.model_name)
+                logger.info(f"Initializing Gemini API: {self.model_name} ({self.base_url})")
+                self.model = httpx.Client(
+                    base_url=self.base_url,
+                    # Key in a header, never in the URL (URLs end up in error messages and logs)
+                    headers={"x-goog-api-key": self.api_key},
+                    timeout=httpx.Timeout(self.timeout),
+                    limits=httpx.Limits(
+                        max_connections=self.max_concurrency * 2,
+                        max_keepalive_connections=self.max_concurrency
+                    )
+                )
+                self._executor = ThreadPoolExecutor(
+                    max_workers=self.max_concurrency * 2,
+                    thread_name_prefix="gemini"
+                )
                 self._model_loaded = True
                 logger.info(f"Gemini model loaded successfully: {self.model_name}")
             except Exception as e:
@@ -55,6 +116,22 @@ class LLMService:
                 self._model_loaded = False
                 raise
     
+    def warm_up(self):
+        """
+        Create the HTTP client and open a connection with a free model metadata request
+        
+        Raises:
+            RuntimeError: If the client cannot be initialized
+        """
+        self._load_model()
+        if not self.is_available():
+            raise RuntimeError("Gemini client is not available")
+        try:
+            self.model.get(f"/v1beta/{self.model_name}")
+        except httpx.HTTPError as e:
+            # Connection warm-up only; generation calls are governed by the breaker
+            logger.warning(f"Gemini connection warm-up failed: {e}")
+    
     def is_available(self) -> bool:
         """
         Check if LLM service is available and ready
@@ -64,106 +141,341 @@ class LLMService:
         """
         return self.enabled and self._model_loaded and self.model is not None
     
+    def close(self):
+        """Close the persistent HTTP client and worker threads"""
+        if self.model is not None:
+            self.model.close()
+        if self._executor is not None:
+            self._executor.shutdown(wait=False)
+        self.model = None
+        self._executor = None
+        self._model_loaded = False
+    
+    def _call_gemini(self, prompt: str) -> str:
+        """Single generateContent request over the persistent client"""
+        started = time.monotonic()
+        response = self.model.post(
+            f"/v1beta/{self.model_name}:generateContent",
+            json={
+                "contents": [{"parts": [{"text": prompt}]}],
+                "generationConfig": {
+                    "temperature": self.temperature,
+                    "maxOutputTokens": self.max_tokens
+                }
+            }
+        )
+        response.raise_for_status()
+        
+        candidates = response.json().get("candidates") or []
+        if not candidates:
+            raise ValueError("Gemini response contains no candidates")
+        parts = candidates[0].get("content", {}).get("parts", [])
+        text = "".join(part.get("text", "") for part in parts)
+        
+        self._latencies.append(time.monotonic() - started)
+        return text
+    
+    def _submit(self, prompt: str) -> Future:
+        """Run a call on the worker pool; caller must already hold a semaphore slot"""
+        with self._in_flight_lock:
+            self._in_flight += 1
+        
+        def _release(_):
+            with self._in_flight_lock:
+                self._in_flight -= 1
+            self._semaphore.release()
+        
+        future = self._executor.submit(self._call_gemini, prompt)
+        future.add_done_callback(_release)
+        return future
+    
+    def _hedge_delay(self) -> Optional[float]:
+        """p95 of recent latencies, used as the delay before a hedged request"""
+        if not self.hedge_enabled or len(self._latencies) < 20:
+            return None
+        ordered = sorted(self._latencies)
+        return ordered[int(len(ordered) * 0.95) - 1]
+    
+    @staticmethod
+    def _is_upstream_failure(error: Optional[BaseException]) -> bool:
+        """
+        Whether an error means Gemini is unhealthy (timeouts, transport errors, 429, 5xx)
+        Other errors (400 bad prompt, 404 wrong model) are the request's fault and must
+        not open the breaker for all traffic
+        """
+        if error is None or isinstance(error, (TimeoutError, httpx.TransportError)):
+            return True
+        if isinstance(error, httpx.HTTPStatusError):
+            status = error.response.status_code
+            return status == 429 or status >= 500
+        return False
+    
+    def _generate_text(self, prompt: str) -> Optional[str]:
+        """
+        Call Gemini with deadline, concurrency cap, optional hedging and circuit breaker
+        
+        Returns:
+            Generated text, or None if the call was skipped (breaker open / overloaded)
+            
+        Raises:
+            TimeoutError: If no response arrived before the deadline
+        """
+        deadline = time.monotonic() + self.timeout
+        with self._in_flight_lock:
+            self._queued += 1
+        try:
+            acquired = self._semaphore.acquire(timeout=self.timeout)
+        finally:
+            with self._in_flight_lock:
+                self._queued -= 1
+        if not acquired:
+            logger.warning(f"Gemini concurrency limit reached ({self.max_concurrency}), skipping explanation")
+            return None
+        
+        if not self.breaker.allow_request():
+            self._semaphore.release()
+            logger.warning("Gemini circuit breaker is open, skipping explanation generation")
+            return None
+        
+        pending = [self._submit(prompt)]
+        
+        # Hedged request: fire a second call if the first is slower than p95
+        hedge_delay = self._hedge_delay()
+        if hedge_delay is not None and hedge_delay < self.timeout:
+            done, _ = wait(pending, timeout=hedge_delay)
+            if not done and self._semaphore.acquire(blocking=False):
+                logger.debug(f"Sending hedged Gemini request after {hedge_delay:.2f}s")
+                pending.append(self._submit(prompt))
+        
+        last_error: Optional[BaseException] = None
+        while pending:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            done, not_done = wait(pending, timeout=remaining, return_when=FIRST_COMPLETED)
+            for future in done:
+                if future.exception() is None:
+                    self.breaker.record_success()
+                    return future.result()
+                last_error = future.exception()
+            pending = list(not_done)
+        
+        if pending or self._is_upstream_failure(last_error):
+            self.breaker.record_failure()
+        else:
+            # Gemini answered; the request itself was rejected
+            self.breaker.record_success()
+        if pending:
+            raise TimeoutError(f"Gemini call exceeded {self.timeout}s deadline")
+        raise last_error
+    
+    def _active_preferences(self, user_preferences: Optional[Dict[str, Any]]) -> List[str]:
+        """Convert dietary preferences dict to a sorted list of active labels"""
+        if not user_preferences:
+            return []
+        
+        active_prefs = []
+        if user_preferences.get('vegan'):
+            active_prefs.append('Vegan')
+        if user_preferences.get('vegetarian') and not user_preferences.get('vegan'):
+            active_prefs.append('Vegetarian')
+        if user_preferences.get('glutenFree'):
+            active_prefs.append('Gluten-Free')
+        if user_preferences.get('dairyFree'):
+            active_prefs.append('Dairy-Free')
+        if user_preferences.get('nutAllergy'):
+            active_prefs.append('Nut Allergy')
+        
+        return active_prefs
+    
+    def _match_ingredients(
+        self,
+        recipe: Recipe,
+        user_ingredients: List[str]
+    ) -> Tuple[List[str], List[str]]:
+        """
+        Compute matched and missing ingredients for a recipe
+        
+        Returns:
+            Tuple of (matched user ingredients, missing recipe ingredients)
+        """
+        user_lower = sorted({ingredient.lower() for ingredient in user_ingredients})
+        recipe_ingredients_lower = recipe.Ingredients.lower()
+        matched = [ingredient for ingredient in user_lower if ingredient in recipe_ingredients_lower]
+        
+        items = split_ingredient_items(recipe.Cleaned_Ingredients or recipe.Ingredients)
+        missing = [
+            short_ingredient_name(item)
+            for item in items
+            if not any(ingredient in item.lower() for ingredient in user_lower)
+        ]
+        return matched, missing
+    
+    def _fragment_key(
+        self,
+        recipe: Recipe,
+        matched: List[str],
+        missing: List[str],
+        active_prefs: List[str]
+    ) -> str:
+        """Cache key for a per-recipe explanation fragment"""
+        return self.fragment_cache._generate_key("llm_fragment", {
+            "recipe": recipe.Image_Name,
+            "matched": matched,
+            "missing": missing,
+            "preferences": active_prefs
+        })
+    
+    def _load_summaries(self):
+        """Load compact recipe summaries precomputed at index-build time"""
+        self._summaries = {}
+        if not self.summaries_path.exists():
+            logger.info("Recipe summaries not found, summaries will be built on demand")
+            return
+        try:
+            with open(self.summaries_path, 'r', encoding='utf-8') as f:
+                for entry in json.load(f):
+                    self._summaries[(entry["title"], entry["image_name"])] = entry["summary"]
+            logger.info(f"Loaded {len(self._summaries)} recipe summaries")
+        except Exception as e:
+            logger.warning(f"Failed to load recipe summaries: {e}")
+    
+    def _get_summary(self, recipe: Recipe) -> str:
+        """Get the compact summary of a recipe (precomputed or built once)"""
+        if self._summaries is None:
+            self._load_summaries()
+        key = (recipe.Title, recipe.Image_Name)
+        summary = self._summaries.get(key)
+        if summary is None:
+            summary = build_recipe_summary(
+                recipe.Title,
+                recipe.Cleaned_Ingredients or recipe.Ingredients,
+                recipe.Instructions or ""
+            )
+            self._summaries[key] = summary
+        return summary
+    
     def _build_prompt(
         self,
         user_ingredients: List[str],
-        recommended_recipes: List[Recipe],
-        user_preferences: Optional[Dict[str, Any]] = None,
+        pending_recipes: List[Tuple[Recipe, List[str], List[str]]],
+        cached_titles: List[str],
+        active_prefs: List[str],
         excluded_ingredients: Optional[List[str]] = None
-    ) -> str:
+    ) -> Tuple[str, int, int]:
         """
-        Build prompt for Gemini API
+        Assemble the prompt for Gemini within the configured token budget
+        
+        Recipes are added as compact summaries while they fit; when the budget
+        runs low, only the title and matched/missing ingredients are kept.
+        Recipes that do not fit at all are left out of the prompt (they get a
+        fallback fragment, see _fallback_fragment).
         
         Args:
             user_ingredients: List of user's fridge ingredients
-            recommended_recipes: List of recommended Recipe objects
-            user_preferences: Dietary preferences dict (vegan, gluten_free, etc.)
+            pending_recipes: (Recipe, matched, missing) tuples that need a fragment
+            cached_titles: Titles of recipes already explained (summary only)
+            active_prefs: Active dietary preference labels
             excluded_ingredients: List of excluded ingredients
             
         Returns:
-            Formatted prompt string
+            Tuple of (prompt, number of pending recipes included, estimated prompt tokens)
         """
-        # System prompt
-        system_prompt = """You are a professional chef and culinary advisor. You recommend recipes based on the user's available ingredients and explain why these recipes were selected.
-
-Your task:
-1. Explain why the recommended recipes were chosen
-2. Specify which ingredients match
-3. If any ingredients are missing, mention them and suggest alternatives
-4. Pay attention to user preferences (vegan, gluten-free, etc.)
-5. Use a concise, clear, and friendly tone (English)
-
-Response format:
-- A brief explanation for each recipe (1-2 sentences)
-- A general summary (why these recipes were recommended)
-- Missing ingredients and alternatives (if any)
-"""
-        
         # User context
-        context_parts = []
-        context_parts.append(f"**Available Ingredients:** {', '.join(user_ingredients)}")
-        
-        if user_preferences:
-            active_prefs = []
-            if user_preferences.get('vegan'):
-                active_prefs.append('Vegan')
-            if user_preferences.get('vegetarian') and not user_preferences.get('vegan'):
-                active_prefs.append('Vegetarian')
-            if user_preferences.get('glutenFree'):
-                active_prefs.append('Gluten-Free')
-            if user_preferences.get('dairyFree'):
-                active_prefs.append('Dairy-Free')
-            if user_preferences.get('nutAllergy'):
-                active_prefs.append('Nut Allergy')
-            
-            if active_prefs:
-                context_parts.append(f"**Dietary Preferences:** {', '.join(active_prefs)}")
-        
+        context_parts = [f"Available ingredients: {', '.join(user_ingredients)}"]
+        if active_prefs:
+            context_parts.append(f"Dietary preferences: {', '.join(active_prefs)}")
         if excluded_ingredients:
-            context_parts.append(f"**Excluded Ingredients:** {', '.join(excluded_ingredients)}")
-        
-        # Recommended recipes
-        recipes_text = "\n\n**Recommended Recipes:**\n"
-        for i, recipe in enumerate(recommended_recipes[:10], 1):  # Max 10 recipes
-            ingredients_text = recipe.Cleaned_Ingredients or recipe.Ingredients
-            ingredients_clean = ingredients_text.replace('[', '').replace(']', '').replace("'", '')
-            
-            recipes_text += f"\n{i}. **{recipe.Title}**\n"
-            recipes_text += f"   Ingredients: {ingredients_clean[:200]}...\n"
-            if recipe.Instructions:
-                instructions_short = recipe.Instructions[:150] + "..." if len(recipe.Instructions) > 150 else recipe.Instructions
-                recipes_text += f"   Preparation: {instructions_short}\n"
-        
-        # Combine all parts
-        prompt = f"""{system_prompt}
-
----
-
-**User Information:**
-{chr(10).join(context_parts)}
-{recipes_text}
-
----
-
-Please explain why these recipes were recommended. Use a concise, clear, and friendly tone. Respond in English."""
+            context_parts.append(f"Excluded ingredients: {', '.join(excluded_ingredients)}")
+        if cached_titles:
+            context_parts.append(
+                f"Also recommended (already explained, mention only in SUMMARY): {', '.join(cached_titles)}"
+            )
+        
+        prompt = f"{_SYSTEM_PROMPT}\n\n" + "\n".join(context_parts) + "\n\nRecipes:"
+        tokens = estimate_tokens(prompt)
+        
+        included = 0
+        for i, (recipe, matched, missing) in enumerate(pending_recipes, 1):
+            match_text = f"matched: {', '.join(matched) or 'none'}; missing: {', '.join(missing[:8]) or 'none'}"
+            full_block = f"\n[{i}] **{self._get_summary(recipe)}** ({match_text})"
+            short_block = f"\n[{i}] **{recipe.Title}** ({match_text})"
+            
+            for block in (full_block, short_block):
+                block_tokens = estimate_tokens(block)
+                if tokens + block_tokens <= self.prompt_token_budget:
+                    prompt += block
+                    tokens += block_tokens
+                    included += 1
+                    break
+            else:
+                logger.debug(f"Prompt token budget reached after {included} recipes")
+                break
+        
+        return prompt, included, tokens
+    
+    @staticmethod
+    def _fallback_fragment(matched: List[str], missing: List[str]) -> str:
+        """Explanation for a recipe without a Gemini fragment (left out of the prompt or not answered)"""
+        text = f"Uses your {', '.join(matched)}." if matched else "A close match for your ingredients."
+        if missing:
+            text += f" You would still need: {', '.join(missing[:8])}."
+        return text
+    
+    def _parse_response(self, text: str, expected: int) -> Tuple[Dict[int, str], Optional[str]]:
+        """
+        Parse "[n] fragment" lines and the "SUMMARY:" line from the LLM response
+        
+        Returns:
+            Tuple of ({recipe number: fragment}, summary)
+        """
+        fragments: Dict[int, str] = {}
+        summary_lines: List[str] = []
+        current: Optional[int] = None
         
-        return prompt
+        for line in text.splitlines():
+            stripped = line.strip()
+            if not stripped:
+                continue
+            marker = _FRAGMENT_PATTERN.match(stripped)
+            if marker:
+                # Ignore fragments for recipes that were not asked about
+                current = int(marker.group(1)) if 1 <= int(marker.group(1)) <= expected else None
+                if current is not None:
+                    fragments[current] = marker.group(2).strip()
+            elif _SUMMARY_PATTERN.match(stripped):
+                current = 0
+                summary_lines.append(_SUMMARY_PATTERN.sub('', stripped))
+            elif current == 0:
+                summary_lines.append(stripped)
+            elif current is not None:
+                fragments[current] += f" {stripped}"
+        
+        summary = ' '.join(summary_lines).strip() or None
+        return fragments, summary
     
     def generate_explanation(
         self,
         user_ingredients: List[str],
         recommended_recipes: List[Recipe],
         user_preferences: Optional[Dict[str, Any]] = None,
-        excluded_ingredients: Optional[List[str]] = None
+        excluded_ingredients: Optional[List[str]] = None,
+        stats: Optional[Dict[str, Any]] = None
     ) -> Optional[str]:
         """
         Generate explanation for recipe recommendations using Gemini API
         
+        Per-recipe explanation fragments are cached by (recipe, matched/missing
+        ingredients, dietary preferences); Gemini is only asked about uncached
+        recipes plus a short summary.
+        
         Args:
             user_ingredients: List of user's fridge ingredients
             recommended_recipes: List of recommended Recipe objects
             user_preferences: Dietary preferences dict
             excluded_ingredients: List of excluded ingredients
+            stats: Optional dict filled with per-request stats (prompt_tokens, cached_fragments,
+                prompt_excluded_recipes, fallback_fragments, prompt_build_ms, llm_call_ms)
             
         Returns:
             Explanation text or None if generation fails
@@ -190,26 +502,84 @@ Please explain why these recipes were recommended. Use a concise, clear, and fri
                 logger.warning("LLM model could not be loaded, skipping explanation generation")
                 return None
             
-            # Build prompt
-            prompt = self._build_prompt(
+            prompt_started = time.perf_counter()
+            recipes = recommended_recipes[:10]  # Max 10 recipes
+            active_prefs = self._active_preferences(user_preferences)
+            
+            # Split recipes into cached fragments and pending ones
+            fragments: Dict[int, str] = {}
+            pending = []
+            pending_keys = []
+            for position, recipe in enumerate(recipes):
+                matched, missing = self._match_ingredients(recipe, user_ingredients)
+                key = self._fragment_key(recipe, matched, missing, active_prefs)
+                cached_fragment = self.fragment_cache.get(key)
+                if cached_fragment is not None:
+                    fragments[position] = cached_fragment
+                else:
+                    pending.append((position, recipe, matched, missing))
+                    pending_keys.append(key)
+            
+            logger.debug(
+                f"Generating explanation for {len(recipes)} recipes "
+                f"({len(fragments)} cached fragments, {len(pending)} pending)"
+            )
+            
+            # Build prompt within token budget
+            prompt, included, prompt_tokens = self._build_prompt(
                 user_ingredients=user_ingredients,
-                recommended_recipes=recommended_recipes,
-                user_preferences=user_preferences,
+                pending_recipes=[(recipe, matched, missing) for _, recipe, matched, missing in pending],
+                cached_titles=[recipes[position].Title for position in fragments],
+                active_prefs=active_prefs,
                 excluded_ingredients=excluded_ingredients
             )
+            if stats is not None:
+                stats["prompt_tokens"] = prompt_tokens
+                stats["cached_fragments"] = len(fragments)
+                stats["prompt_excluded_recipes"] = len(pending) - included
+                stats["prompt_build_ms"] = (time.perf_counter() - prompt_started) * 1000
+            logger.debug(f"Prompt built: ~{prompt_tokens} tokens, {included}/{len(pending)} pending recipes included")
             
-            logger.debug(f"Generating explanation for {len(recommended_recipes)} recipes")
+            # Generate response (guarded Gemini call)
+            call_started = time.perf_counter()
+            with STAGE_DURATION.time(stage="llm_generation"):
+                response_text = self._generate_text(prompt)
+            if stats is not None:
+                stats["llm_call_ms"] = (time.perf_counter() - call_started) * 1000
+            if response_text is None:
+                return None
+            response_text = response_text.strip()
+            new_fragments, summary = self._parse_response(response_text, included)
             
-            # Generate response (Gemini API is synchronous)
-            response = self.model.generate_content(
-                prompt,
-                generation_config=genai.types.GenerationConfig(
-                    temperature=self.temperature,
-                    max_output_tokens=self.max_tokens,
-                )
-            )
+            if not new_fragments and not summary:
+                # Unstructured answer: return as-is, nothing to cache
+                logger.debug("LLM response did not follow the fragment format")
+                return response_text
+            
+            for number, fragment in new_fragments.items():
+                position = pending[number - 1][0]
+                fragments[position] = fragment
+                self.fragment_cache.set(pending_keys[number - 1], fragment, ttl_seconds=self.fragment_ttl)
+            
+            # Recipes left out of the prompt or not answered still get a (non-cached) explanation
+            fallback_count = 0
+            for position, _, matched, missing in pending:
+                if position not in fragments:
+                    fragments[position] = self._fallback_fragment(matched, missing)
+                    fallback_count += 1
+            if stats is not None:
+                stats["fallback_fragments"] = fallback_count
+            if fallback_count:
+                logger.info(f"{fallback_count}/{len(recipes)} recipes explained with fallback fragments")
             
-            explanation = response.text.strip()
+            # Assemble final explanation in recommendation order
+            parts = [
+                f"**{position + 1}. {recipes[position].Title}**\n{fragments[position]}"
+                for position in sorted(fragments)
+            ]
+            if summary:
+                parts.append(f"**Summary:** {summary}")
+            explanation = "\n\n".join(parts)
             
             logger.debug(f"Explanation generated: {len(explanation)} characters")
             
@@ -228,7 +598,15 @@ Please explain why these recipes were recommended. Use a concise, clear, and fri
             "enabled": self.enabled,
             "has_api_key": bool(self.api_key),
             "max_tokens": self.max_tokens,
-            "temperature": self.temperature
+            "temperature": self.temperature,
+            "prompt_token_budget": self.prompt_token_budget,
+            "cached_fragments": self.fragment_cache.size(),
+            "timeout_seconds": self.timeout,
+            "max_concurrency": self.max_concurrency,
+            "in_flight": self._in_flight,
+            "queued": self._queued,
+            "hedge_enabled": self.hedge_enabled,
+            "circuit_breaker": self.breaker.get_state()
         }
 
 
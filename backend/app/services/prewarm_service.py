@@ -0,0 +1,240 @@
+"""
+Cache Pre-warming Service
+Pre-computes /recommend rankings and RAG retrieval + rerank results for the most
+popular ingredient sets, so the first requests after a deploy or cache flush are hits
+Runs in a background thread after model warm-up and on a schedule, rate-limited
+"""
+
+import time
+import logging
+import threading
+from collections import Counter
+from itertools import combinations
+from typing import List, Optional
+import numpy as np
+from app.config import settings
+from app.models.recipe import RecipeRecommendRequest, RAGRecommendRequest
+from app.services.recipe_service import recipe_service
+from app.services.faiss_service import faiss_service
+from app.services.embedding_service import embedding_service
+from app.services.rag_pipeline import rag_pipeline
+from app.services.warmup_service import warmup_service
+from app.services.query_log_service import query_log_service
+from app.utils.vocabulary import ingredient_vocabulary
+from app.utils.metrics import HTTP_IN_FLIGHT
+
+# Setup logger
+logger = logging.getLogger(__name__)
+
+# Warm the same result shapes the endpoints produce with default parameters
+RECOMMEND_TOP_K = RecipeRecommendRequest.model_fields["top_k"].default
+RAG_TOP_K = RAGRecommendRequest.model_fields["top_k"].default
+RAG_RETRIEVAL_TOP_K = RAGRecommendRequest.model_fields["retrieval_top_k"].default
+
+
+class CachePrewarmService:
+    """
+    Background cache pre-warming for popular canonical ingredient sets
+    
+    Popular sets are the most frequent ingredient sets in the query log (if captured),
+    topped up from ingredient co-occurrence in the recipe corpus (canonical ingredient IDs).
+    Query encoding is batched; rankings go through the regular cached paths
+    (result cache L1/L2, RAG ranking cache).
+    """
+    
+    def __init__(self):
+        self.enabled = settings.CACHE_PREWARM_ENABLED
+        self.max_sets = settings.CACHE_PREWARM_SETS
+        self.top_ingredients = settings.CACHE_PREWARM_TOP_INGREDIENTS
+        self.max_set_size = settings.CACHE_PREWARM_MAX_SET_SIZE
+        self.batch_size = settings.CACHE_PREWARM_BATCH_SIZE
+        self.rate = settings.CACHE_PREWARM_RATE
+        self.max_in_flight = settings.CACHE_PREWARM_MAX_IN_FLIGHT
+        self.interval = settings.CACHE_PREWARM_INTERVAL
+        self.query_log_lines = settings.CACHE_PREWARM_QUERY_LOG_LINES
+        self._thread: Optional[threading.Thread] = None
+        self._stop = threading.Event()
+        self._lock = threading.Lock()
+        self._running = False
+        self._runs = 0
+        self._sets_warmed = 0
+        self._last_run_at: Optional[float] = None
+        self._last_duration_ms: Optional[float] = None
+    
+    def start(self):
+        """Start the background pre-warm loop (once); it waits for model warm-up first"""
+        with self._lock:
+            if self._thread is not None:
+                return
+            self._thread = threading.Thread(target=self._run, name="cache-prewarm", daemon=True)
+            self._thread.start()
+    
+    def stop(self):
+        self._stop.set()
+    
+    def _run(self):
+        while not warmup_service.is_ready():
+            if self._stop.wait(1.0):
+                return
+        while not self._stop.is_set():
+            try:
+                self.run_once()
+            except Exception as e:
+                logger.error(f"Cache pre-warm run failed: {e}", exc_info=True)
+            if self.interval <= 0 or self._stop.wait(self.interval):
+                return
+    
+    def popular_ingredient_sets(self, limit: int) -> List[List[str]]:
+        """
+        Most requested ingredient sets from the query log, then co-occurrence sets
+        
+        Args:
+            limit: Maximum number of sets
+            
+        Returns:
+            List of ingredient name lists (sorted, as in the cache keys)
+        """
+        sets = self._query_log_sets(limit)
+        seen = {tuple(ingredients) for ingredients in sets}
+        for ingredients in self._cooccurrence_sets(limit):
+            if len(sets) >= limit:
+                break
+            key = tuple(sorted(ingredients))
+            if key not in seen:
+                seen.add(key)
+                sets.append(list(key))
+        return sets
+    
+    def _query_log_sets(self, limit: int) -> List[List[str]]:
+        """Ingredient sets requested at least twice in the recent query log, most frequent first"""
+        counts: Counter = Counter(
+            tuple(sorted(entry["request"]["ingredients"]))
+            for entry in query_log_service.read_entries(limit=self.query_log_lines)
+            if entry.get("request", {}).get("ingredients")
+        )
+        return [list(ingredients) for ingredients, count in counts.most_common(limit) if count >= 2]
+    
+    def _cooccurrence_sets(self, limit: int) -> List[List[str]]:
+        """
+        Most frequent canonical ingredient sets by co-occurrence in recipes
+        
+        Single ingredients and combinations (up to CACHE_PREWARM_MAX_SET_SIZE) of the
+        CACHE_PREWARM_TOP_INGREDIENTS most common ingredients, ranked by recipe count
+        
+        Args:
+            limit: Maximum number of sets
+        
+        Returns:
+            List of ingredient name lists (canonical names)
+        """
+        names = ingredient_vocabulary.names
+        if not names:
+            return []
+        
+        recipe_ids = []
+        singles: Counter = Counter()
+        for recipe in recipe_service.iter_recipes():
+            ids = recipe.ingredient_ids
+            if ids is None:
+                ids = ingredient_vocabulary.match_ids(recipe.Ingredients)
+            recipe_ids.append(ids)
+            singles.update(set(ids))
+        
+        top = {ingredient_id for ingredient_id, _ in singles.most_common(self.top_ingredients)}
+        counts: Counter = Counter({(ingredient_id,): singles[ingredient_id] for ingredient_id in top})
+        for ids in recipe_ids:
+            present = sorted(set(ids) & top)
+            for size in range(2, self.max_set_size + 1):
+                counts.update(combinations(present, size))
+        
+        return [[names[ingredient_id] for ingredient_id in combo] for combo, _ in counts.most_common(limit)]
+    
+    def _throttle(self, last_started: float):
+        """Keep to the configured rate and yield while live traffic is high"""
+        while HTTP_IN_FLIGHT.value() > self.max_in_flight and not self._stop.is_set():
+            self._stop.wait(0.5)
+        if self.rate > 0:
+            self._stop.wait(max(0.0, last_started + 1.0 / self.rate - time.perf_counter()))
+    
+    def run_once(self) -> int:
+        """
+        Warm the caches for the current popular ingredient sets
+        
+        Returns:
+            Number of ingredient sets warmed
+        """
+        with self._lock:
+            if self._running:
+                return 0
+            self._running = True
+        started = time.perf_counter()
+        warmed = 0
+        try:
+            ingredient_sets = self.popular_ingredient_sets(self.max_sets)
+            last_started = 0.0
+            for batch_start in range(0, len(ingredient_sets), self.batch_size):
+                if self._stop.is_set():
+                    break
+                batch = ingredient_sets[batch_start:batch_start + self.batch_size]
+                
+                # One batched model call and one batched index search for the batch's queries;
+                # the neighbours of the largest k serve every smaller top-k as a prefix
+                embeddings = [None] * len(batch)
+                neighbours = [None] * len(batch)
+                if faiss_service.is_loaded():
+                    embeddings = embedding_service.encode_texts(
+                        [faiss_service.build_ingredient_query(ingredients) for ingredients in batch]
+                    )
+                    _, neighbours = faiss_service.search_batch(
+                        np.asarray(embeddings),
+                        k=max(RECOMMEND_TOP_K, RAG_RETRIEVAL_TOP_K)
+                    )
+                
+                for ingredients, query_embedding, query_neighbours in zip(batch, embeddings, neighbours):
+                    self._throttle(last_started)
+                    if self._stop.is_set():
+                        break
+                    last_started = time.perf_counter()
+                    recipe_service.rank_recipes(
+                        user_ingredients=ingredients,
+                        use_vector_search=True,
+                        top_k=RECOMMEND_TOP_K,
+                        query_embedding=query_embedding,
+                        neighbours=query_neighbours
+                    )
+                    rag_pipeline.rank(
+                        user_ingredients=ingredients,
+                        top_k=RAG_TOP_K,
+                        retrieval_top_k=RAG_RETRIEVAL_TOP_K,
+                        query_embedding=query_embedding,
+                        neighbours=query_neighbours
+                    )
+                    warmed += 1
+        finally:
+            duration_ms = round((time.perf_counter() - started) * 1000, 1)
+            with self._lock:
+                self._running = False
+                self._runs += 1
+                self._sets_warmed += warmed
+                self._last_run_at = time.time()
+                self._last_duration_ms = duration_ms
+        
+        logger.info(f"🔥 Cache pre-warm: {warmed} popular ingredient sets in {duration_ms}ms")
+        return warmed
+    
+    def get_status(self) -> dict:
+        """Pre-warm runs, warmed sets and last run timing"""
+        with self._lock:
+            return {
+                "enabled": self.enabled,
+                "running": self._running,
+                "runs": self._runs,
+                "sets_warmed": self._sets_warmed,
+                "last_run_at": self._last_run_at,
+                "last_duration_ms": self._last_duration_ms,
+                "interval_seconds": self.interval
+            }
+
+
+# Singleton instance
+prewarm_service = CachePrewarmService()
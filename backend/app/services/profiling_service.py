@@ -0,0 +1,206 @@
+"""
+Profiling Service
+Opt-in, on-demand profiling of the running service without redeploying:
+- cProfile or statistical stack-sampling captures for N sampled requests
+- tracemalloc allocation snapshot diff over a time window
+Captures are written to a local directory in standard formats
+(.prof = pstats: snakeviz/gprof2dot/flameprof, .folded = collapsed stacks: flamegraph.pl/speedscope)
+"""
+
+import os
+import sys
+import hmac
+import time
+import cProfile
+import logging
+import threading
+import tracemalloc
+from collections import Counter
+from contextlib import contextmanager
+from pathlib import Path
+from typing import List, Optional
+from app.config import settings
+
+# Setup logger
+logger = logging.getLogger(__name__)
+
+PROFILE_MODES = ("cprofile", "stack")
+
+
+class StackSampler:
+    """Samples the call stack of one thread at a fixed interval (statistical profiler)"""
+    
+    def __init__(self, thread_id: int, interval: float):
+        self.thread_id = thread_id
+        self.interval = interval
+        self.stacks: Counter = Counter()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="stack-sampler", daemon=True)
+    
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            stack = []
+            while frame is not None:
+                code = frame.f_code
+                stack.append(f"{code.co_name} ({Path(code.co_filename).name}:{frame.f_lineno})")
+                frame = frame.f_back
+            if stack:
+                self.stacks[";".join(reversed(stack))] += 1
+    
+    def start(self):
+        self._thread.start()
+    
+    def stop(self):
+        self._stop.set()
+        self._thread.join()
+    
+    def folded(self) -> str:
+        """Collapsed stack format: 'frame;frame;frame count' per line"""
+        return "".join(f"{stack} {count}\n" for stack, count in self.stacks.most_common())
+
+
+class ProfilingService:
+    """
+    Captures profiles of sampled requests and allocation diffs on demand
+    Disabled unless PROFILING_ENABLED is set; control requires PROFILING_ADMIN_TOKEN
+    """
+    
+    def __init__(self):
+        self.enabled = settings.PROFILING_ENABLED
+        self.admin_token = settings.PROFILING_ADMIN_TOKEN
+        self.output_dir = Path(__file__).parent.parent.parent / settings.PROFILING_OUTPUT_DIR
+        self.sample_interval = settings.PROFILING_SAMPLE_INTERVAL
+        self._lock = threading.Lock()
+        self._armed_requests = 0
+        self._armed_mode = "cprofile"
+        self._allocation_capture: Optional[threading.Thread] = None
+    
+    def is_authorized(self, token: Optional[str]) -> bool:
+        """True if profiling is enabled and the admin token matches (constant-time comparison)"""
+        if not (self.enabled and self.admin_token and token):
+            return False
+        return hmac.compare_digest(token.encode(), self.admin_token.encode())
+    
+    def arm(self, requests: int, mode: str = "cprofile"):
+        """Profile the next N profiled-path requests of this worker process with the given mode"""
+        if mode not in PROFILE_MODES:
+            raise ValueError(f"Unknown profile mode '{mode}', expected one of {PROFILE_MODES}")
+        with self._lock:
+            self._armed_requests = requests
+            self._armed_mode = mode
+        logger.info(f"🔬 Profiling armed: next {requests} requests ({mode})")
+    
+    def _take_sample(self, requested_mode: Optional[str]) -> Optional[str]:
+        """Profile mode for this request (explicit header or armed budget), None if not sampled"""
+        if requested_mode in PROFILE_MODES:
+            return requested_mode
+        with self._lock:
+            if self._armed_requests <= 0:
+                return None
+            self._armed_requests -= 1
+            return self._armed_mode
+    
+    def _capture_path(self, name: str, suffix: str) -> Path:
+        self.output_dir.mkdir(parents=True, exist_ok=True)
+        timestamp = time.strftime("%Y%m%d-%H%M%S")
+        return self.output_dir / f"{name}-{timestamp}-{os.getpid()}-{time.monotonic_ns() % 1000000}{suffix}"
+    
+    @contextmanager
+    def profile(self, name: str, requested_mode: Optional[str] = None):
+        """
+        Profile the with-block if this request is sampled
+        
+        Args:
+            name: Capture name (used in the output file name)
+            requested_mode: Mode requested explicitly for this request (authorized header), or None
+        """
+        mode = self._take_sample(requested_mode) if self.enabled else None
+        if mode is None:
+            yield
+            return
+        
+        if mode == "cprofile":
+            profiler = cProfile.Profile()
+            profiler.enable()
+            try:
+                yield
+            finally:
+                profiler.disable()
+                path = self._capture_path(name, ".prof")
+                profiler.dump_stats(str(path))
+                logger.info(f"🔬 cProfile capture written: {path}")
+        else:
+            sampler = StackSampler(threading.get_ident(), self.sample_interval)
+            sampler.start()
+            try:
+                yield
+            finally:
+                sampler.stop()
+                path = self._capture_path(name, ".folded")
+                path.write_text(sampler.folded(), encoding="utf-8")
+                logger.info(f"🔬 Stack sample capture written: {path} ({sum(sampler.stacks.values())} samples)")
+    
+    def capture_allocations(self, seconds: float, top: int = 50) -> bool:
+        """
+        Start a background tracemalloc capture: snapshot now and after `seconds`,
+        write the top allocation differences (.txt) and the final snapshot (.tracemalloc)
+        
+        Returns:
+            False if a capture is already running
+        """
+        with self._lock:
+            if self._allocation_capture is not None and self._allocation_capture.is_alive():
+                return False
+            self._allocation_capture = threading.Thread(
+                target=self._run_allocation_capture, args=(seconds, top),
+                name="tracemalloc-capture", daemon=True
+            )
+            self._allocation_capture.start()
+        return True
+    
+    def _run_allocation_capture(self, seconds: float, top: int):
+        started_here = not tracemalloc.is_tracing()
+        if started_here:
+            tracemalloc.start(settings.PROFILING_TRACEMALLOC_FRAMES)
+        try:
+            before = tracemalloc.take_snapshot()
+            time.sleep(seconds)
+            after = tracemalloc.take_snapshot()
+            
+            filters = [tracemalloc.Filter(False, tracemalloc.__file__)]
+            diff = after.filter_traces(filters).compare_to(before.filter_traces(filters), "traceback")
+            path = self._capture_path("allocations", ".txt")
+            with open(path, "w", encoding="utf-8") as f:
+                f.write(f"# tracemalloc diff over {seconds}s, top {top} by size growth\n")
+                for stat in diff[:top]:
+                    f.write(f"\n{stat}\n")
+                    for line in stat.traceback.format():
+                        f.write(f"    {line}\n")
+            after.dump(str(path.with_suffix(".tracemalloc")))
+            logger.info(f"🔬 Allocation diff written: {path}")
+        except Exception as e:
+            logger.error(f"Allocation capture failed: {e}", exc_info=True)
+        finally:
+            if started_here:
+                tracemalloc.stop()
+    
+    def get_status(self) -> dict:
+        """Armed budget, running captures and files written so far"""
+        captures: List[str] = []
+        if self.output_dir.exists():
+            captures = sorted(path.name for path in self.output_dir.iterdir())
+        with self._lock:
+            return {
+                "enabled": self.enabled,
+                "pid": os.getpid(),
+                "armed_requests": self._armed_requests,
+                "armed_mode": self._armed_mode,
+                "allocation_capture_running": bool(self._allocation_capture and self._allocation_capture.is_alive()),
+                "output_dir": str(self.output_dir),
+                "captures": captures
+            }
+
+
+# Singleton instance
+profiling_service = ProfilingService()
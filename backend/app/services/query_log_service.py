@@ -0,0 +1,174 @@
+"""
+Query Log Service
+Sampled JSONL log of normalized recommendation requests with per-stage timings
+and result IDs, written by a background thread (never on the request path)
+Replayed by scripts/replay_queries.py for performance regression testing
+"""
+
+import os
+import json
+import time
+import fcntl
+import queue
+import random
+import logging
+import threading
+from collections import deque
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+from app.config import settings
+
+# Setup logger
+logger = logging.getLogger(__name__)
+
+WRITE_BATCH_SIZE = 256  # Records per write() call
+
+
+class QueryLogService:
+    """
+    Sampled, asynchronously written query log
+    
+    Requests are logged with their effective parameters (defaults applied) so that
+    a replay reproduces them exactly; ingredient order is kept because it changes the
+    query embedding. Records are appended in whole-line batches with O_APPEND, so
+    several workers can share one file; size check, rotation and append run under an
+    exclusive flock on a sidecar lock file, so only one worker rotates.
+    """
+    
+    def __init__(self):
+        self.enabled = settings.QUERY_LOG_ENABLED
+        self.sample_rate = settings.QUERY_LOG_SAMPLE_RATE
+        self.path = Path(__file__).parent.parent.parent / settings.QUERY_LOG_PATH
+        self.max_bytes = settings.QUERY_LOG_MAX_BYTES
+        self._queue: "queue.Queue[dict]" = queue.Queue(maxsize=settings.QUERY_LOG_MAX_QUEUE)
+        self._writer: Optional[threading.Thread] = None
+        self._lock = threading.Lock()
+        self.logged = 0
+        self.dropped = 0
+    
+    def should_sample(self) -> bool:
+        """Sampling decision, taken before building a record"""
+        return self.enabled and random.random() < self.sample_rate
+    
+    @staticmethod
+    def normalize_request(request: Dict[str, Any]) -> Dict[str, Any]:
+        """Request shape with unset (None) and empty parameters dropped"""
+        return {key: value for key, value in request.items() if value is not None and value != []}
+    
+    def record(
+        self,
+        endpoint: str,
+        request: Dict[str, Any],
+        duration_ms: float,
+        status: int = 200,
+        stage_timings_ms: Optional[Dict[str, float]] = None,
+        results: Optional[List[str]] = None
+    ):
+        """
+        Queue a query log record (non-blocking; dropped if the writer is behind)
+        
+        Args:
+            endpoint: Endpoint name (recommend, rag-recommend)
+            request: Request parameters (normalized here)
+            duration_ms: Server-side request duration
+            status: HTTP status code
+            stage_timings_ms: Per-stage durations, if measured
+            results: Returned recipe identifiers (Image_Name), in order
+        """
+        entry = {
+            "ts": round(time.time(), 3),
+            "endpoint": endpoint,
+            "request": self.normalize_request(request),
+            "status": status,
+            "duration_ms": round(duration_ms, 3),
+            "stage_timings_ms": stage_timings_ms or {},
+            "results": results or []
+        }
+        self._ensure_writer()
+        try:
+            self._queue.put_nowait(entry)
+        except queue.Full:
+            self.dropped += 1
+    
+    def _ensure_writer(self):
+        """Start the writer thread on first use (after fork in pre-fork servers)"""
+        if self._writer is not None:
+            return
+        with self._lock:
+            if self._writer is None:
+                self._writer = threading.Thread(target=self._run_writer, name="query-log-writer", daemon=True)
+                self._writer.start()
+    
+    def _run_writer(self):
+        while True:
+            batch = [self._queue.get()]
+            while len(batch) < WRITE_BATCH_SIZE:
+                try:
+                    batch.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+            try:
+                self._write(batch)
+                self.logged += len(batch)
+            except Exception as e:
+                self.dropped += len(batch)
+                logger.warning(f"Query log write failed: {e}")
+            for _ in batch:
+                self._queue.task_done()
+    
+    def _write(self, batch: List[dict]):
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        data = "".join(json.dumps(entry, separators=(",", ":")) + "\n" for entry in batch).encode("utf-8")
+        # The log file itself is renamed on rotation, so workers lock a separate file
+        lock_fd = os.open(self.path.with_suffix(self.path.suffix + ".lock"), os.O_WRONLY | os.O_CREAT, 0o644)
+        try:
+            fcntl.flock(lock_fd, fcntl.LOCK_EX)
+            if self.max_bytes and self.path.exists() and self.path.stat().st_size >= self.max_bytes:
+                os.replace(self.path, self.path.with_suffix(self.path.suffix + ".1"))
+            fd = os.open(self.path, os.O_WRONLY | os.O_CREAT | os.O_APPEND, 0o644)
+            try:
+                while data:
+                    data = data[os.write(fd, data):]
+            finally:
+                os.close(fd)
+        finally:
+            os.close(lock_fd)
+    
+    def flush(self, timeout: float = 5.0):
+        """Wait until queued records are written (used on shutdown)"""
+        deadline = time.monotonic() + timeout
+        while self._queue.unfinished_tasks and time.monotonic() < deadline:
+            time.sleep(0.05)
+    
+    def read_entries(self, limit: Optional[int] = None) -> List[dict]:
+        """
+        Read logged records (most recent `limit` if given), skipping malformed lines
+        
+        Returns:
+            List of record dicts in log order
+        """
+        if not self.path.exists():
+            return []
+        with open(self.path, "r", encoding="utf-8") as f:
+            lines = deque(f, maxlen=limit) if limit else f.readlines()
+        entries = []
+        for line in lines:
+            try:
+                entries.append(json.loads(line))
+            except ValueError:
+                continue
+        return entries
+    
+    def get_stats(self) -> dict:
+        return {
+            "enabled": self.enabled,
+            "sample_rate": self.sample_rate,
+            "logged": self.logged,
+            "dropped": self.dropped,
+            "queued": self._queue.qsize(),
+            "path": str(self.path)
+        }
+
+
+# Singleton instance
+query_log_service = QueryLogService()
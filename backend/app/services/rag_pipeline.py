@@ -4,14 +4,20 @@ Coordinates Retriever (FAISS) → Reranker → Generator (LLM) pipeline
 Provides end-to-end recipe recommendation with explanations
 """
 
+import json
 import logging
 from typing import List, Optional, Dict, Any, Tuple
+import numpy as np
 from app.services.faiss_service import faiss_service
 from app.services.embedding_service import embedding_service
 from app.services.reranker_service import reranker_service
 from app.services.llm_service import llm_service
 from app.services.recipe_service import recipe_service
+from app.services.semantic_cache import semantic_cache
+from app.config import settings
 from app.models.recipe import Recipe, RecipeWithMatch
+from app.utils.cache import cache
+from app.utils.metrics import StageTimer
 
 # Setup logger
 logger = logging.getLogger(__name__)
@@ -31,18 +37,30 @@ class RAGPipeline:
         embedding_service=embedding_service,
         reranker_service=reranker_service,
         llm_service=llm_service,
-        recipe_service=recipe_service
+        recipe_service=recipe_service,
+        semantic_cache=semantic_cache
     ):
         self.retriever = faiss_service
         self.embedder = embedding_service
         self.reranker = reranker_service
         self.generator = llm_service
         self.recipe_service = recipe_service
+        self.semantic_cache = semantic_cache
+    
+    def _encode_query(self, user_ingredients: List[str]) -> np.ndarray:
+        """
+        Encode the ingredient query once (shared by retrieval and semantic cache)
+        """
+        query_text = self.retriever.build_ingredient_query(user_ingredients)
+        return self.embedder.encode_text(query_text)
     
     def _retrieve(
         self,
         user_ingredients: List[str],
-        top_k: int = 50
+        top_k: int = 50,
+        query_embedding: Optional[np.ndarray] = None,
+        timer: Optional[StageTimer] = None,
+        neighbours: Optional[np.ndarray] = None
     ) -> List[Recipe]:
         """
         Step 1: Retrieve recipes using FAISS vector search
@@ -50,40 +68,41 @@ class RAGPipeline:
         Args:
             user_ingredients: List of ingredient names
             top_k: Number of recipes to retrieve
+            query_embedding: Pre-computed query embedding (encoded if None)
+            timer: Optional per-request stage timer
+            neighbours: Pre-computed FAISS rows of the query, best first (searched if None)
             
         Returns:
             List of Recipe objects from FAISS search
         """
+        timer = timer or StageTimer()
         try:
             logger.debug(f"Retrieving top-{top_k} recipes for ingredients: {user_ingredients}")
             
             if not self.retriever.is_loaded():
                 logger.warning("FAISS index not loaded, falling back to string matching")
                 # Fallback to string matching
-                results = self.recipe_service.find_suitable_recipes(
-                    user_ingredients=user_ingredients,
-                    use_vector_search=False,
-                    top_k=top_k
-                )
-                # Convert RecipeWithMatch to Recipe
-                return [Recipe(**recipe.dict()) for recipe in results]
+                with timer.stage("string_match"):
+                    return self._string_matching_retrieve(user_ingredients, top_k)
             
             # Use FAISS vector search
-            distances, indices = self.retriever.search_by_ingredients(
-                ingredients=user_ingredients,
-                k=min(top_k, self.recipe_service.get_total_count()),
-                embedding_service=self.embedder
-            )
-            
-            # Get recipes from indices
-            all_recipes = self.recipe_service.get_all_recipes(
-                limit=self.recipe_service.get_total_count()
-            )
+            if neighbours is not None:
+                indices = neighbours[:min(top_k, self.recipe_service.get_total_count())]
+            else:
+                if query_embedding is None:
+                    with timer.stage("query_encode"):
+                        query_embedding = self._encode_query(user_ingredients)
+                with timer.stage("faiss_search"):
+                    distances, indices = self.retriever.search(
+                        query_embedding,
+                        k=min(top_k, self.recipe_service.get_total_count())
+                    )
             
-            retrieved_recipes = []
-            for idx in indices:
-                if idx < len(all_recipes):
-                    retrieved_recipes.append(all_recipes[idx])
+            # Map FAISS rows to recipe IDs and fetch only those records
+            with timer.stage("record_fetch"):
+                retrieved_recipes = self.recipe_service.get_many(
+                    self.recipe_service.recipe_ids_for_rows(indices)
+                )
             
             logger.debug(f"Retrieved {len(retrieved_recipes)} recipes from FAISS")
             return retrieved_recipes
@@ -92,19 +111,24 @@ class RAGPipeline:
             logger.error(f"Error in retrieval step: {e}", exc_info=True)
             logger.warning("Falling back to string matching")
             # Fallback to string matching
-            results = self.recipe_service.find_suitable_recipes(
-                user_ingredients=user_ingredients,
-                use_vector_search=False,
-                top_k=top_k
-            )
-            return [Recipe(**recipe.dict()) for recipe in results]
+            with timer.stage("string_match"):
+                return self._string_matching_retrieve(user_ingredients, top_k)
+    
+    def _string_matching_retrieve(self, user_ingredients: List[str], top_k: int) -> List[Recipe]:
+        """Retrieve recipe records ranked by string matching"""
+        ranked = self.recipe_service.rank_recipes(
+            user_ingredients=user_ingredients,
+            use_vector_search=False,
+            top_k=top_k
+        )
+        return self.recipe_service.get_many(recipe_id for recipe_id, _ in ranked)
     
     def _rerank(
         self,
         user_ingredients: List[str],
         recipes: List[Recipe],
         top_k: int = 10
-    ) -> List[Tuple[Recipe, float]]:
+    ) -> Tuple[List[Tuple[Recipe, float]], bool]:
         """
         Step 2: Re-rank retrieved recipes using cross-encoder
         
@@ -114,12 +138,15 @@ class RAGPipeline:
             top_k: Number of top recipes to return
             
         Returns:
-            List of tuples (Recipe, relevance_score) sorted by score
+            Tuple of ((Recipe, relevance_score) tuples sorted by score, whether the
+            cross-encoder scored them; False means retrieval order with dummy scores)
         """
+        if not settings.RERANKER_ENABLED:
+            return [(recipe, 1.0) for recipe in recipes[:top_k]], False
         try:
             if not recipes:
                 logger.warning("No recipes to rerank")
-                return []
+                return [], False
             
             logger.debug(f"Reranking {len(recipes)} recipes to top-{top_k}")
             
@@ -127,45 +154,176 @@ class RAGPipeline:
             reranked_results = self.reranker.rerank_by_ingredients(
                 ingredients=user_ingredients,
                 recipes=recipes,
-                top_k=top_k
+                top_k=top_k,
+                fallback=False
             )
             
             logger.debug(f"Reranking completed: {len(reranked_results)} top results")
-            return reranked_results
+            return reranked_results, True
             
         except Exception as e:
             logger.error(f"Error in reranking step: {e}", exc_info=True)
             logger.warning("Falling back to original order")
             # Fallback: return recipes with dummy scores
-            return [(recipe, 1.0) for recipe in recipes[:top_k]]
+            return [(recipe, 1.0) for recipe in recipes[:top_k]], False
+    
+    def rank(
+        self,
+        user_ingredients: List[str],
+        top_k: int = 10,
+        retrieval_top_k: int = 50,
+        query_embedding: Optional[np.ndarray] = None,
+        timer: Optional[StageTimer] = None,
+        neighbours: Optional[np.ndarray] = None
+    ) -> Dict[str, Any]:
+        """
+        Steps 1-2: Retrieval + reranking, cached by canonical ingredients
+        
+        Args:
+            user_ingredients: List of ingredient names
+            top_k: Number of recipes to keep after reranking
+            retrieval_top_k: Number of recipes to retrieve before reranking
+            query_embedding: Pre-computed query embedding (encoded on a cache miss if None)
+            timer: Optional per-request stage timer
+            neighbours: Pre-computed FAISS rows of the query (best first, at least
+                retrieval_top_k), used on a cache miss instead of searching
+            
+        Returns:
+            Dictionary with retrieval_count, reranked (Recipe, score) tuples, reranker_used,
+            cache_hit and the query_embedding used (None if not encoded)
+        """
+        timer = timer or StageTimer()
+        # Key on the retriever and reranker actually used, so fallbacks are never served
+        # once the real models are available
+        cache_key = cache._generate_key("rag_ranking", {
+            "ingredients": sorted(user_ingredients),
+            "top_k": top_k,
+            "retrieval_top_k": retrieval_top_k,
+            "retriever": self.retriever.is_loaded(),
+            "reranker": self.reranker.is_loaded()
+        })
+        with timer.stage("ranking_cache"):
+            cached = cache.get(cache_key)
+            if cached is not None:
+                retrieval_count, ranked_ids, reranker_used = cached
+                recipes = self.recipe_service.get_many(recipe_id for recipe_id, _ in ranked_ids)
+                return {
+                    "retrieval_count": retrieval_count,
+                    "reranked": [(recipe, score) for recipe, (_, score) in zip(recipes, ranked_ids)],
+                    "reranker_used": reranker_used,
+                    "cache_hit": True,
+                    "query_embedding": query_embedding
+                }
+        
+        # Encode query once for retrieval and semantic cache
+        if query_embedding is None and neighbours is None and self.retriever.is_loaded():
+            try:
+                with timer.stage("query_encode"):
+                    query_embedding = self._encode_query(user_ingredients)
+            except Exception as e:
+                logger.warning(f"Query encoding failed: {e}")
+        
+        # Step 1: Retrieval (FAISS)
+        retrieved_recipes = self._retrieve(
+            user_ingredients=user_ingredients,
+            top_k=retrieval_top_k,
+            query_embedding=query_embedding,
+            timer=timer,
+            neighbours=neighbours
+        )
+        if not retrieved_recipes:
+            return {
+                "retrieval_count": 0,
+                "reranked": [],
+                "reranker_used": False,
+                "cache_hit": False,
+                "query_embedding": query_embedding
+            }
+        
+        # Step 2: Reranking (Cross-encoder)
+        with timer.stage("rerank"):
+            reranked_results, reranker_used = self._rerank(
+                user_ingredients=user_ingredients,
+                recipes=retrieved_recipes,
+                top_k=top_k
+            )
+        
+        # Fallback orderings (reranker enabled but unavailable) are not cached
+        if reranker_used or not settings.RERANKER_ENABLED:
+            cache.set(
+                cache_key,
+                (
+                    len(retrieved_recipes),
+                    [(recipe.id, float(score)) for recipe, score in reranked_results],
+                    reranker_used
+                ),
+                ttl_seconds=settings.RAG_RANKING_CACHE_TTL
+            )
+        return {
+            "retrieval_count": len(retrieved_recipes),
+            "reranked": reranked_results,
+            "reranker_used": reranker_used,
+            "cache_hit": False,
+            "query_embedding": query_embedding
+        }
     
     def _generate(
         self,
         user_ingredients: List[str],
         reranked_recipes: List[Tuple[Recipe, float]],
         user_preferences: Optional[Dict[str, Any]] = None,
-        excluded_ingredients: Optional[List[str]] = None
-    ) -> Optional[str]:
+        excluded_ingredients: Optional[List[str]] = None,
+        query_embedding: Optional[np.ndarray] = None,
+        use_semantic_cache: bool = True,
+        stats: Optional[Dict[str, Any]] = None,
+        timer: Optional[StageTimer] = None
+    ) -> Tuple[Optional[str], bool]:
         """
         Step 3: Generate explanation using Gemini LLM
         
+        A semantic cache in front of the LLM reuses explanations of
+        near-identical queries with (mostly) the same recommended recipes.
+        
         Args:
             user_ingredients: List of ingredient names
             reranked_recipes: List of (Recipe, score) tuples
             user_preferences: Dietary preferences dict
             excluded_ingredients: List of excluded ingredients
+            query_embedding: Pre-computed query embedding (encoded if None)
+            use_semantic_cache: Whether to look up/store in the semantic cache
+            stats: Optional dict filled with generation stats (prompt_tokens, prompt_excluded_recipes,
+                fallback_fragments, prompt_build_ms, llm_call_ms)
+            timer: Optional per-request stage timer
             
         Returns:
-            Explanation text or None if generation fails
+            Tuple of (explanation text or None, semantic cache hit)
         """
+        timer = timer or StageTimer()
         try:
             if not reranked_recipes:
                 logger.warning("No recipes provided for explanation generation")
-                return None
+                return None, False
             
             # Extract recipes from tuples
             recipes = [recipe for recipe, score in reranked_recipes]
             
+            # Semantic cache lookup
+            use_semantic_cache = use_semantic_cache and self.semantic_cache.enabled
+            if use_semantic_cache:
+                if query_embedding is None:
+                    with timer.stage("query_encode"):
+                        query_embedding = self._encode_query(user_ingredients)
+                recipe_ids = [recipe.Image_Name for recipe in recipes]
+                # Only active flags count: absent preferences and all-False ones are the same request
+                preferences_key = json.dumps({
+                    "preferences": sorted(name for name, value in (user_preferences or {}).items() if value),
+                    "excluded": sorted(ing.lower() for ing in excluded_ingredients or [])
+                }, sort_keys=True)
+                with timer.stage("semantic_cache"):
+                    cached_explanation = self.semantic_cache.lookup(query_embedding, recipe_ids, preferences_key)
+                if cached_explanation:
+                    return cached_explanation, True
+            
             logger.debug(f"Generating explanation for {len(recipes)} recipes")
             
             # Use LLM service
@@ -173,19 +331,22 @@ class RAGPipeline:
                 user_ingredients=user_ingredients,
                 recommended_recipes=recipes,
                 user_preferences=user_preferences,
-                excluded_ingredients=excluded_ingredients
+                excluded_ingredients=excluded_ingredients,
+                stats=stats
             )
             
             if explanation:
                 logger.debug(f"Explanation generated: {len(explanation)} characters")
+                if use_semantic_cache:
+                    self.semantic_cache.store(query_embedding, recipe_ids, preferences_key, explanation)
             else:
                 logger.debug("No explanation generated (LLM service unavailable)")
             
-            return explanation
+            return explanation, False
             
         except Exception as e:
             logger.error(f"Error in generation step: {e}", exc_info=True)
-            return None
+            return None, False
     
     def process(
         self,
@@ -194,7 +355,8 @@ class RAGPipeline:
         excluded_ingredients: Optional[List[str]] = None,
         top_k: int = 10,
         explain: bool = True,
-        retrieval_top_k: int = 50
+        retrieval_top_k: int = 50,
+        use_semantic_cache: bool = True
     ) -> Dict[str, Any]:
         """
         Complete RAG pipeline: Retrieve → Rerank → Generate
@@ -206,19 +368,26 @@ class RAGPipeline:
             top_k: Number of final recipes to return (after reranking)
             explain: Whether to generate LLM explanation
             retrieval_top_k: Number of recipes to retrieve before reranking
+            use_semantic_cache: Whether to reuse explanations of similar requests
             
         Returns:
             Dictionary with recipes, explanation, and metadata
         """
         logger.info(f"RAG pipeline started: {len(user_ingredients)} ingredients, top_k={top_k}")
+        timer = StageTimer()
         
-        # Step 1: Retrieval (FAISS)
-        retrieved_recipes = self._retrieve(
+        # Steps 1-2: Retrieval (FAISS) + Reranking (Cross-encoder), cached
+        ranking = self.rank(
             user_ingredients=user_ingredients,
-            top_k=retrieval_top_k
+            top_k=top_k,
+            retrieval_top_k=retrieval_top_k,
+            timer=timer
         )
+        reranked_results = ranking["reranked"]
+        # Reused by the semantic cache (encoded there if ranking was served from cache)
+        query_embedding = ranking["query_embedding"]
         
-        if not retrieved_recipes:
+        if ranking["retrieval_count"] == 0:
             logger.warning("No recipes retrieved, returning empty result")
             return {
                 "recipes": [],
@@ -226,45 +395,47 @@ class RAGPipeline:
                 "metadata": {
                     "retrieval_count": 0,
                     "reranked_count": 0,
-                    "pipeline_stages": ["retrieval"]
+                    "pipeline_stages": ["retrieval"],
+                    "retriever_used": self.retriever.is_loaded(),
+                    "reranker_used": False,
+                    "llm_used": False,
+                    "stage_timings_ms": timer.timings
                 }
             }
         
-        # Step 2: Reranking (Cross-encoder)
-        reranked_results = self._rerank(
-            user_ingredients=user_ingredients,
-            recipes=retrieved_recipes,
-            top_k=top_k
-        )
-        
         # Convert to RecipeWithMatch format
         final_recipes = []
-        for recipe, score in reranked_results:
-            # Count matching ingredients (using recipe service's method)
-            # Access private method through recipe service instance
-            recipe_ingredients_lower = recipe.Ingredients.lower()
-            matching_ingredients = []
-            for ingredient in user_ingredients:
-                if ingredient.lower() in recipe_ingredients_lower:
-                    matching_ingredients.append(ingredient)
-            
-            final_recipes.append(
-                RecipeWithMatch(
-                    **recipe.dict(),
-                    matchingCount=len(matching_ingredients),
-                    matchingIngredients=matching_ingredients
+        with timer.stage("match_count"):
+            for recipe, score in reranked_results:
+                # Count matching ingredients (using recipe service's method)
+                # Access private method through recipe service instance
+                matching_ingredients = self.recipe_service._count_matches(recipe, user_ingredients)
+                
+                final_recipes.append(
+                    RecipeWithMatch(
+                        **recipe.dict(),
+                        matchingCount=len(matching_ingredients),
+                        matchingIngredients=matching_ingredients
+                    )
                 )
-            )
         
         # Step 3: Generation (LLM explanation)
         explanation = None
+        semantic_cache_hit = False
+        generation_stats: Dict[str, Any] = {}
         if explain:
-            explanation = self._generate(
+            explanation, semantic_cache_hit = self._generate(
                 user_ingredients=user_ingredients,
                 reranked_recipes=reranked_results,
                 user_preferences=user_preferences,
-                excluded_ingredients=excluded_ingredients
+                excluded_ingredients=excluded_ingredients,
+                query_embedding=query_embedding,
+                use_semantic_cache=use_semantic_cache,
+                stats=generation_stats,
+                timer=timer
             )
+            timer.add("prompt_build", generation_stats.get("prompt_build_ms"))
+            timer.add("llm_call", generation_stats.get("llm_call_ms"))
         
         logger.info(f"RAG pipeline completed: {len(final_recipes)} recipes, explanation={'yes' if explanation else 'no'}")
         
@@ -272,12 +443,18 @@ class RAGPipeline:
             "recipes": final_recipes,
             "explanation": explanation,
             "metadata": {
-                "retrieval_count": len(retrieved_recipes),
+                "retrieval_count": ranking["retrieval_count"],
                 "reranked_count": len(reranked_results),
                 "pipeline_stages": ["retrieval", "reranking"] + (["generation"] if explain else []),
                 "retriever_used": self.retriever.is_loaded(),
-                "reranker_used": self.reranker.is_loaded(),
-                "llm_used": self.generator.is_available()
+                "reranker_used": ranking["reranker_used"],
+                "llm_used": self.generator.is_available(),
+                "semantic_cache_hit": semantic_cache_hit,
+                "ranking_cache_hit": ranking["cache_hit"],
+                "prompt_tokens": generation_stats.get("prompt_tokens"),
+                "prompt_excluded_recipes": generation_stats.get("prompt_excluded_recipes"),
+                "fallback_fragments": generation_stats.get("fallback_fragments"),
+                "stage_timings_ms": timer.timings
             }
         }
 
@@ -1,67 +1,238 @@
+import gc
+import sys
 import json
-import os
+import time
 import logging
-from typing import List, Optional
-from app.models.recipe import Recipe, RecipeWithMatch
+import secrets
+from array import array
+from pathlib import Path
+from typing import Iterable, Iterator, List, Optional, Tuple
+import numpy as np
+from app.config import settings
+from app.models.recipe import Recipe, RecipeWithMatch, CompactRecipe
 from app.utils.cache import cache
+from app.utils.persistent_cache import PersistentCache, compute_data_version
+from app.utils.columnar_store import ColumnarStore, InMemoryTextColumns, write_columnar_store
+from app.utils.vocabulary import ingredient_vocabulary
+from app.utils.helpers import get_rss_mb
+from app.utils import json_fragments
+from app.utils.metrics import STAGE_DURATION
 from app.services.faiss_service import faiss_service
 from app.services.embedding_service import embedding_service
 
 # Setup logger
 logger = logging.getLogger(__name__)
 
+RECIPE_COLUMNS = ("Title", "Ingredients", "Instructions", "Image_Name", "Cleaned_Ingredients")
+FRAGMENT_COLUMN = "Json"  # Pre-serialized static recipe JSON (unterminated object)
+VOCABULARY_METADATA_KEY = "ingredient_vocabulary"  # Fingerprint of the vocabulary behind Ingredient_Ids
+DATASET_METADATA_KEY = "recipes_json"  # Fingerprint of the recipes.json the store was built from
+
 
 class RecipeService:
     def __init__(self):
-        self.recipes: List[Recipe] = []
+        self.recipes: List[CompactRecipe] = []
         self._recipes_loaded = False
+        self.data_dir = Path(__file__).parent.parent.parent / 'data'
+        self.store_path = Path(__file__).parent.parent.parent / settings.RECIPE_STORE_PATH
+        self._result_store: Optional[PersistentCache] = None
+        self._result_set_store: Optional[PersistentCache] = None
+        self._cursor_secret: Optional[bytes] = None
+        self._store: Optional[ColumnarStore] = None
+        self._fragments: List[Optional[bytes]] = []
+        self._row_ids: Optional[array] = None  # FAISS row -> recipe ID (-1 = unresolved)
+        self._row_ids_source = None
+        self._postings: Optional[List[array]] = None  # Canonical ingredient ID -> recipe IDs
+    
+    def _load_recipes_from_json(self) -> List[Recipe]:
+        """Load and validate recipes from JSON data file"""
+        data_path = self.data_dir / 'recipes.json'
+        
+        with open(data_path, 'r', encoding='utf-8') as f:
+            recipes_data = json.load(f)
+        
+        # Filter out recipes with None values and convert to Recipe models
+        valid_recipes = []
+        skipped = 0
+        
+        for recipe in recipes_data:
+            try:
+                # Check if all required fields exist and are not None
+                if (recipe.get('Title') and 
+                    recipe.get('Ingredients') and 
+                    recipe.get('Image_Name') and 
+                    recipe.get('Cleaned_Ingredients')):
+                    valid_recipes.append(Recipe(**recipe))
+                else:
+                    skipped += 1
+            except Exception:
+                skipped += 1
+                continue
+        
+        if skipped > 0:
+            logger.warning(f"Skipped {skipped} invalid recipes")
+        
+        return valid_recipes
+    
+    def _dataset_fingerprint(self) -> Optional[str]:
+        """Size and mtime of recipes.json (same identity as data_version), None if the file is absent"""
+        data_path = self.data_dir / 'recipes.json'
+        if not data_path.exists():
+            return None
+        stat = data_path.stat()
+        return f"{stat.st_size}:{int(stat.st_mtime)}"
+    
+    def _compact_from_store(self, store: ColumnarStore) -> List[CompactRecipe]:
+        """Build compact records from the columnar store (long text stays in the mmap)"""
+        titles = store.column_values("Title")
+        image_names = store.column_values("Image_Name")
+        ingredients = store.column_values("Ingredients")
+        # IDs are positions in data/ingredients.json: only usable with the vocabulary they were built from
+        ids_valid = store.metadata.get(VOCABULARY_METADATA_KEY) == ingredient_vocabulary.fingerprint
+        if "Ingredient_Ids" in store.columns and ids_valid:
+            ingredient_ids = [array('H', value) for value in store.column_bytes("Ingredient_Ids")]
+        else:
+            if "Ingredient_Ids" in store.columns:
+                logger.warning(
+                    "Recipe store ingredient IDs were built for another ingredient vocabulary, "
+                    "using substring matching (rebuild with scripts/build_recipe_store.py)"
+                )
+            ingredient_ids = [None] * len(store)
+        
+        return [
+            CompactRecipe(
+                id=i,
+                title=sys.intern(titles[i]),
+                image_name=sys.intern(image_names[i]),
+                ingredients=ingredients[i],
+                text_source=store,
+                ingredient_ids=ingredient_ids[i]
+            )
+            for i in range(len(store))
+        ]
+    
+    def _compact_from_json(self) -> List[CompactRecipe]:
+        """Build compact records from recipes.json (long text kept compressed in memory)"""
+        recipes = self._load_recipes_from_json()
+        text_source = InMemoryTextColumns(
+            {
+                "Instructions": [recipe.Instructions for recipe in recipes],
+                "Cleaned_Ingredients": [recipe.Cleaned_Ingredients for recipe in recipes]
+            },
+            compress=settings.RECIPE_COMPRESS_TEXT
+        )
+        return [
+            CompactRecipe(
+                id=i,
+                title=sys.intern(recipe.Title),
+                image_name=sys.intern(recipe.Image_Name),
+                ingredients=recipe.Ingredients,
+                text_source=text_source
+            )
+            for i, recipe in enumerate(recipes)
+        ]
     
     def _load_recipes(self):
-        """Load recipes from JSON data file"""
+        """Load recipes from the columnar store (if built) or the JSON data file"""
+        start_time = time.perf_counter()
+        rss_before = get_rss_mb()
+        source = "recipes.json"
+        
         try:
-            # Load from JSON file
-            data_path = os.path.join(
-                os.path.dirname(os.path.dirname(os.path.dirname(__file__))),
-                'data',
-                'recipes.json'
-            )
-            
-            with open(data_path, 'r', encoding='utf-8') as f:
-                recipes_data = json.load(f)
-            
-            # Filter out recipes with None values and convert to Recipe models
-            valid_recipes = []
-            skipped = 0
-            
-            for recipe in recipes_data:
+            store = None
+            if self.store_path.exists():
                 try:
-                    # Check if all required fields exist and are not None
-                    if (recipe.get('Title') and 
-                        recipe.get('Ingredients') and 
-                        recipe.get('Image_Name') and 
-                        recipe.get('Cleaned_Ingredients')):
-                        valid_recipes.append(Recipe(**recipe))
-                    else:
-                        skipped += 1
-                except Exception:
-                    skipped += 1
-                    continue
+                    store = ColumnarStore(self.store_path)
+                except Exception as e:
+                    logger.warning(f"Failed to open recipe store, falling back to JSON: {e}")
+            # Records must match the recipes.json that the FAISS index and data version follow
+            fingerprint = self._dataset_fingerprint()
+            if store is not None and fingerprint is not None and store.metadata.get(DATASET_METADATA_KEY) != fingerprint:
+                logger.warning(
+                    "Recipe store was built from another recipes.json, falling back to JSON "
+                    "(rebuild with scripts/build_recipe_store.py)"
+                )
+                store = None
+            if store is not None:
+                try:
+                    self.recipes = self._compact_from_store(store)
+                    self._store = store
+                    source = self.store_path.name
+                except Exception as e:
+                    logger.warning(f"Failed to read recipe store, falling back to JSON: {e}")
+                    store = None
+            if store is None:
+                self.recipes = self._compact_from_json()
+            self._fragments = [None] * len(self.recipes)
             
-            self.recipes = valid_recipes
-            logger.info(f"Loaded {len(self.recipes)} recipes")
-            if skipped > 0:
-                logger.warning(f"Skipped {skipped} invalid recipes")
+            if settings.GC_FREEZE_AFTER_LOAD:
+                # Move the long-lived corpus out of the GC's scanned generations
+                gc.collect()
+                gc.freeze()
+            
+            logger.info(
+                f"Loaded {len(self.recipes)} recipes from {source} in "
+                f"{(time.perf_counter() - start_time) * 1000:.1f}ms "
+                f"(RSS {rss_before:.1f}MB → {get_rss_mb():.1f}MB per worker)"
+            )
             
         except Exception as e:
             logger.error(f"Error loading recipes: {e}", exc_info=True)
             self.recipes = []
     
+    def build_store(self) -> int:
+        """
+        Convert recipes.json into the columnar binary store (validated once at build time)
+        Also precomputes canonical ingredient ID arrays per recipe
+        
+        Returns:
+            Number of recipes written
+        """
+        fingerprint = self._dataset_fingerprint()
+        recipes = self._load_recipes_from_json()
+        columns = {
+            column: [getattr(recipe, column) or "" for recipe in recipes]
+            for column in RECIPE_COLUMNS
+        }
+        columns["Ingredient_Ids"] = [
+            ingredient_vocabulary.match_ids(recipe.Ingredients).tobytes() for recipe in recipes
+        ]
+        columns[FRAGMENT_COLUMN] = [
+            json_fragments.object_fragment({column: columns[column][i] for column in RECIPE_COLUMNS})
+            for i in range(len(recipes))
+        ]
+        write_columnar_store(
+            self.store_path,
+            columns,
+            metadata={
+                VOCABULARY_METADATA_KEY: ingredient_vocabulary.fingerprint,
+                DATASET_METADATA_KEY: fingerprint
+            }
+        )
+        logger.info(f"Recipe store written to {self.store_path}: {len(recipes)} recipes")
+        return len(recipes)
+    
     def _ensure_loaded(self):
         """Ensure recipes are loaded (lazy loading)"""
         if not self._recipes_loaded:
             self._load_recipes()
             self._recipes_loaded = True
     
+    def reload(self) -> int:
+        """
+        Load recipes again, dropping derived lookups (warm-up retry after a failed load)
+        
+        Returns:
+            Number of loaded recipes
+        """
+        self._store = None
+        self._row_ids = None
+        self._row_ids_source = None
+        self._postings = None
+        self._load_recipes()
+        self._recipes_loaded = True
+        return len(self.recipes)
+    
     def _count_matches(self, recipe: Recipe, user_ingredients: List[str]) -> List[str]:
         """
         Count matching ingredients between recipe and user ingredients
@@ -73,76 +244,192 @@ class RecipeService:
         Returns:
             List of matching ingredient names
         """
-        recipe_ingredients_lower = recipe.Ingredients.lower()
+        ingredient_ids = getattr(recipe, "ingredient_ids", None)
+        recipe_ingredients_lower = None
         matching_ingredients = []
         
         for ingredient in user_ingredients:
-            if ingredient.lower() in recipe_ingredients_lower:
+            # Canonical ingredients: precomputed ID lookup instead of substring search
+            vocabulary_id = ingredient_vocabulary.id_of(ingredient) if ingredient_ids is not None else None
+            if vocabulary_id is not None:
+                matched = vocabulary_id in ingredient_ids
+            else:
+                if recipe_ingredients_lower is None:
+                    recipe_ingredients_lower = recipe.Ingredients.lower()
+                matched = ingredient.lower() in recipe_ingredients_lower
+            
+            if matched:
                 matching_ingredients.append(ingredient)
         
         return matching_ingredients
     
-    def _string_matching_search(self, user_ingredients: List[str]) -> List[RecipeWithMatch]:
+    def match_ingredients(self, recipe_id: int, user_ingredients: List[str]) -> List[str]:
+        """User ingredients contained in a recipe (same semantics as ranking), in the given order"""
+        self._ensure_loaded()
+        return self._count_matches(self.recipes[recipe_id], user_ingredients)
+    
+    def recipes_with_ingredient(self, ingredient: str) -> Optional[array]:
         """
-        Fallback search method using string matching
-        Used when FAISS index is not available
+        IDs of all recipes containing a canonical ingredient (inverted index, built on first use)
         
         Args:
-            user_ingredients: List of ingredient names
+            ingredient: Ingredient name
             
         Returns:
-            List of RecipeWithMatch objects sorted by matching count
+            Ascending recipe IDs, or None if the name is not a canonical ingredient
+        """
+        vocabulary_id = ingredient_vocabulary.id_of(ingredient)
+        if vocabulary_id is None:
+            return None
+        if self._postings is None:
+            self._ensure_loaded()
+            postings = [array('I') for _ in ingredient_vocabulary.names]
+            for recipe in self.recipes:
+                ids = recipe.ingredient_ids
+                if ids is None:
+                    ids = ingredient_vocabulary.match_ids(recipe.Ingredients)
+                for ingredient_id in set(ids):
+                    postings[ingredient_id].append(recipe.id)
+            self._postings = postings
+        return self._postings[vocabulary_id]
+    
+    def data_version(self) -> str:
+        """Version of the dataset, vocabulary and index files; recipe IDs and rankings are only valid within one version"""
+        return compute_data_version([
+            self.data_dir / 'recipes.json',
+            self.store_path,
+            ingredient_vocabulary.path,
+            faiss_service.index_path
+        ])
+    
+    def _get_result_store(self) -> Optional[PersistentCache]:
+        """Shared cross-worker L2 result cache (versioned by dataset/index files)"""
+        if not settings.RESULT_CACHE_L2_ENABLED:
+            return None
+        if self._result_store is None:
+            self._result_store = PersistentCache(
+                Path(__file__).parent.parent.parent / settings.RESULT_CACHE_L2_PATH,
+                version=self.data_version()
+            )
+        return self._result_store
+    
+    def _get_result_set_store(self) -> PersistentCache:
+        """Shared store of cursor result sets (the L2 store, opened even with the L2 result cache disabled)"""
+        result_store = self._get_result_store()
+        if result_store is not None:
+            return result_store
+        if self._result_set_store is None:
+            self._result_set_store = PersistentCache(
+                Path(__file__).parent.parent.parent / settings.RESULT_CACHE_L2_PATH,
+                version=self.data_version()
+            )
+        return self._result_set_store
+    
+    def cursor_secret(self) -> bytes:
+        """HMAC key of pagination cursors (configured, or generated once and shared by all workers)"""
+        if self._cursor_secret is None:
+            secret = settings.RESULT_SET_CURSOR_SECRET
+            if not secret:
+                secret = self._get_result_set_store().get_or_set(
+                    "resultset:secret", secrets.token_hex(32), ttl_seconds=10 * 365 * 86400
+                )
+            self._cursor_secret = secret.encode()
+        return self._cursor_secret
+    
+    def _json_fragment(self, idx: int) -> json_fragments.Fragment:
+        """
+        Static JSON of a recipe as an unterminated object
+        Served zero-copy from the store when built with fragments, otherwise serialized once and kept
+        """
+        if self._store is not None and FRAGMENT_COLUMN in self._store.columns:
+            return self._store.get_bytes(FRAGMENT_COLUMN, idx)
+        fragment = self._fragments[idx]
+        if fragment is None:
+            fragment = json_fragments.object_fragment(self.recipes[idx].dict())
+            self._fragments[idx] = fragment
+        return fragment
+    
+    def render_results(self, ranked: List[Tuple[int, List[str]]]) -> bytes:
+        """
+        Serialize ranked (recipe index, matching ingredients) pairs as a JSON array of
+        RecipeWithMatch objects by splicing pre-serialized recipe fragments
         """
         self._ensure_loaded()
+        with STAGE_DURATION.time(stage="serialization"):
+            return json_fragments.json_array(
+                json_fragments.recipe_with_match(self._json_fragment(idx), matching_ingredients)
+                for idx, matching_ingredients in ranked
+                if 0 <= idx < len(self.recipes)
+            )
+    
+    def _to_results(self, ranked: List[Tuple[int, List[str]]]) -> List[RecipeWithMatch]:
+        """
+        Materialize (recipe index, matching ingredients) pairs as RecipeWithMatch objects
+        """
         results = []
-        
-        for recipe in self.recipes:
-            matching_ingredients = self._count_matches(recipe, user_ingredients)
-            
-            if len(matching_ingredients) > 0:
+        for idx, matching_ingredients in ranked:
+            if 0 <= idx < len(self.recipes):
                 results.append(
                     RecipeWithMatch(
-                        **recipe.dict(),
+                        **self.recipes[idx].dict(),
                         matchingCount=len(matching_ingredients),
                         matchingIngredients=matching_ingredients
                     )
                 )
+        return results
+    
+    def _string_matching_rank(self, user_ingredients: List[str]) -> List[Tuple[int, List[str]]]:
+        """
+        Rank recipes by string matching
+        
+        Returns:
+            List of (recipe index, matching ingredients) sorted by matching count
+        """
+        self._ensure_loaded()
+        ranked = []
+        
+        for idx, recipe in enumerate(self.recipes):
+            matching_ingredients = self._count_matches(recipe, user_ingredients)
+            
+            if len(matching_ingredients) > 0:
+                ranked.append((idx, matching_ingredients))
         
         # Sort by matching count (descending)
-        results.sort(key=lambda x: x.matchingCount, reverse=True)
+        ranked.sort(key=lambda x: len(x[1]), reverse=True)
         
-        return results
+        return ranked
     
-    def find_suitable_recipes(
-        self, 
-        user_ingredients: List[str],
-        use_vector_search: bool = True,
-        top_k: int = 50
-    ) -> List[RecipeWithMatch]:
+    def _string_matching_search(self, user_ingredients: List[str]) -> List[RecipeWithMatch]:
         """
-        Find recipes that match user ingredients using vector search or string matching
+        Fallback search method using string matching
+        Used when FAISS index is not available
         
         Args:
             user_ingredients: List of ingredient names
-            use_vector_search: Whether to use FAISS vector search (default: True)
-            top_k: Number of top results to return (default: 50)
             
         Returns:
-            List of RecipeWithMatch objects sorted by relevance
+            List of RecipeWithMatch objects sorted by matching count
         """
-        # Check cache first
-        # Combine all parameters into a single dict for cache key generation
-        cache_data = {
-            "ingredients": sorted(user_ingredients),
-            "use_vector_search": use_vector_search,
-            "top_k": top_k
-        }
-        cache_key = cache._generate_key("recipes", cache_data)
-        cached_result = cache.get(cache_key)
-        if cached_result:
-            logger.debug(f"Cache hit for ingredients: {user_ingredients}")
-            return cached_result
+        return self._to_results(self._string_matching_rank(user_ingredients))
+    
+    def _rank(
+        self,
+        user_ingredients: List[str],
+        use_vector_search: bool,
+        top_k: int,
+        query_embedding: Optional[np.ndarray] = None,
+        neighbours: Optional[np.ndarray] = None
+    ) -> List[Tuple[int, List[str]]]:
+        """
+        Rank recipes with vector search (if available) or string matching
         
+        Args:
+            query_embedding: Pre-computed ingredient query embedding (encoded if None)
+            neighbours: Pre-computed FAISS rows of the query, best first (searched if None)
+        
+        Returns:
+            List of (recipe index, matching ingredients) sorted by relevance
+        """
         self._ensure_loaded()
         
         # Use vector search if available and requested
@@ -151,35 +438,25 @@ class RecipeService:
                 logger.debug(f"Using vector search for ingredients: {user_ingredients}")
                 
                 # Search using FAISS
-                distances, indices = faiss_service.search_by_ingredients(
-                    ingredients=user_ingredients,
-                    k=min(top_k, len(self.recipes)),
-                    embedding_service=embedding_service
-                )
-                
-                # Convert results to RecipeWithMatch
-                results = []
-                for idx, dist in zip(indices, distances):
-                    if idx < len(self.recipes):
-                        recipe = self.recipes[idx]
-                        
-                        # Count actual matching ingredients for display
-                        matching_ingredients = self._count_matches(recipe, user_ingredients)
-                        
-                        results.append(
-                            RecipeWithMatch(
-                                **recipe.dict(),
-                                matchingCount=len(matching_ingredients),
-                                matchingIngredients=matching_ingredients
-                            )
-                        )
-                
-                logger.debug(f"Vector search returned {len(results)} results")
+                if neighbours is not None:
+                    indices = neighbours[:min(top_k, len(self.recipes))]
+                elif query_embedding is None:
+                    distances, indices = faiss_service.search_by_ingredients(
+                        ingredients=user_ingredients,
+                        k=min(top_k, len(self.recipes)),
+                        embedding_service=embedding_service
+                    )
+                else:
+                    distances, indices = faiss_service.search(query_embedding, k=min(top_k, len(self.recipes)))
                 
-                # Cache result for 5 minutes
-                cache.set(cache_key, results, ttl_seconds=300)
+                # Count actual matching ingredients for display
+                ranked = [
+                    (recipe_id, self._count_matches(self.recipes[recipe_id], user_ingredients))
+                    for recipe_id in self.recipe_ids_for_rows(indices)
+                ]
                 
-                return results
+                logger.debug(f"Vector search returned {len(ranked)} results")
+                return ranked
                 
             except Exception as e:
                 logger.warning(f"Vector search failed: {e}, falling back to string matching")
@@ -187,18 +464,197 @@ class RecipeService:
         
         # Fallback to string matching
         logger.debug(f"Using string matching for ingredients: {user_ingredients}")
-        results = self._string_matching_search(user_ingredients)
         
         # Limit results to top_k
-        results = results[:top_k]
+        return self._string_matching_rank(user_ingredients)[:top_k]
+    
+    def rank_recipes(
+        self,
+        user_ingredients: List[str],
+        use_vector_search: bool = True,
+        top_k: int = 50,
+        query_embedding: Optional[np.ndarray] = None,
+        neighbours: Optional[np.ndarray] = None
+    ) -> List[Tuple[int, List[str]]]:
+        """
+        Cached ranking of recipes for the given ingredients
+        
+        Rankings are cached in-process (L1) and in a SQLite store shared by all
+        workers on the host (L2) as compact (recipe index, matching ingredients) pairs.
+        
+        Args:
+            user_ingredients: List of ingredient names
+            use_vector_search: Whether to use FAISS vector search (default: True)
+            top_k: Number of top results to return (default: 50)
+            query_embedding: Pre-computed ingredient query embedding, used on a cache miss
+            neighbours: Pre-computed FAISS rows of the query (best first, at least top_k),
+                used on a cache miss instead of searching (batched searches)
+            
+        Returns:
+            List of (recipe index, matching ingredients) sorted by relevance
+        """
+        # Check cache first
+        # Combine all parameters into a single dict for cache key generation
+        # Key on the method that will actually run, so string-matching fallbacks
+        # (index not loaded yet) are never served as vector results later
+        cache_data = {
+            "ingredients": sorted(user_ingredients),
+            "use_vector_search": use_vector_search and faiss_service.is_loaded(),
+            "top_k": top_k
+        }
+        cache_key = cache._generate_key("recipes", cache_data)
+        cached_result = cache.get(cache_key)
+        if cached_result is not None:
+            logger.debug(f"Cache hit for ingredients: {user_ingredients}")
+            return cached_result
+        
+        self._ensure_loaded()
+        
+        result_store = self._get_result_store()
+        ranked = result_store.get(cache_key) if result_store else None
+        if ranked is None:
+            ranked = self._rank(user_ingredients, use_vector_search, top_k, query_embedding, neighbours)
+            if result_store:
+                result_store.set(cache_key, ranked, ttl_seconds=settings.RESULT_CACHE_L2_TTL)
+        else:
+            logger.debug(f"L2 cache hit for ingredients: {user_ingredients}")
+            ranked = [(idx, matching_ingredients) for idx, matching_ingredients in ranked]
         
         # Cache result for 5 minutes
-        cache.set(cache_key, results, ttl_seconds=300)
+        cache.set(cache_key, ranked, ttl_seconds=300)
         
-        return results
+        return ranked
+    
+    def open_result_set(
+        self,
+        user_ingredients: List[str],
+        use_vector_search: bool = True
+    ) -> Tuple[str, List[Tuple[int, List[str]]]]:
+        """
+        Rank a query once (RESULT_SET_MAX_RESULTS recipes) and store the ranking under a
+        random result set handle in the shared store for RESULT_SET_TTL seconds
+        
+        Later pages read the stored ranking on any worker, so retrieval never reruns
+        while scrolling and a switch between vector search and string matching cannot
+        reshuffle the pages.
+        
+        Args:
+            user_ingredients: List of ingredient names
+            use_vector_search: Whether to use FAISS vector search (default: True)
+            
+        Returns:
+            Tuple of (handle, ranked (recipe index, matching ingredients) pairs)
+        """
+        ranked = self.rank_recipes(user_ingredients, use_vector_search, settings.RESULT_SET_MAX_RESULTS)
+        handle = secrets.token_urlsafe(12)
+        self._get_result_set_store().set(f"resultset:{handle}", ranked, ttl_seconds=settings.RESULT_SET_TTL)
+        return handle, ranked
+    
+    def get_result_set(self, handle: str) -> Optional[List[Tuple[int, List[str]]]]:
+        """Get a stored ranking by handle, None if unknown or expired"""
+        ranked = self._get_result_set_store().get(f"resultset:{handle}")
+        if ranked is None:
+            return None
+        return [(idx, matching_ingredients) for idx, matching_ingredients in ranked]
+    
+    def find_suitable_recipes(
+        self, 
+        user_ingredients: List[str],
+        use_vector_search: bool = True,
+        top_k: int = 50
+    ) -> List[RecipeWithMatch]:
+        """
+        Find recipes that match user ingredients using vector search or string matching
+        
+        Args:
+            user_ingredients: List of ingredient names
+            use_vector_search: Whether to use FAISS vector search (default: True)
+            top_k: Number of top results to return (default: 50)
+            
+        Returns:
+            List of RecipeWithMatch objects sorted by relevance
+        """
+        return self._to_results(self.rank_recipes(user_ingredients, use_vector_search, top_k))
+    
+    def get(self, recipe_id: int) -> Optional[CompactRecipe]:
+        """Get a shared, read-only recipe record by ID"""
+        self._ensure_loaded()
+        if 0 <= recipe_id < len(self.recipes):
+            return self.recipes[recipe_id]
+        return None
+    
+    def get_many(self, recipe_ids: Iterable[int]) -> List[CompactRecipe]:
+        """Get shared, read-only recipe records by ID in the given order (unknown IDs are skipped)"""
+        self._ensure_loaded()
+        recipes = self.recipes
+        count = len(recipes)
+        return [recipes[recipe_id] for recipe_id in recipe_ids if 0 <= recipe_id < count]
+    
+    def iter_recipes(self) -> Iterator[CompactRecipe]:
+        """Iterate over all recipe records without copying the corpus"""
+        self._ensure_loaded()
+        return iter(self.recipes)
+    
+    def _build_row_ids(self, row_metadata: Optional[List[Tuple[str, str]]], num_rows: int) -> array:
+        """
+        Map FAISS index rows to recipe IDs
+        Rows are validated against the index metadata (title, image name); rows whose
+        recipe moved are resolved by lookup, unknown rows map to -1
+        """
+        if row_metadata is None:
+            logger.warning("No usable FAISS index metadata, assuming index rows equal recipe IDs")
+            return array('i', [i if i < len(self.recipes) else -1 for i in range(num_rows)])
+        
+        row_ids = array('i', [-1]) * len(row_metadata)
+        by_key = None
+        remapped = 0
+        for row, key in enumerate(row_metadata):
+            if row < len(self.recipes) and (self.recipes[row].Title, self.recipes[row].Image_Name) == key:
+                row_ids[row] = row
+                continue
+            if by_key is None:
+                by_key = {(recipe.Title, recipe.Image_Name): recipe.id for recipe in self.recipes}
+            recipe_id = by_key.get(key)
+            if recipe_id is not None:
+                row_ids[row] = recipe_id
+                remapped += 1
+        
+        unresolved = row_ids.count(-1)
+        if remapped or unresolved:
+            logger.warning(
+                f"FAISS index rows differ from recipe order: {remapped} remapped, "
+                f"{unresolved} unresolved (rebuild the index to fix)"
+            )
+        return row_ids
+    
+    def recipe_ids_for_rows(self, rows: Iterable[int]) -> List[int]:
+        """
+        Translate FAISS search result rows into recipe IDs (unresolved rows are skipped)
+        
+        Args:
+            rows: Row indices returned by FAISS search
+            
+        Returns:
+            List of recipe IDs in the same order
+        """
+        self._ensure_loaded()
+        row_metadata = faiss_service.row_metadata
+        num_rows = faiss_service.index.ntotal if faiss_service.index is not None else len(self.recipes)
+        source = (id(row_metadata), num_rows)
+        if self._row_ids is None or self._row_ids_source != source:
+            self._row_ids = self._build_row_ids(row_metadata, num_rows)
+            self._row_ids_source = source
+        
+        row_ids = self._row_ids
+        result = []
+        for row in rows:
+            row = int(row)
+            if 0 <= row < len(row_ids) and row_ids[row] >= 0:
+                result.append(row_ids[row])
+        return result
     
-    def get_all_recipes(self, limit: int = 50, offset: int = 0) -> List[Recipe]:
-        """Get all recipes with pagination"""
+    def get_all_recipes(self, limit: int = 50, offset: int = 0) -> List[CompactRecipe]:
+        """Get all recipes with pagination (compact records, see CompactRecipe.to_recipe)"""
         self._ensure_loaded()
         return self.recipes[offset:offset + limit]
     
@@ -207,7 +663,7 @@ class RecipeService:
         self._ensure_loaded()
         for recipe in self.recipes:
             if recipe.Title == title:
-                return recipe
+                return recipe.to_recipe()
         return None
     
     def get_total_count(self) -> int:
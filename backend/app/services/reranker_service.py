@@ -6,9 +6,12 @@ Improves relevance by considering query-recipe pairs together
 
 import logging
 from typing import List, Tuple, Optional
-from sentence_transformers import CrossEncoder
 from app.config import settings
 from app.models.recipe import Recipe
+from app.utils.lazy_import import lazy_import
+from app.utils.metrics import STAGE_DURATION
+
+sentence_transformers = lazy_import("sentence_transformers")  # Pulls in torch, imported on first model load
 
 # Setup logger
 logger = logging.getLogger(__name__)
@@ -21,7 +24,7 @@ class RerankerService:
     """
     
     def __init__(self):
-        self.model: Optional[CrossEncoder] = None
+        self.model: Optional["sentence_transformers.CrossEncoder"] = None
         self.model_name = settings.RERANKER_MODEL
         self.batch_size = settings.RERANKER_BATCH_SIZE
         self.enabled = settings.RERANKER_ENABLED
@@ -32,7 +35,7 @@ class RerankerService:
         if not self._model_loaded and self.enabled:
             logger.info(f"Loading reranker model: {self.model_name}...")
             try:
-                self.model = CrossEncoder(self.model_name)
+                self.model = sentence_transformers.CrossEncoder(self.model_name)
                 self._model_loaded = True
                 logger.info(f"Reranker model loaded successfully: {self.model_name}")
             except Exception as e:
@@ -100,7 +103,8 @@ class RerankerService:
         self,
         query: str,
         recipes: List[Recipe],
-        top_k: int = 10
+        top_k: int = 10,
+        fallback: bool = True
     ) -> List[Tuple[Recipe, float]]:
         """
         Re-rank recipes based on query relevance using cross-encoder
@@ -109,12 +113,16 @@ class RerankerService:
             query: Query text (e.g., "Recipe with chicken, pasta, tomato")
             recipes: List of Recipe objects to re-rank
             top_k: Number of top results to return
+            fallback: Return the input order with dummy scores when the model is
+                disabled or fails (False: raise instead)
             
         Returns:
             List of tuples (Recipe, relevance_score) sorted by score (descending)
             Scores are normalized to 0-1 range (higher is better)
         """
         if not self.enabled:
+            if not fallback:
+                raise RuntimeError("Reranker is disabled")
             logger.debug("Reranker is disabled, returning recipes as-is")
             # Return recipes with dummy scores
             return [(recipe, 1.0) for recipe in recipes[:top_k]]
@@ -128,6 +136,8 @@ class RerankerService:
                 self._load_model()
             except Exception as e:
                 logger.error(f"Failed to load reranker model: {e}")
+                if not fallback:
+                    raise
                 # Fallback: return recipes with dummy scores
                 return [(recipe, 1.0) for recipe in recipes[:top_k]]
         
@@ -141,11 +151,12 @@ class RerankerService:
                 pairs.append([query, recipe_text])
             
             # Score pairs using cross-encoder (batch processing)
-            scores = self.model.predict(
-                pairs,
-                batch_size=self.batch_size,
-                show_progress_bar=False
-            )
+            with STAGE_DURATION.time(stage="rerank"):
+                scores = self.model.predict(
+                    pairs,
+                    batch_size=self.batch_size,
+                    show_progress_bar=False
+                )
             
             # Normalize scores to 0-1 range (sigmoid for cross-encoder outputs)
             import numpy as np
@@ -166,6 +177,8 @@ class RerankerService:
             return top_results
             
         except Exception as e:
+            if not fallback:
+                raise
             logger.error(f"Error during reranking: {e}", exc_info=True)
             logger.warning("Falling back to original order with dummy scores")
             # Fallback: return recipes with dummy scores
@@ -175,7 +188,8 @@ class RerankerService:
         self,
         ingredients: List[str],
         recipes: List[Recipe],
-        top_k: int = 10
+        top_k: int = 10,
+        fallback: bool = True
     ) -> List[Tuple[Recipe, float]]:
         """
         Re-rank recipes based on ingredient list
@@ -184,12 +198,30 @@ class RerankerService:
             ingredients: List of ingredient names
             recipes: List of Recipe objects to re-rank
             top_k: Number of top results to return
+            fallback: Return the input order with dummy scores if reranking is unavailable
             
         Returns:
             List of tuples (Recipe, relevance_score) sorted by score (descending)
         """
         query = self._prepare_query_text(ingredients)
-        return self.rerank(query, recipes, top_k)
+        return self.rerank(query, recipes, top_k, fallback)
+    
+    def warm_up(self, recipes: List[Recipe]):
+        """
+        Load the model and score a realistic batch to warm kernels and allocators
+        A failed load disables reranking; warming up retries it if enabled in settings
+        
+        Raises:
+            RuntimeError: If the model cannot be loaded
+        """
+        if not self._model_loaded and settings.RERANKER_ENABLED:
+            self.enabled = True
+        self._load_model()
+        if not self._model_loaded:
+            raise RuntimeError(f"Reranker model '{self.model_name}' is not loaded")
+        query = self._prepare_query_text(["chicken", "garlic", "onion"])
+        pairs = [[query, self._prepare_recipe_text(recipe)] for recipe in recipes]
+        self.model.predict(pairs, batch_size=self.batch_size, show_progress_bar=False)
     
     def get_model_info(self) -> dict:
         """Get information about the reranker model"""
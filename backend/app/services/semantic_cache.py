@@ -0,0 +1,152 @@
+"""
+Semantic Cache Service
+Reuses LLM explanations for near-identical requests
+Keyed on query-embedding similarity (FAISS) and recommended recipe overlap
+"""
+
+import time
+import logging
+import threading
+from typing import List, Optional, Dict, Any
+import numpy as np
+from app.config import settings
+from app.utils.lazy_import import lazy_import
+
+faiss = lazy_import("faiss")
+
+# Setup logger
+logger = logging.getLogger(__name__)
+
+
+class SemanticCache:
+    """
+    Small in-memory FAISS index of past (query embedding, recipe IDs, preferences) → explanation
+    A stored explanation is reused when cosine similarity and recipe-set overlap exceed thresholds
+    """
+
+    def __init__(self):
+        self.enabled = settings.SEMANTIC_CACHE_ENABLED
+        self.similarity_threshold = settings.SEMANTIC_CACHE_SIMILARITY_THRESHOLD
+        self.min_recipe_overlap = settings.SEMANTIC_CACHE_MIN_RECIPE_OVERLAP
+        self.max_entries = settings.SEMANTIC_CACHE_MAX_ENTRIES
+        self.ttl_seconds = settings.SEMANTIC_CACHE_TTL
+        self.dimension = settings.EMBEDDING_DIMENSION
+        self.index: Optional["faiss.Index"] = None
+        self.entries: List[Dict[str, Any]] = []
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def _normalize(self, embedding: np.ndarray) -> np.ndarray:
+        """L2-normalize embedding so inner product equals cosine similarity"""
+        vector = np.asarray(embedding, dtype='float32').reshape(1, -1)
+        norm = np.linalg.norm(vector)
+        return vector / norm if norm > 0 else vector
+
+    def _rebuild_index(self):
+        """Drop expired entries (and oldest ones if full), then rebuild the index"""
+        now = time.time()
+        self.entries = [entry for entry in self.entries if entry["expires_at"] > now]
+        if len(self.entries) >= self.max_entries:
+            self.entries = self.entries[len(self.entries) - self.max_entries // 2:]
+
+        self.index = faiss.IndexFlatIP(self.dimension)
+        if self.entries:
+            self.index.add(np.vstack([entry["embedding"] for entry in self.entries]))
+
+    @staticmethod
+    def _overlap(a: List[str], b: List[str]) -> float:
+        """Jaccard overlap of two recipe ID lists"""
+        set_a, set_b = set(a), set(b)
+        if not set_a and not set_b:
+            return 1.0
+        return len(set_a & set_b) / len(set_a | set_b)
+
+    def lookup(
+        self,
+        query_embedding: np.ndarray,
+        recipe_ids: List[str],
+        preferences_key: str
+    ) -> Optional[str]:
+        """
+        Find a stored explanation for a similar query and recipe set
+
+        Args:
+            query_embedding: Embedding of the ingredient query
+            recipe_ids: IDs of the recipes to be explained
+            preferences_key: Canonical string of dietary preferences/exclusions
+
+        Returns:
+            Cached explanation text or None
+        """
+        if not self.enabled:
+            return None
+
+        with self._lock:
+            if self.index is None or self.index.ntotal == 0:
+                self.misses += 1
+                return None
+
+            k = min(5, self.index.ntotal)
+            similarities, indices = self.index.search(self._normalize(query_embedding), k)
+            now = time.time()
+
+            for similarity, idx in zip(similarities[0], indices[0]):
+                if idx < 0 or similarity < self.similarity_threshold:
+                    break
+                entry = self.entries[idx]
+                if (entry["expires_at"] > now and
+                        entry["preferences_key"] == preferences_key and
+                        self._overlap(entry["recipe_ids"], recipe_ids) >= self.min_recipe_overlap):
+                    self.hits += 1
+                    logger.debug(f"Semantic cache hit (similarity: {similarity:.3f})")
+                    return entry["explanation"]
+
+            self.misses += 1
+            return None
+
+    def store(
+        self,
+        query_embedding: np.ndarray,
+        recipe_ids: List[str],
+        preferences_key: str,
+        explanation: str
+    ):
+        """Store an explanation for later semantic lookups"""
+        if not self.enabled or not explanation:
+            return
+
+        with self._lock:
+            if self.index is None or len(self.entries) >= self.max_entries:
+                self._rebuild_index()
+
+            vector = self._normalize(query_embedding)
+            self.entries.append({
+                "embedding": vector[0],
+                "recipe_ids": list(recipe_ids),
+                "preferences_key": preferences_key,
+                "explanation": explanation,
+                "expires_at": time.time() + self.ttl_seconds
+            })
+            self.index.add(vector)
+
+    def clear(self):
+        """Clear all cached explanations"""
+        with self._lock:
+            self.entries = []
+            self.index = None
+
+    def get_stats(self) -> dict:
+        """Get hit-rate metrics"""
+        lookups = self.hits + self.misses
+        return {
+            "enabled": self.enabled,
+            "entries": len(self.entries),
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0
+        }
+
+
+# Singleton instance
+semantic_cache = SemanticCache()
@@ -0,0 +1,72 @@
+"""
+Service Metrics
+Scrape-time collector exporting counters the services already keep
+(caches, Gemini queue, circuit breaker, model load timings) to the /metrics registry
+"""
+
+import os
+from app.utils.cache import cache
+from app.utils.helpers import get_rss_mb
+from app.utils.lazy_import import get_import_times
+from app.utils.metrics import registry
+from app.services.recipe_service import recipe_service
+from app.services.llm_service import llm_service
+from app.services.semantic_cache import semantic_cache
+from app.services.warmup_service import warmup_service
+
+
+def _bounded_cache_samples(name, bounded_cache, requests, events, entries):
+    stats = bounded_cache.get_stats()
+    entries.append(("", {"cache": name}, stats["size"]))
+    for prefix, counters in stats["prefixes"].items():
+        labels = {"cache": name, "prefix": prefix}
+        requests.append(("", {**labels, "result": "hit"}, counters["hits"]))
+        requests.append(("", {**labels, "result": "miss"}, counters["misses"]))
+        for event in ("evictions", "rejections", "expirations"):
+            events.append(("", {**labels, "event": event}, counters[event]))
+
+
+def collect():
+    """Yield (name, type, help, samples) families for the metrics registry"""
+    requests, events, entries = [], [], []
+    _bounded_cache_samples("result", cache, requests, events, entries)
+    _bounded_cache_samples("llm_fragment", llm_service.fragment_cache, requests, events, entries)
+
+    result_store = recipe_service._result_store
+    if result_store is not None:
+        requests.append(("", {"cache": "result_l2", "prefix": "recipes", "result": "hit"}, result_store.hits))
+        requests.append(("", {"cache": "result_l2", "prefix": "recipes", "result": "miss"}, result_store.misses))
+
+    requests.append(("", {"cache": "semantic", "prefix": "explanation", "result": "hit"}, semantic_cache.hits))
+    requests.append(("", {"cache": "semantic", "prefix": "explanation", "result": "miss"}, semantic_cache.misses))
+    entries.append(("", {"cache": "semantic"}, len(semantic_cache.entries)))
+
+    yield "cache_requests_total", "counter", "Cache lookups by cache and result", requests
+    yield "cache_events_total", "counter", "Cache evictions, admission rejections and expirations", events
+    yield "cache_entries", "gauge", "Entries currently held per cache", entries
+
+    yield "gemini_requests_in_flight", "gauge", "Gemini calls currently running", [("", {}, llm_service._in_flight)]
+    yield "gemini_requests_queued", "gauge", "Callers waiting for a Gemini concurrency slot", [("", {}, llm_service._queued)]
+    breaker_state = llm_service.breaker.get_state()["state"]
+    yield "gemini_circuit_breaker_state", "gauge", "Gemini circuit breaker state (1 = current)", [
+        ("", {"state": state}, 1 if state == breaker_state else 0)
+        for state in ("closed", "open", "half_open")
+    ]
+
+    components = warmup_service.get_status()["components"]
+    yield "model_load_duration_seconds", "gauge", "Warm-up load time per component", [
+        ("", {"component": name}, info["duration_ms"] / 1000)
+        for name, info in components.items()
+        if "duration_ms" in info
+    ]
+    yield "lazy_import_duration_seconds", "gauge", "Import time of lazily imported dependencies", [
+        ("", {"module": module}, duration_ms / 1000)
+        for module, duration_ms in get_import_times().items()
+    ]
+    # Each scrape is answered by one worker; the pid tells the samples of different workers apart
+    yield "process_resident_memory_bytes", "gauge", "Resident memory of this worker process", [
+        ("", {"pid": os.getpid()}, int(get_rss_mb() * 1024 * 1024))
+    ]
+
+
+registry.register_collector(collect)
@@ -0,0 +1,214 @@
+"""
+Warm-up Service
+Loads all models in a background thread at startup and runs dummy inference
+Tracks per-component load timings and readiness (served by /ready)
+Failed components are retried in the background with exponential backoff
+"""
+
+import time
+import logging
+import threading
+from typing import Callable, Dict, Optional
+from app.config import settings
+from app.services.recipe_service import recipe_service
+from app.services.faiss_service import faiss_service
+from app.services.embedding_service import embedding_service
+from app.services.reranker_service import reranker_service
+from app.services.llm_service import llm_service
+from app.services.ingredient_service import ingredient_suggest_service
+from app.utils.lazy_import import get_import_times
+
+# Setup logger
+logger = logging.getLogger(__name__)
+
+WARMUP_INGREDIENTS = ["chicken", "garlic", "onion", "tomato", "pasta"]
+
+
+class WarmupService:
+    """
+    Background warm-up of recipes, embedding model, FAISS index, reranker and Gemini client
+    
+    The service is ready once every required component is warm or skipped (disabled /
+    not configured). The pipeline runs without the reranker (FAISS order) and the
+    generator (no explanations), so their failures mark the replica "degraded"
+    instead of unready. Failed components are retried after WARMUP_RETRY_BASE_DELAY
+    seconds, doubling up to WARMUP_RETRY_MAX_DELAY, until they load.
+    """
+    
+    COMPONENTS = ("recipes", "embedding", "retriever", "reranker", "generator")
+    OPTIONAL_COMPONENTS = ("reranker", "generator")
+    
+    def __init__(self):
+        self.enabled = settings.WARMUP_ENABLED
+        self.batch_size = settings.WARMUP_BATCH_SIZE
+        self.retry_base_delay = settings.WARMUP_RETRY_BASE_DELAY
+        self.retry_max_delay = settings.WARMUP_RETRY_MAX_DELAY
+        self._components: Dict[str, dict] = {name: {"status": "pending"} for name in self.COMPONENTS}
+        self._lock = threading.Lock()
+        self._thread: Optional[threading.Thread] = None
+        self._duration_ms: Optional[float] = None
+        self._stop = threading.Event()
+    
+    def start(self):
+        """Start the background warm-up (once)"""
+        with self._lock:
+            if self._thread is not None:
+                return
+            self._thread = threading.Thread(target=self.run, name="warmup", daemon=True)
+            self._thread.start()
+    
+    def stop(self):
+        """Stop retrying failed components"""
+        self._stop.set()
+    
+    def preload(self):
+        """
+        Load recipes, FAISS index and models without running inference or starting threads
+        Used by the pre-fork master so workers share the loaded pages copy-on-write;
+        each worker still runs the full warm-up (dummy inference) after fork
+        """
+        started = time.perf_counter()
+        steps = [
+            ("recipes", recipe_service.get_total_count),
+            ("ingredients", ingredient_suggest_service.build),
+            ("retriever", lambda: faiss_service.is_loaded() or faiss_service.load_index()),
+            ("embedding", embedding_service._load_model),
+            ("reranker", lambda: reranker_service.enabled and reranker_service._load_model())
+        ]
+        for name, load in steps:
+            try:
+                load()
+            except Exception as e:
+                logger.error(f"Preload of {name} failed: {e}", exc_info=True)
+        logger.info(f"📦 Preloaded recipes, index and models in {(time.perf_counter() - started) * 1000:.1f}ms")
+    
+    def _steps(self) -> Dict[str, Callable[[], Optional[str]]]:
+        return {
+            "recipes": self._warm_recipes,
+            "embedding": self._warm_embedding,
+            "retriever": self._warm_retriever,
+            "reranker": self._warm_reranker,
+            "generator": self._warm_generator
+        }
+    
+    def run(self):
+        """Warm up all components in order, recording per-component timings, then retry failures"""
+        started = time.perf_counter()
+        steps = self._steps()
+        for name, warm in steps.items():
+            self._step(name, warm)
+        self._duration_ms = round((time.perf_counter() - started) * 1000, 1)
+        
+        timings = ", ".join(
+            f"{name}={info.get('duration_ms', 0)}ms ({info['status']})"
+            for name, info in self._components.items()
+        )
+        logger.info(f"🔥 Warm-up finished in {self._duration_ms}ms: {timings}")
+        logger.info(f"⏱️  Lazy imports: {get_import_times()}")
+        
+        delay = self.retry_base_delay
+        while True:
+            failed = [name for name in steps if self._components[name]["status"] in ("failed", "degraded")]
+            if not failed or self._stop.wait(delay):
+                return
+            logger.info(f"🔁 Retrying warm-up of {', '.join(failed)}")
+            # Retry in component order so the retriever sees a freshly loaded embedding model
+            for name in failed:
+                self._step(name, steps[name])
+            delay = min(delay * 2, self.retry_max_delay)
+    
+    def _step(self, name: str, warm: Callable[[], Optional[str]]):
+        """Run one warm-up step; the step returns a skip reason or None"""
+        previous = self._components[name]
+        attempt = previous.get("attempts", 0) + 1
+        # A degraded optional component keeps the replica ready while it is retried
+        self._set(name, status="retrying" if previous["status"] == "degraded" else "loading", attempts=attempt)
+        started = time.perf_counter()
+        try:
+            skip_reason = warm()
+            status = {"status": "skipped", "reason": skip_reason} if skip_reason else {"status": "ready"}
+            if attempt > 1:
+                logger.info(f"✅ Warm-up of {name} succeeded on attempt {attempt}")
+        except Exception as e:
+            logger.error(f"Warm-up of {name} failed (attempt {attempt}): {e}", exc_info=True)
+            failed = "degraded" if name in self.OPTIONAL_COMPONENTS else "failed"
+            status = {"status": failed, "error": str(e)}
+        self._set(name, **status, attempts=attempt, duration_ms=round((time.perf_counter() - started) * 1000, 1))
+    
+    def _set(self, name: str, **info):
+        with self._lock:
+            self._components[name] = info
+    
+    def _warm_recipes(self) -> Optional[str]:
+        if recipe_service.get_total_count() == 0:
+            # A failed load leaves an empty corpus; load it again on every retry
+            if recipe_service.reload() == 0:
+                raise RuntimeError("No recipes loaded")
+            ingredient_suggest_service.build(force=True)
+        ingredient_suggest_service.build()
+        return None
+    
+    def _sample_recipes(self):
+        return recipe_service.get_many(range(self.batch_size))
+    
+    def _warm_embedding(self) -> Optional[str]:
+        texts = [faiss_service.build_ingredient_query(WARMUP_INGREDIENTS)]
+        texts += [recipe.Title for recipe in self._sample_recipes()]
+        embedding_service.warm_up(texts)
+        return None
+    
+    def _warm_retriever(self) -> Optional[str]:
+        if not faiss_service.is_loaded() and not faiss_service.load_index():
+            return "FAISS index not available"
+        query_embedding = embedding_service.encode_text(faiss_service.build_ingredient_query(WARMUP_INGREDIENTS))
+        faiss_service.search(query_embedding, k=min(self.batch_size, faiss_service.index.ntotal))
+        return None
+    
+    def _warm_reranker(self) -> Optional[str]:
+        if not settings.RERANKER_ENABLED:
+            return "disabled"
+        reranker_service.warm_up(self._sample_recipes())
+        return None
+    
+    def _warm_generator(self) -> Optional[str]:
+        if not llm_service.enabled:
+            return "disabled"
+        if not llm_service.api_key:
+            return "GEMINI_API_KEY not set"
+        llm_service.warm_up()
+        return None
+    
+    def is_ready(self) -> bool:
+        """
+        True once every required component is warm or skipped and every optional one
+        has been tried (always True when warm-up is disabled)
+        """
+        if not self.enabled:
+            return True
+        with self._lock:
+            return all(
+                info["status"] in ("ready", "skipped")
+                or (name in self.OPTIONAL_COMPONENTS and info["status"] in ("degraded", "retrying"))
+                for name, info in self._components.items()
+            )
+    
+    def is_degraded(self) -> bool:
+        """True while an optional component (reranker, generator) failed to load"""
+        with self._lock:
+            return any(self._components[name]["status"] in ("degraded", "retrying") for name in self.OPTIONAL_COMPONENTS)
+    
+    def get_status(self) -> dict:
+        """Readiness, degradation and per-component status/timings"""
+        with self._lock:
+            components = {name: dict(info) for name, info in self._components.items()}
+        return {
+            "ready": self.is_ready(),
+            "degraded": self.is_degraded(),
+            "warmup_enabled": self.enabled,
+            "duration_ms": self._duration_ms,
+            "components": components
+        }
+
+
+# Singleton instance
+warmup_service = WarmupService()
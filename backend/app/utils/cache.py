@@ -1,53 +1,171 @@
 """
-Basit memory cache implementasyonu
-Redis olmadan hafif cache çözümü
+Sınırlı (bounded) ve thread-safe memory cache implementasyonu
+Redis olmadan hafif cache çözümü: LRU eviction + TinyLFU admission + arka planda TTL temizliği
 """
-from typing import Any, Optional
-from datetime import datetime, timedelta
+from typing import Any, Optional, Dict
+from collections import OrderedDict, defaultdict
+from array import array
+import threading
 import hashlib
+import time
 import json
+from app.config import settings
 
 
-class SimpleCache:
-    def __init__(self):
-        self._cache = {}
-        self._expiry = {}
-    
+# Byte translation table halving every counter (aging in C, not per element in Python)
+_HALVE = bytes(i >> 1 for i in range(256))
+
+
+class FrequencySketch:
+    """Count-min sketch with 4-bit counters and periodic aging (TinyLFU)"""
+
+    _SEEDS = (0x9E3779B1, 0x85EBCA77, 0xC2B2AE3D, 0x27D4EB2F)
+
+    def __init__(self, max_size: int):
+        width = 1
+        while width < max(16, 2 * max_size):
+            width <<= 1
+        self._mask = width - 1
+        self._rows = [array('B', bytes(width)) for _ in self._SEEDS]
+        self._sample_size = 10 * max(16, max_size)
+        self._additions = 0
+
+    def _indexes(self, key: str):
+        h = hash(key) & 0xFFFFFFFFFFFFFFFF
+        for row, seed in zip(self._rows, self._SEEDS):
+            yield row, ((h * seed) >> 32) & self._mask
+
+    def increment(self, key: str):
+        for row, index in self._indexes(key):
+            if row[index] < 15:
+                row[index] += 1
+        self._additions += 1
+        if self._additions >= self._sample_size:
+            # Age counters so old popularity fades out
+            for row in self._rows:
+                row[:] = array('B', bytes(row).translate(_HALVE))
+            self._additions //= 2
+
+    def estimate(self, key: str) -> int:
+        return min(row[index] for row, index in self._indexes(key))
+
+
+class BoundedCache:
+    def __init__(self, max_size: int = 10000, sweep_interval: float = 60.0):
+        self.max_size = max_size
+        self.sweep_interval = sweep_interval
+        self._cache: "OrderedDict[str, tuple]" = OrderedDict()  # key -> (value, expires_at)
+        self._sketch = FrequencySketch(max_size)
+        self._lock = threading.Lock()
+        self._stats: Dict[str, Dict[str, int]] = defaultdict(
+            lambda: {"hits": 0, "misses": 0, "evictions": 0, "rejections": 0, "expirations": 0}
+        )
+        self._sweeper: Optional[threading.Thread] = None
+
     def _generate_key(self, prefix: str, data: Any) -> str:
         """Generate cache key from data"""
         data_str = json.dumps(data, sort_keys=True)
         hash_key = hashlib.md5(data_str.encode()).hexdigest()
         return f"{prefix}:{hash_key}"
-    
+
+    @staticmethod
+    def _prefix(key: str) -> str:
+        return key.split(":", 1)[0]
+
     def get(self, key: str) -> Optional[Any]:
         """Get value from cache if not expired"""
-        if key not in self._cache:
-            return None
-        
-        # Check expiry
-        if key in self._expiry and datetime.now() > self._expiry[key]:
-            # Expired, remove from cache
-            del self._cache[key]
-            del self._expiry[key]
-            return None
-        
-        return self._cache[key]
-    
+        with self._lock:
+            self._sketch.increment(key)
+            entry = self._cache.get(key)
+            stats = self._stats[self._prefix(key)]
+
+            if entry is None:
+                stats["misses"] += 1
+                return None
+
+            # Check expiry
+            if time.monotonic() > entry[1]:
+                # Expired, remove from cache
+                del self._cache[key]
+                stats["expirations"] += 1
+                stats["misses"] += 1
+                return None
+
+            self._cache.move_to_end(key)
+            stats["hits"] += 1
+            return entry[0]
+
     def set(self, key: str, value: Any, ttl_seconds: int = 300):
         """Set value in cache with TTL (default 5 minutes)"""
-        self._cache[key] = value
-        self._expiry[key] = datetime.now() + timedelta(seconds=ttl_seconds)
-    
+        expires_at = time.monotonic() + ttl_seconds
+        with self._lock:
+            self._sketch.increment(key)
+
+            if key in self._cache:
+                self._cache[key] = (value, expires_at)
+                self._cache.move_to_end(key)
+                return
+
+            if len(self._cache) >= self.max_size:
+                # TinyLFU admission: only replace the LRU victim with a key that is used more often
+                victim = next(iter(self._cache))
+                if self._sketch.estimate(key) <= self._sketch.estimate(victim):
+                    self._stats[self._prefix(key)]["rejections"] += 1
+                    return
+                del self._cache[victim]
+                self._stats[self._prefix(victim)]["evictions"] += 1
+
+            self._cache[key] = (value, expires_at)
+
+        self._start_sweeper()
+
+    def sweep(self) -> int:
+        """Remove all expired entries, returns the number of removed entries"""
+        now = time.monotonic()
+        with self._lock:
+            expired = [key for key, (_, expires_at) in self._cache.items() if expires_at < now]
+            for key in expired:
+                del self._cache[key]
+                self._stats[self._prefix(key)]["expirations"] += 1
+        return len(expired)
+
+    def _start_sweeper(self):
+        """Start the background TTL sweeper thread (once)"""
+        if self._sweeper is not None:
+            return
+        with self._lock:
+            if self._sweeper is not None:
+                return
+
+            def _run():
+                while True:
+                    time.sleep(self.sweep_interval)
+                    self.sweep()
+
+            self._sweeper = threading.Thread(target=_run, name="cache-sweeper", daemon=True)
+            self._sweeper.start()
+
     def clear(self):
         """Clear all cache"""
-        self._cache.clear()
-        self._expiry.clear()
-    
+        with self._lock:
+            self._cache.clear()
+
     def size(self) -> int:
         """Get cache size"""
         return len(self._cache)
 
+    def get_stats(self) -> dict:
+        """Get size and per-prefix hit/miss/eviction counters"""
+        with self._lock:
+            return {
+                "size": len(self._cache),
+                "max_size": self.max_size,
+                "prefixes": {prefix: dict(counters) for prefix, counters in self._stats.items()}
+            }
 
-# Global cache instance
-cache = SimpleCache()
 
+# Global cache instance
+cache = BoundedCache(
+    max_size=settings.RESULT_CACHE_MAX_SIZE,
+    sweep_interval=settings.RESULT_CACHE_SWEEP_INTERVAL
+)
@@ -0,0 +1,154 @@
+"""
+Memory-mapped columnar string store
+Her kolon için offset dizisi (uint64) + UTF-8 blob; dosya mmap ile milisaniyeler içinde açılır
+
+Layout:
+    header:  MAGIC | version (u32) | num_rows (u32) | num_columns (u32)
+             | metadata_pos (u64) | metadata_len (u64)   (version 2+)
+    columns: name (32 bytes, utf-8, zero padded) | offsets_pos (u64) | blob_pos (u64) | blob_len (u64)
+    data:    per column: (num_rows + 1) uint64 offsets, then the UTF-8 blob
+    metadata: JSON object of strings (e.g. the vocabulary fingerprint of derived columns)
+"""
+from typing import Dict, List, Iterator, Optional, Union
+from pathlib import Path
+from array import array
+import mmap
+import json
+import struct
+import zlib
+
+MAGIC = b"RCPSTORE"
+FORMAT_VERSION = 2
+_HEADER = struct.Struct("<8sIII")
+_METADATA = struct.Struct("<QQ")  # Version 2+: metadata position and length
+_COLUMN = struct.Struct("<32sQQQ")
+
+
+def write_columnar_store(
+    path: Path,
+    columns: Dict[str, List[Union[str, bytes]]],
+    metadata: Optional[Dict[str, str]] = None
+):
+    """Write equally long string (or raw bytes) columns and optional metadata to a columnar store file"""
+    num_rows = len(next(iter(columns.values()))) if columns else 0
+    if any(len(values) != num_rows for values in columns.values()):
+        raise ValueError("All columns must have the same number of rows")
+
+    encoded = {}
+    for name, values in columns.items():
+        offsets = array("Q", [0])
+        blobs = []
+        for value in values:
+            data = value if isinstance(value, bytes) else (value or "").encode("utf-8")
+            blobs.append(data)
+            offsets.append(offsets[-1] + len(data))
+        encoded[name] = (offsets, b"".join(blobs))
+
+    position = _HEADER.size + _METADATA.size + _COLUMN.size * len(columns)
+    position += -position % 8
+    table = []
+    for name, (offsets, blob) in encoded.items():
+        offsets_pos = position
+        blob_pos = offsets_pos + offsets.itemsize * len(offsets)
+        table.append(_COLUMN.pack(name.encode("utf-8"), offsets_pos, blob_pos, len(blob)))
+        position = blob_pos + len(blob)
+        position += -position % 8  # keep offset arrays 8-byte aligned
+    metadata_bytes = json.dumps(metadata or {}, sort_keys=True).encode("utf-8")
+
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = path.with_suffix(path.suffix + ".tmp")
+    with open(tmp_path, "wb") as f:
+        f.write(_HEADER.pack(MAGIC, FORMAT_VERSION, num_rows, len(columns)))
+        f.write(_METADATA.pack(position, len(metadata_bytes)))
+        for entry in table:
+            f.write(entry)
+        f.write(b"\0" * (-f.tell() % 8))
+        for offsets, blob in encoded.values():
+            f.write(offsets.tobytes())
+            f.write(blob)
+            f.write(b"\0" * (-f.tell() % 8))
+        f.write(metadata_bytes)
+    tmp_path.replace(path)
+
+
+class ColumnarStore:
+    """Read-only, memory-mapped view of a columnar store file"""
+
+    def __init__(self, path: Path):
+        self.path = path
+        self._file = open(path, "rb")
+        self._mmap = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        view = memoryview(self._mmap)
+
+        magic, version, self.num_rows, num_columns = _HEADER.unpack_from(view, 0)
+        if magic != MAGIC or not 1 <= version <= FORMAT_VERSION:
+            raise ValueError(f"Not a supported columnar store file: {path}")
+
+        table_pos = _HEADER.size
+        self.metadata: Dict[str, str] = {}
+        if version >= 2:
+            metadata_pos, metadata_len = _METADATA.unpack_from(view, _HEADER.size)
+            self.metadata = json.loads(bytes(view[metadata_pos:metadata_pos + metadata_len]))
+            table_pos += _METADATA.size
+
+        self._columns = {}
+        for i in range(num_columns):
+            raw_name, offsets_pos, blob_pos, blob_len = _COLUMN.unpack_from(view, table_pos + i * _COLUMN.size)
+            name = raw_name.rstrip(b"\0").decode("utf-8")
+            # Zero-copy views into the mapped file
+            offsets = view[offsets_pos:offsets_pos + 8 * (self.num_rows + 1)].cast("Q")
+            blob = view[blob_pos:blob_pos + blob_len]
+            self._columns[name] = (offsets, blob)
+
+    @property
+    def columns(self) -> List[str]:
+        return list(self._columns)
+
+    def __len__(self) -> int:
+        return self.num_rows
+
+    def get_bytes(self, column: str, row: int) -> memoryview:
+        """Raw UTF-8 bytes of one cell (zero-copy)"""
+        offsets, blob = self._columns[column]
+        return blob[offsets[row]:offsets[row + 1]]
+
+    def get(self, column: str, row: int) -> str:
+        """Decoded string value of one cell"""
+        return str(self.get_bytes(column, row), "utf-8")
+
+    def iter_column(self, column: str) -> Iterator[str]:
+        """Iterate over all decoded values of a column"""
+        for row in range(self.num_rows):
+            yield self.get(column, row)
+
+    def column_bytes(self, column: str) -> List[bytes]:
+        """All raw values of a column (bulk read, faster than per-row access)"""
+        offsets, blob = self._columns[column]
+        data = bytes(blob)
+        bounds = offsets.tolist()
+        return [data[start:end] for start, end in zip(bounds, bounds[1:])]
+
+    def column_values(self, column: str) -> List[str]:
+        """All decoded values of a column (bulk read)"""
+        return [value.decode("utf-8") for value in self.column_bytes(column)]
+
+
+class InMemoryTextColumns:
+    """
+    In-memory text columns with the same get(column, row) interface as ColumnarStore
+    Values are optionally zlib-compressed and only decoded on access
+    """
+
+    def __init__(self, columns: Dict[str, List[str]], compress: bool = True):
+        self.compress = compress
+        self._columns = {
+            name: [self._encode(value or "") for value in values]
+            for name, values in columns.items()
+        }
+
+    def _encode(self, value: str) -> Union[str, bytes]:
+        return zlib.compress(value.encode("utf-8")) if self.compress else value
+
+    def get(self, column: str, row: int) -> str:
+        value = self._columns[column][row]
+        return zlib.decompress(value).decode("utf-8") if self.compress else value
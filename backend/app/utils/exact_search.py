@@ -0,0 +1,84 @@
+"""
+Saf NumPy ile tam (exact) kNN araması
+FAISS index'i yüklenemediğinde recipe_embeddings.npy üzerinde aynı sonuçları üretir
+Matris memory-map ile açılır; bloklar halinde matris-vektör çarpımı ve argpartition ile top-k seçilir
+"""
+from typing import Optional, Tuple
+from pathlib import Path
+import numpy as np
+
+
+class ExactSearchIndex:
+    """
+    Exact kNN over an (n, d) embedding matrix with a FAISS flat index interface
+    (ntotal, d, search(queries, k) -> (distances, indices) of shape (num_queries, k))
+
+    metric "L2" returns squared L2 distances (ascending, as IndexFlatL2), "IP" inner
+    products (descending, as IndexFlatIP). With dtype float16 the matrix is kept in
+    memory at half size and each block is widened to float32 for the product.
+    """
+
+    def __init__(self, embeddings: np.ndarray, metric: str = "L2", dtype: str = "float32", block_rows: int = 16384):
+        if embeddings.ndim != 2:
+            raise ValueError(f"Expected an (n, d) embedding matrix, got shape {embeddings.shape}")
+        if dtype == "float16":
+            embeddings = embeddings.astype(np.float16)
+        self.embeddings = embeddings
+        self.metric = metric.upper()
+        self.block_rows = max(1, block_rows)
+        self.ntotal, self.d = embeddings.shape
+        self._norms: Optional[np.ndarray] = None
+        if self.metric == "L2":
+            self._norms = np.empty(self.ntotal, dtype=np.float32)
+            for start, block in self._blocks():
+                self._norms[start:start + len(block)] = np.einsum("ij,ij->i", block, block)
+
+    @classmethod
+    def from_file(cls, path: Path, **kwargs) -> "ExactSearchIndex":
+        """Memory-map a .npy embedding matrix (pages are shared by all processes reading the file)"""
+        return cls(np.load(path, mmap_mode="r"), **kwargs)
+
+    def _blocks(self):
+        for start in range(0, self.ntotal, self.block_rows):
+            block = self.embeddings[start:start + self.block_rows]
+            yield start, block if block.dtype == np.float32 else block.astype(np.float32)
+
+    def search(self, queries: np.ndarray, k: int) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Exact top-k for a batch of queries
+
+        Args:
+            queries: Query matrix of shape (num_queries, d)
+            k: Number of neighbours per query (capped at ntotal)
+
+        Returns:
+            Tuple of (distances, indices), each of shape (num_queries, k), best first
+        """
+        queries = np.ascontiguousarray(queries, dtype=np.float32).reshape(-1, self.d)
+        k = min(k, self.ntotal)
+        query_norms = np.einsum("ij,ij->i", queries, queries)[:, None] if self._norms is not None else None
+
+        # Running top-k per query; scores are "lower is better" (negated inner products for IP)
+        best_scores = np.empty((len(queries), 0), dtype=np.float32)
+        best_ids = np.empty((len(queries), 0), dtype=np.int64)
+        for start, block in self._blocks():
+            products = queries @ block.T
+            if query_norms is not None:
+                scores = query_norms - 2.0 * products + self._norms[start:start + len(block)]
+            else:
+                scores = -products
+            block_k = min(k, scores.shape[1])
+            candidates = np.argpartition(scores, block_k - 1, axis=1)[:, :block_k]
+            best_scores = np.concatenate([best_scores, np.take_along_axis(scores, candidates, axis=1)], axis=1)
+            best_ids = np.concatenate([best_ids, candidates + start], axis=1)
+            if best_scores.shape[1] > k:
+                keep = np.argpartition(best_scores, k - 1, axis=1)[:, :k]
+                best_scores = np.take_along_axis(best_scores, keep, axis=1)
+                best_ids = np.take_along_axis(best_ids, keep, axis=1)
+
+        order = np.argsort(best_scores, axis=1, kind="stable")
+        best_scores = np.take_along_axis(best_scores, order, axis=1)
+        best_ids = np.take_along_axis(best_ids, order, axis=1)
+        if query_norms is not None:
+            return np.maximum(best_scores, 0.0), best_ids
+        return -best_scores, best_ids
@@ -0,0 +1,103 @@
+"""
+SQLite (WAL) tabanlı buzdolabı deposu
+Buzdolabı malzemelerini ve her buzdolabı için materyalize edilmiş öneri durumunu saklar
+Bağlantılar thread başına bir kez açılıp yeniden kullanılır; tüm worker'lar aynı dosyayı paylaşır
+"""
+from typing import Any, Iterator, List, Optional
+from contextlib import contextmanager
+from pathlib import Path
+import threading
+import sqlite3
+import time
+import json
+import zlib
+
+
+class FridgeStore:
+    def __init__(self, path: Path):
+        self.path = path
+        self._local = threading.local()
+
+    def _connection(self) -> sqlite3.Connection:
+        """One connection per thread (sqlite3 connections are not thread-safe), reused across requests"""
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            conn = sqlite3.connect(str(self.path), timeout=5.0, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS fridge_ingredients ("
+                "fridge_id TEXT NOT NULL, name TEXT NOT NULL, added_at REAL NOT NULL, "
+                "PRIMARY KEY (fridge_id, name))"
+            )
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS fridge_recommendations ("
+                "fridge_id TEXT PRIMARY KEY, version TEXT NOT NULL, state BLOB NOT NULL, updated_at REAL NOT NULL)"
+            )
+            self._local.conn = conn
+        return conn
+
+    @contextmanager
+    def transaction(self) -> Iterator[sqlite3.Connection]:
+        """
+        Write transaction (BEGIN IMMEDIATE): read-modify-write of a fridge is atomic
+        across threads and worker processes
+        """
+        conn = self._connection()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            yield conn
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+        conn.execute("COMMIT")
+
+    def get_ingredients(self, fridge_id: str) -> List[str]:
+        """Ingredients in the order they were added"""
+        rows = self._connection().execute(
+            "SELECT name FROM fridge_ingredients WHERE fridge_id = ? ORDER BY added_at, rowid",
+            (fridge_id,)
+        ).fetchall()
+        return [row[0] for row in rows]
+
+    def add_ingredient(self, fridge_id: str, name: str) -> bool:
+        """Add an ingredient; False if it was already in the fridge"""
+        cursor = self._connection().execute(
+            "INSERT OR IGNORE INTO fridge_ingredients (fridge_id, name, added_at) VALUES (?, ?, ?)",
+            (fridge_id, name, time.time())
+        )
+        return cursor.rowcount > 0
+
+    def remove_ingredient(self, fridge_id: str, name: str) -> bool:
+        """Remove an ingredient; False if it was not in the fridge"""
+        cursor = self._connection().execute(
+            "DELETE FROM fridge_ingredients WHERE fridge_id = ? AND name = ?",
+            (fridge_id, name)
+        )
+        return cursor.rowcount > 0
+
+    def replace_ingredients(self, fridge_id: str, names: List[str]):
+        """Replace the fridge contents (order is kept)"""
+        conn = self._connection()
+        conn.execute("DELETE FROM fridge_ingredients WHERE fridge_id = ?", (fridge_id,))
+        now = time.time()
+        conn.executemany(
+            "INSERT OR IGNORE INTO fridge_ingredients (fridge_id, name, added_at) VALUES (?, ?, ?)",
+            [(fridge_id, name, now) for name in names]
+        )
+
+    def get_state(self, fridge_id: str, version: str) -> Optional[Any]:
+        """Materialized recommendation state, None if missing or written for another data version"""
+        row = self._connection().execute(
+            "SELECT state FROM fridge_recommendations WHERE fridge_id = ? AND version = ?",
+            (fridge_id, version)
+        ).fetchone()
+        return json.loads(zlib.decompress(row[0])) if row else None
+
+    def set_state(self, fridge_id: str, version: str, state: Any):
+        """Store the materialized recommendation state (JSON-serializable)"""
+        self._connection().execute(
+            "INSERT OR REPLACE INTO fridge_recommendations (fridge_id, version, state, updated_at) VALUES (?, ?, ?, ?)",
+            (fridge_id, version, zlib.compress(json.dumps(state, separators=(",", ":")).encode()), time.time())
+        )
@@ -1,5 +1,22 @@
+import ast
+import base64
+import hashlib
+import hmac
 import json
-from typing import List, Dict
+import os
+import re
+import resource
+from typing import List, Dict, Optional, Tuple
+
+# Parenthetical notes such as "(about 3 lb. total)"
+_PARENTHESES_PATTERN = re.compile(r"\([^)]*\)")
+
+# Leading quantities/units such as "2¾ tsp.", "1/2 cup"
+_QUANTITY_PATTERN = re.compile(
+    r"^[\d\s/½¼¾⅓⅔⅛.,–\-]*"
+    r"(?:(?:cups?|tbsp|tsp|oz|lb|lbs|g|kg|ml|l|pounds?|ounces?|tablespoons?|teaspoons?|cloves?|large|medium|small)\.?\s+)*",
+    re.IGNORECASE
+)
 
 
 def parse_ingredient_list(ingredients_str: str) -> List[str]:
@@ -30,3 +47,70 @@ def get_recipe_image_url(image_name: str) -> str:
     """
     return f"images/recipies/{image_name}.jpg"
 
+
+
+def split_ingredient_items(ingredients_str: str) -> List[str]:
+    """
+    Split a stringified ingredient list into items (tolerates quotes inside items)
+    """
+    try:
+        return [str(item) for item in ast.literal_eval(ingredients_str)]
+    except (ValueError, SyntaxError):
+        return [item.strip("' ") for item in ingredients_str.strip("[]").split("', '")]
+
+
+def short_ingredient_name(item: str, max_length: int = 30) -> str:
+    """
+    Strip leading quantities/units and trailing notes from an ingredient line
+    """
+    name = _PARENTHESES_PATTERN.sub('', item)
+    name = _QUANTITY_PATTERN.sub('', name.strip()).split(',')[0].strip()
+    return (name or item)[:max_length]
+
+
+def build_recipe_summary(title: str, cleaned_ingredients: str, instructions: str = "") -> str:
+    """
+    Compact one-line recipe summary for LLM prompts
+    Format: "Title | ingredients: a, b, c | first step"
+    """
+    names = [short_ingredient_name(item) for item in split_ingredient_items(cleaned_ingredients)]
+    summary = f"{title} | ingredients: {', '.join(names[:10])}"
+    if instructions:
+        first_step = instructions.strip().split('. ')[0][:100]
+        summary += f" | {first_step}"
+    return summary
+
+
+def get_rss_mb() -> float:
+    """
+    Current resident set size of this process in MB
+    """
+    try:
+        with open('/proc/self/statm') as f:
+            return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE') / (1024 * 1024)
+    except (OSError, ValueError, IndexError):
+        # Non-Linux: fall back to peak RSS (KB on Linux, bytes on macOS)
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def _cursor_signature(payload: str, secret: bytes) -> str:
+    return hmac.new(secret, payload.encode(), hashlib.sha256).hexdigest()[:32]
+
+
+def encode_cursor(handle: str, offset: int, secret: bytes) -> str:
+    """Opaque pagination cursor: result set handle and offset, HMAC-signed so clients cannot forge one"""
+    payload = base64.urlsafe_b64encode(f"{handle}:{offset}".encode()).decode().rstrip("=")
+    return f"{payload}.{_cursor_signature(payload, secret)}"
+
+
+def decode_cursor(cursor: str, secret: bytes) -> Optional[Tuple[str, int]]:
+    """Verify and decode a pagination cursor, returns (handle, offset) or None if malformed or forged"""
+    payload, _, signature = cursor.partition(".")
+    if not hmac.compare_digest(signature, _cursor_signature(payload, secret)):
+        return None
+    try:
+        handle, offset = base64.urlsafe_b64decode(payload + "=" * (-len(payload) % 4)).decode().split(":")
+        offset = int(offset)
+    except (ValueError, UnicodeDecodeError):
+        return None
+    return (handle, offset) if handle and offset >= 0 else None
@@ -0,0 +1,44 @@
+"""
+Önceden serileştirilmiş JSON parçaları (fragment) ile hızlı response üretimi
+Statik tarif alanları bir kez serileştirilir; response'lar pydantic modeli kurulmadan byte birleştirme ile oluşturulur
+"""
+from typing import Any, Iterable, List, Tuple, Union
+import json
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - optional speedup
+    orjson = None
+
+Fragment = Union[bytes, memoryview]
+
+
+def dumps(value: Any) -> bytes:
+    """Compact UTF-8 JSON (same output as FastAPI's JSONResponse)"""
+    if orjson is not None:
+        return orjson.dumps(value)
+    return json.dumps(value, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+
+def object_fragment(fields: dict) -> bytes:
+    """Serialize a dict as an unterminated JSON object ('{"a":1,"b":2') so fields can be appended"""
+    return dumps(fields)[:-1]
+
+
+def recipe_with_match(fragment: Fragment, matching_ingredients: List[str]) -> bytes:
+    """RecipeWithMatch JSON from a pre-serialized recipe fragment"""
+    return b"".join((
+        fragment,
+        b',"matchingCount":', str(len(matching_ingredients)).encode(),
+        b',"matchingIngredients":', dumps(matching_ingredients),
+        b"}"
+    ))
+
+
+def json_array(items: Iterable[bytes]) -> bytes:
+    return b"[" + b",".join(items) + b"]"
+
+
+def json_object(fields: Iterable[Tuple[str, bytes]]) -> bytes:
+    """JSON object from already serialized values"""
+    return b"{" + b",".join(dumps(name) + b":" + value for name, value in fields) + b"}"
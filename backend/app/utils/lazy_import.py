@@ -0,0 +1,43 @@
+"""
+Ağır bağımlılıklar (faiss, sentence_transformers/torch, httpx) için lazy import
+Modül ilk attribute erişiminde yüklenir; import süreleri startup profilinde raporlanır
+"""
+from typing import Dict
+import importlib
+import threading
+import types
+import time
+
+_import_times: Dict[str, float] = {}
+_lock = threading.Lock()
+
+
+class LazyModule(types.ModuleType):
+    """Module proxy that imports the real module on first attribute access"""
+
+    def __init__(self, name: str):
+        super().__init__(name)
+        self._module = None
+
+    def _load(self) -> types.ModuleType:
+        if self._module is None:
+            with _lock:
+                if self._module is None:
+                    started = time.perf_counter()
+                    module = importlib.import_module(self.__name__)
+                    _import_times[self.__name__] = round((time.perf_counter() - started) * 1000, 1)
+                    self._module = module
+        return self._module
+
+    def __getattr__(self, attr: str):
+        return getattr(self._load(), attr)
+
+
+def lazy_import(name: str) -> LazyModule:
+    """Deferred `import name`; the module is imported on first use"""
+    return LazyModule(name)
+
+
+def get_import_times() -> Dict[str, float]:
+    """Import duration (ms) of each lazily imported module that has been loaded so far"""
+    return dict(_import_times)
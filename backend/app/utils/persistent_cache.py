@@ -0,0 +1,118 @@
+"""
+SQLite (WAL) tabanlı kalıcı cache implementasyonu
+Aynı makinedeki tüm worker'lar arasında paylaşılan ikinci seviye (L2) cache
+Değerler sıkıştırılmış JSON olarak saklanır, veri/index versiyonuna göre ayrılır
+"""
+from typing import Any, Optional, Iterable
+from pathlib import Path
+import threading
+import sqlite3
+import hashlib
+import logging
+import time
+import json
+import zlib
+
+logger = logging.getLogger(__name__)
+
+
+def compute_data_version(paths: Iterable[Path], schema_version: str = "1") -> str:
+    """Version string derived from size/mtime of the dataset and index files"""
+    parts = [schema_version]
+    for path in paths:
+        if path.exists():
+            stat = path.stat()
+            parts.append(f"{path.name}:{stat.st_size}:{int(stat.st_mtime)}")
+    return hashlib.md5("|".join(parts).encode()).hexdigest()[:12]
+
+
+class PersistentCache:
+    def __init__(self, path: Path, version: str = "1", purge_every: int = 500):
+        self.path = path
+        self.version = version
+        self.purge_every = purge_every
+        self._local = threading.local()
+        self._writes = 0
+        self.hits = 0
+        self.misses = 0
+
+    def _connection(self) -> sqlite3.Connection:
+        """One connection per thread (sqlite3 connections are not thread-safe)"""
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            conn = sqlite3.connect(str(self.path), timeout=5.0, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS cache ("
+                "key TEXT PRIMARY KEY, version TEXT NOT NULL, value BLOB NOT NULL, expires_at REAL NOT NULL)"
+            )
+            self._local.conn = conn
+        return conn
+
+    @staticmethod
+    def _serialize(value: Any) -> bytes:
+        return zlib.compress(json.dumps(value, separators=(",", ":")).encode())
+
+    @staticmethod
+    def _deserialize(data: bytes) -> Any:
+        return json.loads(zlib.decompress(data))
+
+    def get(self, key: str) -> Optional[Any]:
+        """Get value if present, not expired and written for the current data version"""
+        try:
+            row = self._connection().execute(
+                "SELECT value FROM cache WHERE key = ? AND version = ? AND expires_at > ?",
+                (key, self.version, time.time())
+            ).fetchone()
+            if row is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+            return self._deserialize(row[0])
+        except Exception as e:
+            logger.warning(f"Persistent cache read failed: {e}")
+            return None
+
+    def set(self, key: str, value: Any, ttl_seconds: int = 3600):
+        """Store a JSON-serializable value"""
+        try:
+            conn = self._connection()
+            conn.execute(
+                "INSERT OR REPLACE INTO cache (key, version, value, expires_at) VALUES (?, ?, ?, ?)",
+                (key, self.version, self._serialize(value), time.time() + ttl_seconds)
+            )
+            self._writes += 1
+            if self._writes % self.purge_every == 0:
+                self.purge()
+        except Exception as e:
+            logger.warning(f"Persistent cache write failed: {e}")
+
+    def get_or_set(self, key: str, value: Any, ttl_seconds: int = 3600) -> Any:
+        """
+        Store a value unless a live one exists, then return the stored value
+        Atomic across workers: concurrent callers all get the first writer's value
+        """
+        conn = self._connection()
+        now = time.time()
+        conn.execute(
+            "INSERT INTO cache (key, version, value, expires_at) VALUES (?, ?, ?, ?) "
+            "ON CONFLICT(key) DO UPDATE SET version = excluded.version, value = excluded.value, "
+            "expires_at = excluded.expires_at WHERE cache.expires_at <= ? OR cache.version != excluded.version",
+            (key, self.version, self._serialize(value), now + ttl_seconds, now)
+        )
+        row = conn.execute("SELECT value FROM cache WHERE key = ?", (key,)).fetchone()
+        return self._deserialize(row[0])
+
+    def purge(self) -> int:
+        """Delete expired entries and entries of older data versions"""
+        cursor = self._connection().execute(
+            "DELETE FROM cache WHERE expires_at <= ? OR version != ?",
+            (time.time(), self.version)
+        )
+        return cursor.rowcount
+
+    def size(self) -> int:
+        """Get number of stored entries"""
+        return self._connection().execute("SELECT COUNT(*) FROM cache").fetchone()[0]
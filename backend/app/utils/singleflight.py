@@ -0,0 +1,57 @@
+"""
+Aynı anda gelen özdeş istekleri tek hesaplamada birleştiren singleflight katmanı
+İlk çağıran sonucu thread pool'da hesaplar; eşzamanlı özdeş çağıranlar aynı future'ı bekler
+"""
+from typing import Any, Callable, Dict
+import asyncio
+import hashlib
+import json
+
+from starlette.concurrency import run_in_threadpool
+
+from app.utils.metrics import SINGLEFLIGHT_REQUESTS, SINGLEFLIGHT_IN_FLIGHT
+
+
+def request_key(data: Any) -> str:
+    """Canonical key of a JSON-serializable request description"""
+    return hashlib.md5(json.dumps(data, sort_keys=True).encode()).hexdigest()
+
+
+class SingleFlight:
+    """
+    Per-worker de-duplication of in-flight calls by key (asyncio, one event loop)
+    Results are shared by reference; callers must not mutate them
+    """
+
+    def __init__(self, group: str, enabled: bool = True):
+        self.group = group
+        self.enabled = enabled
+        self._calls: Dict[str, asyncio.Future] = {}
+
+    async def do(self, key: str, fn: Callable[..., Any], *args, **kwargs) -> Any:
+        """
+        Run blocking `fn(*args, **kwargs)` in the thread pool, or await the identical
+        call already in flight. The computation runs as its own task, so a cancelled
+        (disconnected) leader does not fail the followers.
+        """
+        if not self.enabled:
+            return await run_in_threadpool(fn, *args, **kwargs)
+
+        call = self._calls.get(key)
+        if call is not None:
+            SINGLEFLIGHT_REQUESTS.inc(group=self.group, role="follower")
+            return await asyncio.shield(call)
+
+        SINGLEFLIGHT_REQUESTS.inc(group=self.group, role="leader")
+        SINGLEFLIGHT_IN_FLIGHT.inc(group=self.group)
+        call = asyncio.ensure_future(run_in_threadpool(fn, *args, **kwargs))
+        self._calls[key] = call
+        call.add_done_callback(lambda _: self._finish(key))
+        return await asyncio.shield(call)
+
+    def _finish(self, key: str):
+        self._calls.pop(key, None)
+        SINGLEFLIGHT_IN_FLIGHT.dec(group=self.group)
+
+    def in_flight(self) -> int:
+        return len(self._calls)
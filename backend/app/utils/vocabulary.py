@@ -0,0 +1,53 @@
+"""
+Kanonik malzeme sözlüğü (data/ingredients.json)
+Malzeme adlarını küçük sayısal ID'lere eşler; tarifler için ID dizileri üretir
+"""
+from typing import Dict, List, Optional
+from pathlib import Path
+from array import array
+import hashlib
+import json
+
+
+class IngredientVocabulary:
+    def __init__(self, path: Path):
+        self.path = path
+        self._names: Optional[List[str]] = None
+        self._ids: Dict[str, int] = {}
+
+    def _ensure_loaded(self):
+        if self._names is None:
+            try:
+                with open(self.path, 'r', encoding='utf-8') as f:
+                    names = [name.lower() for name in json.load(f)]
+            except (OSError, ValueError):
+                names = []
+            self._ids = {name: i for i, name in enumerate(names)}
+            self._names = names
+
+    @property
+    def names(self) -> List[str]:
+        self._ensure_loaded()
+        return self._names
+
+    @property
+    def fingerprint(self) -> str:
+        """Hash of the ordered vocabulary; ingredient IDs are only valid for the same fingerprint"""
+        return hashlib.md5("\n".join(self.names).encode("utf-8")).hexdigest()[:12]
+
+    def id_of(self, name: str) -> Optional[int]:
+        """ID of a canonical ingredient name (case-insensitive), None if unknown"""
+        self._ensure_loaded()
+        return self._ids.get(name.lower())
+
+    def match_ids(self, ingredients_text: str) -> array:
+        """
+        IDs of all canonical ingredients contained in a recipe's ingredient text
+        Uses the same substring semantics as ingredient match counting
+        """
+        text_lower = ingredients_text.lower()
+        return array('H', [i for i, name in enumerate(self.names) if name in text_lower])
+
+
+# Global vocabulary instance
+ingredient_vocabulary = IngredientVocabulary(Path(__file__).parent.parent.parent / 'data' / 'ingredients.json')
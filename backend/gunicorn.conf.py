@@ -0,0 +1,36 @@
+"""
+Production pre-fork server (gunicorn master + uvicorn workers)
+
+The master imports the app and preloads recipes, the FAISS index and the
+embedding/reranker models once, then gc.freeze()s them. Workers are forked
+from it and share those pages copy-on-write, so memory grows far slower
+than linearly with the worker count.
+
+Usage (from backend/):
+    gunicorn -c gunicorn.conf.py app.main:app
+
+Signals (to the master):
+    HUP          graceful restart of all workers (reuses the preloaded state)
+    USR2, WINCH  reload code/data: start a new master that preloads again, then stop the old workers
+    TTIN / TTOU  add / remove one worker
+"""
+import gc
+from app.config import settings
+
+bind = f"{settings.SERVER_HOST}:{settings.PORT}"
+workers = settings.SERVER_WORKERS
+worker_class = "uvicorn.workers.UvicornWorker"
+preload_app = True
+max_requests = settings.SERVER_MAX_REQUESTS
+max_requests_jitter = settings.SERVER_MAX_REQUESTS_JITTER
+timeout = settings.SERVER_TIMEOUT
+graceful_timeout = settings.SERVER_GRACEFUL_TIMEOUT
+
+
+def on_starting(server):
+    """Load shared data/models in the master before any worker is forked"""
+    from app.services.warmup_service import warmup_service
+    warmup_service.preload()
+    # Keep the GC from touching (and un-sharing) the preloaded objects in workers
+    gc.collect()
+    gc.freeze()
@@ -0,0 +1,82 @@
+"""
+Benchmark /recommend response serialization with warm caches
+Compares the model path (RecipeWithMatch + response_model validation + JSON encoding)
+with the spliced pre-serialized fragment path, and checks both produce the same JSON
+
+Usage (from backend/):
+    python scripts/bench_responses.py --ingredients chicken,garlic,onion --seconds 3
+"""
+
+import sys
+import json
+import time
+import argparse
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from fastapi.encoders import jsonable_encoder  # noqa: E402
+from fastapi.responses import JSONResponse  # noqa: E402
+from app.models.recipe import RecipeRecommendResponse  # noqa: E402
+from app.services.recipe_service import recipe_service  # noqa: E402
+from app.utils import json_fragments  # noqa: E402
+
+
+def model_path(ingredients, top_k) -> bytes:
+    recommendations = recipe_service.find_suitable_recipes(ingredients, use_vector_search=False, top_k=top_k)
+    response = RecipeRecommendResponse(
+        recommendations=recommendations,
+        count=len(recommendations),
+        userIngredients=ingredients,
+        search_method="string_matching"
+    )
+    # What FastAPI does for response_model: validate again, encode, render
+    validated = RecipeRecommendResponse.model_validate(response.model_dump())
+    return JSONResponse(jsonable_encoder(validated)).body
+
+
+def fragment_path(ingredients, top_k) -> bytes:
+    ranked = recipe_service.rank_recipes(ingredients, use_vector_search=False, top_k=top_k)
+    return json_fragments.json_object([
+        ("recommendations", recipe_service.render_results(ranked)),
+        ("count", json_fragments.dumps(len(ranked))),
+        ("userIngredients", json_fragments.dumps(ingredients)),
+        ("search_method", json_fragments.dumps("string_matching"))
+    ])
+
+
+def run(fn, seconds: float, *args) -> float:
+    """Responses per second over a fixed time window"""
+    count = 0
+    start = time.perf_counter()
+    while time.perf_counter() - start < seconds:
+        fn(*args)
+        count += 1
+    return count / (time.perf_counter() - start)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark recommendation response serialization")
+    parser.add_argument("--ingredients", default="chicken,garlic,onion,tomato")
+    parser.add_argument("--top-k", type=int, default=50)
+    parser.add_argument("--seconds", type=float, default=3.0)
+    args = parser.parse_args()
+
+    ingredients = [ing.strip() for ing in args.ingredients.split(",")]
+
+    # Warm caches (ranking + fragments)
+    reference = json.loads(model_path(ingredients, args.top_k))
+    if json.loads(fragment_path(ingredients, args.top_k)) != reference:
+        raise SystemExit("Fragment response differs from model response")
+    print(f"{reference['count']} recipes per response, "
+          f"{len(fragment_path(ingredients, args.top_k)) / 1024:.1f}KB, "
+          f"orjson={'yes' if json_fragments.orjson else 'no'}")
+
+    model_rps = run(model_path, args.seconds, ingredients, args.top_k)
+    fragment_rps = run(fragment_path, args.seconds, ingredients, args.top_k)
+    print(f"   model: {model_rps:8.0f} responses/s")
+    print(f"fragment: {fragment_rps:8.0f} responses/s ({fragment_rps / model_rps:.1f}x)")
+
+
+if __name__ == "__main__":
+    main()
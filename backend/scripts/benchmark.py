@@ -0,0 +1,390 @@
+"""
+Benchmark Suite
+Micro benchmarks of the hot paths and an end-to-end RAG pipeline run on synthetic,
+seeded data (FAISS search, query encoding, reranking, string matching, result cache,
+response serialization), written to JSON and compared against a stored baseline
+
+Query encoding, reranking and the end-to-end run use the configured models; they are
+reported as skipped when a model cannot be loaded. The LLM is always stubbed
+(same answer format as scripts/fake_gemini_server.py, optional fixed latency).
+
+Usage (from backend/):
+    python scripts/benchmark.py run --output bench.json
+    python scripts/benchmark.py run --save-baseline            # writes benchmarks/baseline.json
+    python scripts/benchmark.py compare bench.json              # vs benchmarks/baseline.json
+    python scripts/benchmark.py compare old.json new.json --threshold 0.15
+"""
+
+import sys
+import json
+import time
+import random
+import logging
+import argparse
+import platform
+import statistics
+import subprocess
+from pathlib import Path
+from typing import Callable, Dict, List, Optional
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(BACKEND_DIR))
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+
+import numpy as np  # noqa: E402
+from app.config import settings  # noqa: E402
+from app.models.recipe import CompactRecipe, RecipeWithMatch  # noqa: E402
+from app.utils.cache import BoundedCache  # noqa: E402
+from app.utils.columnar_store import InMemoryTextColumns  # noqa: E402
+from app.utils.vocabulary import ingredient_vocabulary  # noqa: E402
+from app.services.recipe_service import RecipeService  # noqa: E402
+from app.services.faiss_service import FAISSService  # noqa: E402
+from app.utils.exact_search import ExactSearchIndex  # noqa: E402
+from app.services.embedding_service import embedding_service  # noqa: E402
+from app.services.reranker_service import reranker_service  # noqa: E402
+from app.services.llm_service import LLMService  # noqa: E402
+from app.services.rag_pipeline import RAGPipeline  # noqa: E402
+from fake_gemini_server import build_answer  # noqa: E402
+
+DEFAULT_BASELINE = BACKEND_DIR / "benchmarks" / "baseline.json"
+
+FALLBACK_INGREDIENTS = [
+    "chicken", "garlic", "onion", "tomato", "pasta", "rice", "butter", "egg", "milk", "flour",
+    "lemon", "potato", "carrot", "cheese", "beef", "pork", "salmon", "spinach", "basil", "ginger"
+]
+QUERY_INGREDIENTS = ["chicken", "garlic", "onion", "tomato"]
+
+
+class SkipBenchmark(Exception):
+    """Raised when a benchmark cannot run in this environment (e.g. model not available)"""
+
+
+class StubLLMService(LLMService):
+    """LLMService with the Gemini call replaced by a canned answer (prompt building stays real)"""
+
+    def __init__(self, latency_ms: float = 0.0):
+        super().__init__()
+        self.latency_ms = latency_ms
+        self.enabled = True
+        self.api_key = "stub"
+
+    def _load_model(self):
+        self.model = object()
+        self._model_loaded = True
+
+    def _generate_text(self, prompt: str) -> Optional[str]:
+        if self.latency_ms:
+            time.sleep(self.latency_ms / 1000.0)
+        return build_answer(prompt)
+
+
+def make_corpus(size: int, seed: int) -> RecipeService:
+    """Synthetic recipe corpus in a standalone RecipeService (compact records, ingredient IDs)"""
+    rng = random.Random(seed)
+    vocabulary = ingredient_vocabulary.names or FALLBACK_INGREDIENTS
+    recipes = []
+    instructions = []
+    cleaned = []
+    for i in range(size):
+        names = rng.sample(vocabulary, min(len(vocabulary), rng.randint(5, 15)))
+        ingredients = str([f"{rng.randint(1, 4)} cups {name}" for name in names])
+        instructions.append(" ".join(f"Step {step}: combine and cook." for step in range(rng.randint(3, 12))))
+        cleaned.append(ingredients)
+        recipes.append((f"Synthetic Recipe {i}", f"synthetic-{i}", ingredients))
+
+    text_source = InMemoryTextColumns(
+        {"Instructions": instructions, "Cleaned_Ingredients": cleaned},
+        compress=settings.RECIPE_COMPRESS_TEXT
+    )
+    service = RecipeService()
+    service.recipes = [
+        CompactRecipe(
+            id=i,
+            title=title,
+            image_name=image_name,
+            ingredients=ingredients,
+            text_source=text_source,
+            ingredient_ids=ingredient_vocabulary.match_ids(ingredients)
+        )
+        for i, (title, image_name, ingredients) in enumerate(recipes)
+    ]
+    service._fragments = [None] * size
+    service._recipes_loaded = True
+    return service
+
+
+def make_index(size: int, seed: int) -> FAISSService:
+    """Standalone FAISSService over seeded random unit vectors"""
+    rng = np.random.default_rng(seed)
+    vectors = rng.standard_normal((size, settings.EMBEDDING_DIMENSION)).astype("float32")
+    vectors /= np.linalg.norm(vectors, axis=1, keepdims=True)
+    service = FAISSService()
+    service.index = service._create_index()
+    service.index.add(vectors)
+    service._index_loaded = True
+    return service
+
+
+def measure(fn: Callable[[], object], number: int, repeat: int, warmup: int) -> dict:
+    """
+    Time `number` calls per sample over `repeat` samples (after `warmup` untimed calls)
+
+    Returns:
+        Per-call statistics in milliseconds
+    """
+    for _ in range(warmup):
+        fn()
+    samples = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        for _ in range(number):
+            fn()
+        samples.append((time.perf_counter() - started) * 1000 / number)
+    samples.sort()
+    median = statistics.median(samples)
+    return {
+        "median_ms": round(median, 6),
+        "mean_ms": round(statistics.fmean(samples), 6),
+        "p95_ms": round(samples[min(len(samples) - 1, int(len(samples) * 0.95))], 6),
+        "min_ms": round(samples[0], 6),
+        "ops_per_sec": round(1000 / median, 1) if median else None,
+        "number": number,
+        "repeat": repeat
+    }
+
+
+def build_benchmarks(args) -> Dict[str, Callable[[], dict]]:
+    """Benchmark name -> callable returning its measurement (may raise SkipBenchmark)"""
+    repeat, warmup = args.repeat, args.warmup
+    benchmarks: Dict[str, Callable[[], dict]] = {}
+    corpus = make_corpus(args.corpus_size, args.seed)
+
+    def require_embedding():
+        try:
+            embedding_service._load_model()
+        except Exception as e:
+            raise SkipBenchmark(f"embedding model unavailable: {e}")
+
+    # Retriever: exact search cost grows with corpus size
+    for size in args.faiss_sizes:
+        def faiss_search(size=size):
+            index = make_index(size, args.seed)
+            query = np.random.default_rng(args.seed + 1).standard_normal(settings.EMBEDDING_DIMENSION).astype("float32")
+            return measure(lambda: index.search(query, k=50), number=10, repeat=repeat, warmup=warmup)
+        benchmarks[f"faiss_search[n={size},k=50]"] = faiss_search
+
+        # NumPy fallback used when the FAISS index cannot be loaded (batched queries share one pass)
+        for dtype, batch in (("float32", 1), ("float16", 1), ("float32", 8)):
+            def exact_search(size=size, dtype=dtype, batch=batch):
+                vectors = make_index(size, args.seed).index.reconstruct_n(0, size)
+                index = ExactSearchIndex(vectors, dtype=dtype, block_rows=settings.EXACT_SEARCH_BLOCK_ROWS)
+                queries = np.random.default_rng(args.seed + 1).standard_normal(
+                    (batch, settings.EMBEDDING_DIMENSION)
+                ).astype("float32")
+                return measure(lambda: index.search(queries, k=50), number=10, repeat=repeat, warmup=warmup)
+            benchmarks[f"exact_search[n={size},k=50,{dtype},batch={batch}]"] = exact_search
+
+    def encode_text():
+        require_embedding()
+        query = FAISSService.build_ingredient_query(QUERY_INGREDIENTS)
+        return measure(lambda: embedding_service.encode_text(query), number=5, repeat=repeat, warmup=warmup)
+    benchmarks["embedding_encode_text"] = encode_text
+
+    for batch in args.rerank_batches:
+        def rerank(batch=batch):
+            if not reranker_service.enabled:
+                raise SkipBenchmark("reranker disabled")
+            try:
+                reranker_service._load_model()
+            except Exception as e:
+                raise SkipBenchmark(f"reranker model unavailable: {e}")
+            recipes = corpus.get_many(range(batch))
+            query = reranker_service._prepare_query_text(QUERY_INGREDIENTS)
+            return measure(lambda: reranker_service.rerank(query, recipes, top_k=10), number=1, repeat=repeat, warmup=warmup)
+        benchmarks[f"rerank[batch={batch}]"] = rerank
+
+    benchmarks[f"string_matching_search[n={args.corpus_size}]"] = lambda: measure(
+        lambda: corpus._string_matching_search(QUERY_INGREDIENTS), number=1, repeat=repeat, warmup=warmup
+    )
+
+    # Result cache (the repo's BoundedCache, formerly SimpleCache)
+    def cache_ops(operation: str):
+        result_cache = BoundedCache(max_size=10000, sweep_interval=3600)
+        keys = [result_cache._generate_key("recipes", {"ingredients": [str(i)]}) for i in range(10000)]
+        for key in keys:
+            result_cache.set(key, [(1, ["chicken"])], ttl_seconds=3600)
+        rng = random.Random(args.seed)
+        hits = [rng.choice(keys) for _ in range(1000)]
+        misses = [f"recipes:miss-{i}" for i in range(1000)]
+        if operation == "get_hit":
+            fn = lambda: [result_cache.get(key) for key in hits]  # noqa: E731
+        elif operation == "get_miss":
+            fn = lambda: [result_cache.get(key) for key in misses]  # noqa: E731
+        else:
+            fn = lambda: [result_cache.set(key, [], ttl_seconds=3600) for key in hits]  # noqa: E731
+        stats = measure(fn, number=1, repeat=repeat, warmup=warmup)
+        # Report per cache operation
+        for field in ("median_ms", "mean_ms", "p95_ms", "min_ms"):
+            stats[field] = round(stats[field] / 1000, 9)
+        stats["ops_per_sec"] = round(1000 / stats["median_ms"], 1) if stats["median_ms"] else None
+        return stats
+    for operation in ("get_hit", "get_miss", "set"):
+        benchmarks[f"cache_{operation}"] = lambda operation=operation: cache_ops(operation)
+
+    # Response serialization of the same 50 ranked results: fragment splicing vs pydantic models
+    ranked = corpus._string_matching_rank(QUERY_INGREDIENTS)[:50]
+    benchmarks["serialize_fragments[50]"] = lambda: measure(
+        lambda: corpus.render_results(ranked), number=20, repeat=repeat, warmup=warmup
+    )
+    benchmarks["serialize_models[50]"] = lambda: measure(
+        lambda: json.dumps([result.model_dump() for result in corpus._to_results(ranked)]).encode(),
+        number=5, repeat=repeat, warmup=warmup
+    )
+
+    def rag_end_to_end():
+        require_embedding()
+        generator = StubLLMService(latency_ms=args.llm_latency_ms)
+        pipeline = RAGPipeline(
+            faiss_service=make_index(args.corpus_size, args.seed),
+            recipe_service=corpus,
+            llm_service=generator
+        )
+
+        def process():
+            generator.fragment_cache.clear()  # Full prompt build on every call
+            return pipeline.process(QUERY_INGREDIENTS, top_k=10, retrieval_top_k=50, use_semantic_cache=False)
+        return measure(process, number=1, repeat=repeat, warmup=warmup)
+    benchmarks[f"rag_pipeline_e2e[n={args.corpus_size},stub_llm={args.llm_latency_ms:g}ms]"] = rag_end_to_end
+
+    return benchmarks
+
+
+def git_revision() -> Optional[str]:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=BACKEND_DIR,
+            capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def run(args) -> int:
+    if args.quick:
+        args.repeat, args.warmup = 5, 1
+        args.faiss_sizes = args.faiss_sizes[:2]
+    benchmarks = build_benchmarks(args)
+    if args.only:
+        benchmarks = {name: fn for name, fn in benchmarks.items() if any(part in name for part in args.only)}
+
+    results = {}
+    for name, benchmark in benchmarks.items():
+        try:
+            results[name] = benchmark()
+            print(f"{name:55s} {results[name]['median_ms']:12.4f} ms  ({results[name]['ops_per_sec']} ops/s)")
+        except SkipBenchmark as e:
+            results[name] = {"skipped": str(e)}
+            print(f"{name:55s} skipped: {e}")
+
+    report = {
+        "meta": {
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+            "git_revision": git_revision(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "numpy": np.__version__,
+            "seed": args.seed,
+            "corpus_size": args.corpus_size,
+            "repeat": args.repeat
+        },
+        "benchmarks": results
+    }
+    outputs = [Path(args.output)] if args.output else []
+    if args.save_baseline:
+        outputs.append(DEFAULT_BASELINE)
+    for output in outputs:
+        output.parent.mkdir(parents=True, exist_ok=True)
+        output.write_text(json.dumps(report, indent=2) + "\n", encoding="utf-8")
+        print(f"Results written to {output}")
+    return 0
+
+
+def compare_reports(baseline: dict, current: dict, threshold: float) -> List[dict]:
+    """Per-benchmark median ratio current/baseline with a status (regression/improvement/ok/missing)"""
+    rows = []
+    baseline_results = baseline.get("benchmarks", {})
+    current_results = current.get("benchmarks", {})
+    for name in sorted(set(baseline_results) | set(current_results)):
+        before, after = baseline_results.get(name), current_results.get(name)
+        if not before or not after or "median_ms" not in before or "median_ms" not in after:
+            rows.append({"name": name, "status": "missing", "ratio": None})
+            continue
+        ratio = after["median_ms"] / before["median_ms"] if before["median_ms"] else float("inf")
+        if ratio > 1 + threshold:
+            status = "regression"
+        elif ratio < 1 - threshold:
+            status = "improvement"
+        else:
+            status = "ok"
+        rows.append({
+            "name": name, "status": status, "ratio": ratio,
+            "baseline_ms": before["median_ms"], "current_ms": after["median_ms"]
+        })
+    return rows
+
+
+def compare(args) -> int:
+    if args.current is None:
+        baseline_path, current_path = DEFAULT_BASELINE, Path(args.baseline)
+    else:
+        baseline_path, current_path = Path(args.baseline), Path(args.current)
+    baseline = json.loads(baseline_path.read_text(encoding="utf-8"))
+    current = json.loads(current_path.read_text(encoding="utf-8"))
+
+    print(f"Baseline: {baseline_path} ({baseline['meta'].get('git_revision')}), "
+          f"current: {current_path} ({current['meta'].get('git_revision')}), threshold ±{args.threshold:.0%}")
+    rows = compare_reports(baseline, current, args.threshold)
+    for row in rows:
+        if row["ratio"] is None:
+            print(f"  {'MISSING':12s} {row['name']}")
+            continue
+        marker = {"regression": "REGRESSION", "improvement": "improved", "ok": "ok"}[row["status"]]
+        print(f"  {marker:12s} {row['name']:55s} {row['baseline_ms']:12.4f} → {row['current_ms']:12.4f} ms "
+              f"({row['ratio']:.2f}x)")
+
+    regressions = [row for row in rows if row["status"] == "regression"]
+    print(f"{len(regressions)} regression(s) beyond {args.threshold:.0%}")
+    return 1 if regressions else 0
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark hot paths and compare against a baseline")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    run_parser = subparsers.add_parser("run", help="Run the benchmarks")
+    run_parser.add_argument("--output", help="Write results JSON to this path")
+    run_parser.add_argument("--save-baseline", action="store_true", help=f"Also write {DEFAULT_BASELINE.relative_to(BACKEND_DIR)}")
+    run_parser.add_argument("--only", type=lambda value: value.split(","), help="Comma-separated name filters")
+    run_parser.add_argument("--quick", action="store_true", help="Fewer samples and corpus sizes")
+    run_parser.add_argument("--seed", type=int, default=42)
+    run_parser.add_argument("--repeat", type=int, default=30, help="Timed samples per benchmark")
+    run_parser.add_argument("--warmup", type=int, default=3, help="Untimed calls before sampling")
+    run_parser.add_argument("--corpus-size", type=int, default=5000, help="Synthetic recipes for matching/e2e")
+    run_parser.add_argument("--faiss-sizes", type=lambda value: [int(v) for v in value.split(",")],
+                            default=[1000, 10000, 50000])
+    run_parser.add_argument("--rerank-batches", type=lambda value: [int(v) for v in value.split(",")],
+                            default=[10, 25, 50])
+    run_parser.add_argument("--llm-latency-ms", type=float, default=0.0, help="Simulated Gemini latency in e2e")
+
+    compare_parser = subparsers.add_parser("compare", help="Flag regressions against a baseline")
+    compare_parser.add_argument("baseline", help="Baseline JSON (or the current results if only one path is given)")
+    compare_parser.add_argument("current", nargs="?", help=f"Current results JSON (default baseline: {DEFAULT_BASELINE.name})")
+    compare_parser.add_argument("--threshold", type=float, default=0.10, help="Allowed median slowdown (0.10 = 10%%)")
+
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.ERROR)
+    sys.exit(run(args) if args.command == "run" else compare(args))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,68 @@
+"""
+Build the columnar recipe store from data/recipes.json
+Reports load time and RSS of the JSON loader vs. the store loader (each in a fresh process)
+
+Usage (from backend/):
+    python scripts/build_recipe_store.py
+"""
+
+import sys
+import json
+import time
+import argparse
+import subprocess
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from app.services.recipe_service import RecipeService  # noqa: E402
+from app.utils.helpers import get_rss_mb  # noqa: E402
+
+
+def measure(mode: str) -> dict:
+    """Load recipes with the given loader in this process and report time/RSS"""
+    service = RecipeService()
+    rss_before = get_rss_mb()
+    start = time.perf_counter()
+    if mode == "json":
+        recipes = service._load_recipes_from_json()
+    else:
+        service._load_recipes()
+        recipes = service.recipes
+    elapsed_ms = (time.perf_counter() - start) * 1000
+    return {
+        "mode": mode,
+        "recipes": len(recipes),
+        "load_ms": round(elapsed_ms, 1),
+        "rss_before_mb": round(rss_before, 1),
+        "rss_after_mb": round(get_rss_mb(), 1)
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Build the columnar recipe store")
+    parser.add_argument("--measure", choices=["json", "store"], help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.measure:
+        print(json.dumps(measure(args.measure)))
+        return
+
+    service = RecipeService()
+    start = time.perf_counter()
+    count = service.build_store()
+    print(f"Built {service.store_path} with {count} recipes in {time.perf_counter() - start:.2f}s "
+          f"({service.store_path.stat().st_size / (1024 * 1024):.1f}MB)")
+
+    for mode in ("json", "store"):
+        output = subprocess.run(
+            [sys.executable, __file__, "--measure", mode],
+            capture_output=True, text=True, check=True
+        ).stdout
+        result = json.loads(output.strip().splitlines()[-1])
+        print(f"{mode:>5}: {result['recipes']} recipes in {result['load_ms']}ms, "
+              f"RSS {result['rss_before_mb']}MB → {result['rss_after_mb']}MB")
+
+
+if __name__ == "__main__":
+    main()
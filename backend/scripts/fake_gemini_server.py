@@ -0,0 +1,116 @@
+"""
+Fake Gemini Server
+Local stand-in for the Gemini generateContent REST endpoint
+with configurable latency distributions and error rates (for load tests, see scripts/load_test.py)
+
+Usage (from backend/):
+    python scripts/fake_gemini_server.py --port 8089 --latency-ms 800 --error-rate 0.1
+    python scripts/fake_gemini_server.py --latency-dist lognormal --latency-ms 900 --latency-p99-ms 4000
+    GEMINI_API_KEY=fake GEMINI_API_BASE_URL=http://127.0.0.1:8089 uvicorn app.main:app
+"""
+
+import re
+import math
+import json
+import time
+import random
+import argparse
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+def build_answer(prompt: str) -> str:
+    """Answer in the fragment format expected by LLMService"""
+    numbers = re.findall(r'^\[(\d+)\] \*\*', prompt, re.MULTILINE)
+    lines = [f"[{n}] This recipe uses several of your ingredients." for n in numbers]
+    lines.append("SUMMARY: These recipes make good use of what is in your fridge.")
+    return "\n".join(lines)
+
+
+def make_latency_sampler(args):
+    """
+    Response latency sampler (seconds) for the configured distribution
+    - fixed: always --latency-ms
+    - uniform: between --latency-ms and --latency-p99-ms
+    - exponential: mean --latency-ms
+    - lognormal: median --latency-ms, 99th percentile --latency-p99-ms (long tail, like real LLM APIs)
+    """
+    median = args.latency_ms / 1000.0
+    p99 = max(args.latency_p99_ms or args.latency_ms, args.latency_ms) / 1000.0
+    if args.latency_dist == "uniform":
+        return lambda: random.uniform(median, p99)
+    if args.latency_dist == "exponential":
+        return lambda: random.expovariate(1 / median) if median > 0 else 0.0
+    if args.latency_dist == "lognormal":
+        if median <= 0:
+            return lambda: 0.0
+        sigma = math.log(p99 / median) / 2.326  # z-score of the 99th percentile
+        return lambda: random.lognormvariate(math.log(median), sigma)
+    return lambda: median
+
+
+def make_handler(args):
+    sample_latency = make_latency_sampler(args)
+
+
+    class FakeGeminiHandler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"  # Keep-alive, like the real API
+        disable_nagle_algorithm = True  # Headers and body are separate writes; avoid delayed-ACK stalls
+
+        def do_POST(self):
+            length = int(self.headers.get("Content-Length", 0))
+            body = json.loads(self.rfile.read(length) or b"{}")
+
+            time.sleep(sample_latency())
+
+            if random.random() < args.error_rate:
+                status = random.choice(args.error_status)
+                self._send(status, {"error": {"code": status, "message": "fake upstream error"}})
+                return
+
+            prompt = body.get("contents", [{}])[0].get("parts", [{}])[0].get("text", "")
+            self._send(200, {
+                "candidates": [{"content": {"parts": [{"text": build_answer(prompt)}], "role": "model"}}]
+            })
+
+        def _send(self, status: int, payload: dict):
+            data = json.dumps(payload).encode()
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(data)))
+            self.end_headers()
+            self.wfile.write(data)
+
+        def log_message(self, format, *log_args):
+            if not args.quiet:
+                super().log_message(format, *log_args)
+
+    return FakeGeminiHandler
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Fake Gemini generateContent server")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8089)
+    parser.add_argument("--latency-dist", choices=["fixed", "uniform", "exponential", "lognormal"], default="fixed")
+    parser.add_argument("--latency-ms", type=float, default=500.0, help="Fixed/median (mean for exponential) latency")
+    parser.add_argument("--latency-p99-ms", type=float, help="99th percentile latency (uniform upper bound)")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Fraction of requests answered with an error")
+    parser.add_argument("--error-status", type=lambda value: [int(code) for code in value.split(",")],
+                        default=[503], help="Comma-separated error status codes to choose from (e.g. 429,500,503)")
+    parser.add_argument("--seed", type=int, help="Random seed for reproducible latency/error sequences")
+    parser.add_argument("--quiet", action="store_true")
+    args = parser.parse_args()
+    if args.seed is not None:
+        random.seed(args.seed)
+
+    server = ThreadingHTTPServer((args.host, args.port), make_handler(args))
+    print(f"Fake Gemini server listening on http://{args.host}:{args.port} "
+          f"({args.latency_dist} latency {args.latency_ms:g}ms, error rate {args.error_rate:g})")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,316 @@
+"""
+Load Test
+Replays a configurable mix of recommendation requests against a running API at a fixed
+request rate (open loop) or a fixed number of concurrent clients (closed loop), and
+reports latency percentiles per endpoint, throughput, error rate and memory growth per
+worker process (sampled from /metrics, told apart by the pid label) over the run
+
+Start the API against the local Gemini stand-in first:
+    python scripts/fake_gemini_server.py --quiet --latency-dist lognormal --latency-ms 900 --latency-p99-ms 4000
+    GEMINI_API_KEY=fake GEMINI_API_BASE_URL=http://127.0.0.1:8089 gunicorn -c gunicorn.conf.py app.main:app
+
+Usage (from backend/):
+    python scripts/load_test.py --rps 20 --duration 60
+    python scripts/load_test.py --concurrency 32 --duration 1800 --mix mix.json --output soak.json
+
+Mix file (JSON, all keys optional):
+    {"endpoints": {"rag-recommend": 0.6, "recommend": 0.3, "list": 0.1},
+     "ingredients": ["chicken", "garlic", ...], "min_ingredients": 2, "max_ingredients": 6,
+     "explain": true}
+"""
+
+import re
+import json
+import time
+import random
+import asyncio
+import argparse
+from pathlib import Path
+from typing import Dict, List, Optional
+
+import httpx
+
+# Popular fridge ingredients, most common first (picked with Zipf-like weights,
+# so the hot queries repeat the way real traffic does)
+DEFAULT_INGREDIENTS = [
+    "chicken", "garlic", "onion", "tomato", "egg", "butter", "potato", "rice", "pasta", "cheese",
+    "milk", "carrot", "lemon", "beef", "flour", "spinach", "mushroom", "bell pepper", "ginger", "salmon",
+    "pork", "basil", "cream", "bacon", "broccoli", "zucchini", "shrimp", "tofu", "avocado", "chickpeas"
+]
+
+DEFAULT_MIX = {
+    "endpoints": {"rag-recommend": 0.6, "recommend": 0.3, "list": 0.1},
+    "ingredients": DEFAULT_INGREDIENTS,
+    "min_ingredients": 2,
+    "max_ingredients": 6,
+    "explain": True
+}
+
+RSS_PATTERN = re.compile(r'^process_resident_memory_bytes\{pid="(\d+)"\} (\S+)$', re.MULTILINE)
+
+
+class RequestMix:
+    """Seeded generator of (endpoint, method, path, params, body) requests"""
+
+    def __init__(self, mix: dict, seed: int):
+        self.mix = {**DEFAULT_MIX, **mix}
+        self.rng = random.Random(seed)
+        self.endpoints = list(self.mix["endpoints"])
+        self.endpoint_weights = [self.mix["endpoints"][name] for name in self.endpoints]
+        self.ingredients = self.mix["ingredients"]
+        self.ingredient_weights = [1 / (rank + 1) for rank in range(len(self.ingredients))]
+
+    def _ingredients(self) -> List[str]:
+        count = self.rng.randint(self.mix["min_ingredients"], self.mix["max_ingredients"])
+        picked = []
+        while len(picked) < min(count, len(self.ingredients)):
+            name = self.rng.choices(self.ingredients, self.ingredient_weights)[0]
+            if name not in picked:
+                picked.append(name)
+        return picked
+
+    def next(self) -> tuple:
+        endpoint = self.rng.choices(self.endpoints, self.endpoint_weights)[0]
+        ingredients = self._ingredients()
+        if endpoint == "rag-recommend":
+            body = {"ingredients": ingredients, "explain": self.mix["explain"]}
+            return endpoint, "POST", "/api/recipes/rag-recommend", None, body
+        if endpoint == "recommend":
+            return endpoint, "POST", "/api/recipes/recommend", None, {"ingredients": ingredients}
+        if endpoint == "list":
+            return endpoint, "GET", "/api/recipes/", {"ingredients": ",".join(ingredients)}, None
+        raise ValueError(f"Unknown endpoint '{endpoint}' in mix")
+
+
+class Results:
+    """Per-endpoint latencies and errors, recorded after the warm-up period"""
+
+    def __init__(self, record_after: float):
+        self.record_after = record_after
+        self.latencies: Dict[str, List[float]] = {}
+        self.errors: Dict[str, Dict[str, int]] = {}
+        self.dropped = 0
+        self.recording_started: Optional[float] = None
+
+    def record(self, endpoint: str, latency_ms: float, error: Optional[str]):
+        now = time.monotonic()
+        if now < self.record_after:
+            return
+        if self.recording_started is None:
+            self.recording_started = now
+        self.latencies.setdefault(endpoint, []).append(latency_ms)
+        if error is not None:
+            errors = self.errors.setdefault(endpoint, {})
+            errors[error] = errors.get(error, 0) + 1
+
+
+def percentile(sorted_values: List[float], fraction: float) -> float:
+    if not sorted_values:
+        return 0.0
+    return sorted_values[min(len(sorted_values) - 1, int(len(sorted_values) * fraction))]
+
+
+async def send(client: httpx.AsyncClient, request: tuple, results: Results):
+    endpoint, method, path, params, body = request
+    started = time.perf_counter()
+    error = None
+    try:
+        response = await client.request(method, path, params=params, json=body)
+        await response.aread()
+        if response.status_code >= 400:
+            error = str(response.status_code)
+        elif endpoint == "rag-recommend" and body["explain"] and response.json().get("explanation") is None:
+            error = "no_explanation"  # LLM step failed or was shed (breaker open / overloaded)
+    except httpx.TimeoutException:
+        error = "timeout"
+    except httpx.HTTPError as e:
+        error = type(e).__name__
+    results.record(endpoint, (time.perf_counter() - started) * 1000, error)
+
+
+async def run_open_loop(client, mix: RequestMix, results: Results, rps: float, deadline: float, max_in_flight: int):
+    """Fixed arrival rate (Poisson); requests beyond max_in_flight are dropped and counted"""
+    in_flight = set()
+    next_send = time.monotonic()
+    while next_send < deadline:
+        await asyncio.sleep(max(0.0, next_send - time.monotonic()))
+        request = mix.next()
+        if len(in_flight) >= max_in_flight:
+            if time.monotonic() >= results.record_after:
+                results.dropped += 1
+        else:
+            task = asyncio.create_task(send(client, request, results))
+            in_flight.add(task)
+            task.add_done_callback(in_flight.discard)
+        next_send += mix.rng.expovariate(rps)
+    if in_flight:
+        await asyncio.gather(*in_flight)
+
+
+async def run_closed_loop(client, mix: RequestMix, results: Results, concurrency: int, deadline: float):
+    """Fixed number of clients, each sending its next request as soon as the previous one completes"""
+    async def worker():
+        while time.monotonic() < deadline:
+            await send(client, mix.next(), results)
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+
+
+async def sample_memory(client: httpx.AsyncClient, interval: float, deadline: float, samples: List[tuple]):
+    """
+    Poll process_resident_memory_bytes from /metrics as (seconds, pid, MB) samples
+    Each scrape uses a new connection, so scrapes spread over the workers instead of
+    staying pinned to the one holding a keep-alive connection
+    """
+    started = time.monotonic()
+    while time.monotonic() < deadline:
+        try:
+            response = await client.get("/metrics", headers={"Connection": "close"})
+            match = RSS_PATTERN.search(response.text)
+            if match:
+                samples.append((
+                    round(time.monotonic() - started, 1),
+                    int(match.group(1)),
+                    float(match.group(2)) / (1024 * 1024)
+                ))
+        except httpx.HTTPError:
+            pass
+        await asyncio.sleep(interval)
+
+
+def memory_report(samples: List[tuple]) -> Optional[dict]:
+    """Growth per worker process (pid); workers scraped fewer than twice are not reported"""
+    by_pid: Dict[int, List[tuple]] = {}
+    for elapsed, pid, mb in samples:
+        by_pid.setdefault(pid, []).append((elapsed, mb))
+    workers = {}
+    for pid, worker_samples in sorted(by_pid.items()):
+        if len(worker_samples) < 2:
+            continue
+        (first_t, first_mb), (last_t, last_mb) = worker_samples[0], worker_samples[-1]
+        minutes = (last_t - first_t) / 60
+        workers[pid] = {
+            "start_mb": round(first_mb, 1),
+            "end_mb": round(last_mb, 1),
+            "max_mb": round(max(mb for _, mb in worker_samples), 1),
+            "growth_mb": round(last_mb - first_mb, 1),
+            "growth_mb_per_min": round((last_mb - first_mb) / minutes, 2) if minutes else None,
+            "samples": worker_samples
+        }
+    if not workers:
+        return None
+    return {
+        "max_growth_mb": max(worker["growth_mb"] for worker in workers.values()),
+        "workers": workers
+    }
+
+
+def build_report(results: Results, memory_samples: List[tuple], args) -> dict:
+    elapsed = time.monotonic() - (results.recording_started or time.monotonic())
+    endpoints = {}
+    all_latencies: List[float] = []
+    total_errors = 0
+    for endpoint, latencies in sorted(results.latencies.items()):
+        latencies.sort()
+        all_latencies.extend(latencies)
+        errors = results.errors.get(endpoint, {})
+        error_count = sum(errors.values())
+        total_errors += error_count
+        endpoints[endpoint] = {
+            "requests": len(latencies),
+            "throughput_rps": round(len(latencies) / elapsed, 2) if elapsed else None,
+            "error_rate": round(error_count / len(latencies), 4),
+            "errors": errors,
+            "p50_ms": round(percentile(latencies, 0.50), 1),
+            "p90_ms": round(percentile(latencies, 0.90), 1),
+            "p99_ms": round(percentile(latencies, 0.99), 1),
+            "max_ms": round(latencies[-1], 1)
+        }
+    all_latencies.sort()
+    return {
+        "config": {
+            "base_url": args.base_url,
+            "mode": f"rps={args.rps}" if args.rps else f"concurrency={args.concurrency}",
+            "duration_s": args.duration,
+            "warmup_s": args.warmup,
+            "seed": args.seed
+        },
+        "overall": {
+            "requests": len(all_latencies),
+            "throughput_rps": round(len(all_latencies) / elapsed, 2) if elapsed else None,
+            "error_rate": round(total_errors / len(all_latencies), 4) if all_latencies else None,
+            "dropped": results.dropped,
+            "p50_ms": round(percentile(all_latencies, 0.50), 1),
+            "p99_ms": round(percentile(all_latencies, 0.99), 1)
+        },
+        "endpoints": endpoints,
+        "memory": memory_report(memory_samples)
+    }
+
+
+def print_report(report: dict):
+    print(f"\n{report['config']['mode']}, {report['config']['duration_s']}s "
+          f"(first {report['config']['warmup_s']}s excluded)")
+    print(f"{'endpoint':16s} {'requests':>9s} {'rps':>8s} {'errors':>7s} {'p50':>9s} {'p90':>9s} {'p99':>9s} {'max':>9s}")
+    for endpoint, stats in report["endpoints"].items():
+        print(f"{endpoint:16s} {stats['requests']:9d} {stats['throughput_rps']:8.2f} {stats['error_rate']:7.2%} "
+              f"{stats['p50_ms']:7.1f}ms {stats['p90_ms']:7.1f}ms {stats['p99_ms']:7.1f}ms {stats['max_ms']:7.1f}ms")
+        if stats["errors"]:
+            print(f"{'':16s} errors: {stats['errors']}")
+    overall = report["overall"]
+    print(f"{'overall':16s} {overall['requests']:9d} {overall['throughput_rps'] or 0:8.2f} "
+          f"{overall['error_rate'] or 0:7.2%} {overall['p50_ms']:7.1f}ms {'':9s} {overall['p99_ms']:7.1f}ms")
+    if overall["dropped"]:
+        print(f"{overall['dropped']} requests dropped (client at --max-in-flight, server not keeping up)")
+    memory = report["memory"]
+    if memory:
+        for pid, worker in memory["workers"].items():
+            print(f"worker {pid} RSS: {worker['start_mb']}MB → {worker['end_mb']}MB (max {worker['max_mb']}MB, "
+                  f"{worker['growth_mb']:+}MB, {worker['growth_mb_per_min']}MB/min)")
+
+
+async def main_async(args) -> dict:
+    mix_config = json.loads(Path(args.mix).read_text(encoding="utf-8")) if args.mix else {}
+    mix = RequestMix(mix_config, args.seed)
+
+    connections = args.concurrency or args.max_in_flight
+    limits = httpx.Limits(max_connections=connections, max_keepalive_connections=connections)
+    async with httpx.AsyncClient(base_url=args.base_url, timeout=args.timeout, limits=limits) as client, \
+            httpx.AsyncClient(base_url=args.base_url, timeout=10.0) as metrics_client:
+        started = time.monotonic()
+        deadline = started + args.warmup + args.duration
+        results = Results(record_after=started + args.warmup)
+        memory_samples: List[tuple] = []
+        memory_task = asyncio.create_task(sample_memory(metrics_client, args.memory_interval, deadline, memory_samples))
+        if args.rps:
+            await run_open_loop(client, mix, results, args.rps, deadline, args.max_in_flight)
+        else:
+            await run_closed_loop(client, mix, results, args.concurrency, deadline)
+        await memory_task
+    return build_report(results, memory_samples, args)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Load test the recommendation API")
+    parser.add_argument("--base-url", default="http://127.0.0.1:8000")
+    mode = parser.add_mutually_exclusive_group(required=True)
+    mode.add_argument("--rps", type=float, help="Open loop: fixed request rate (Poisson arrivals)")
+    mode.add_argument("--concurrency", type=int, help="Closed loop: number of concurrent clients")
+    parser.add_argument("--duration", type=float, default=60.0, help="Measured seconds")
+    parser.add_argument("--warmup", type=float, default=5.0, help="Seconds of load before measuring")
+    parser.add_argument("--mix", help="Request mix JSON file (endpoint weights, ingredients)")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--timeout", type=float, default=30.0, help="Client timeout per request (seconds)")
+    parser.add_argument("--max-in-flight", type=int, default=256, help="Open loop in-flight cap")
+    parser.add_argument("--memory-interval", type=float, default=5.0, help="Seconds between /metrics RSS samples")
+    parser.add_argument("--output", help="Write the report JSON to this path")
+    args = parser.parse_args()
+
+    report = asyncio.run(main_async(args))
+    print_report(report)
+    if args.output:
+        Path(args.output).write_text(json.dumps(report, indent=2) + "\n", encoding="utf-8")
+        print(f"Report written to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,90 @@
+"""
+Measure total memory of the pre-fork server for several worker counts
+Starts gunicorn (gunicorn.conf.py) with N workers, waits for /ready on all of
+them, and sums PSS (proportional set size, shared pages split between
+processes) of the master and workers from /proc (Linux only)
+
+Usage (from backend/):
+    python scripts/measure_prefork_memory.py --workers 1 2 4 --port 3101
+"""
+
+import os
+import sys
+import time
+import signal
+import argparse
+import subprocess
+import urllib.request
+import urllib.error
+from pathlib import Path
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent
+
+
+def read_pss_mb(pid: int) -> float:
+    """PSS of one process in MB"""
+    with open(f"/proc/{pid}/smaps_rollup") as f:
+        for line in f:
+            if line.startswith("Pss:"):
+                return int(line.split()[1]) / 1024
+    return 0.0
+
+
+def child_pids(pid: int) -> list:
+    with open(f"/proc/{pid}/task/{pid}/children") as f:
+        return [int(child) for child in f.read().split()]
+
+
+def wait_ready(port: int, workers: int, timeout: float = 300.0):
+    """Poll /ready until every worker is forked and a round of requests returns 200"""
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        try:
+            ready = all(
+                urllib.request.urlopen(f"http://127.0.0.1:{port}/ready", timeout=5).status == 200
+                for _ in range(workers * 4)
+            )
+            if ready:
+                return
+        except (urllib.error.URLError, ConnectionError):
+            pass
+        time.sleep(0.5)
+    raise TimeoutError("Server did not become ready")
+
+
+def measure(workers: int, port: int) -> dict:
+    env = dict(os.environ, SERVER_WORKERS=str(workers), PORT=str(port), SERVER_HOST="127.0.0.1")
+    master = subprocess.Popen(
+        [sys.executable, "-m", "gunicorn", "-c", "gunicorn.conf.py", "app.main:app"],
+        cwd=BACKEND_DIR, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+    )
+    try:
+        wait_ready(port, workers)
+        time.sleep(1.0)
+        pids = [master.pid] + child_pids(master.pid)
+        return {
+            "workers": workers,
+            "processes": len(pids),
+            "total_pss_mb": round(sum(read_pss_mb(pid) for pid in pids), 1)
+        }
+    finally:
+        master.send_signal(signal.SIGTERM)
+        master.wait(timeout=60)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure pre-fork server memory per worker count")
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4])
+    parser.add_argument("--port", type=int, default=3101)
+    args = parser.parse_args()
+
+    baseline = None
+    for workers in args.workers:
+        result = measure(workers, args.port)
+        baseline = baseline or result["total_pss_mb"] / workers
+        print(f"{workers} worker(s): {result['total_pss_mb']:7.1f}MB total PSS "
+              f"({result['total_pss_mb'] / (baseline * workers):.2f}x of linear)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,283 @@
+"""
+Query Replay
+Re-drives a captured query log (QUERY_LOG_ENABLED, data/query_log.jsonl) against a build,
+in-process or over HTTP, at the original pace (optionally accelerated) or back-to-back,
+and diffs latency distributions and result sets between two runs
+
+Usage (from backend/):
+    python scripts/replay_queries.py run data/query_log.jsonl --in-process --output before.json
+    python scripts/replay_queries.py run data/query_log.jsonl --base-url http://127.0.0.1:8000 --speed 4 --output after.json
+    python scripts/replay_queries.py diff before.json after.json
+    python scripts/replay_queries.py diff data/query_log.jsonl after.json   # production timings vs a build
+
+Replay keeps log order; with --speed 0 requests are sent back-to-back by --concurrency clients.
+Result sets are compared by recipe Image_Name per log record.
+"""
+
+import os
+import sys
+import json
+import time
+import asyncio
+import argparse
+import statistics
+from pathlib import Path
+from typing import Dict, List, Optional
+
+import httpx
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent
+
+ENDPOINT_PATHS = {
+    "recommend": "/api/recipes/recommend",
+    "rag-recommend": "/api/recipes/rag-recommend"
+}
+RESULT_FIELDS = {
+    "recommend": "recommendations",
+    "rag-recommend": "recipes"
+}
+
+
+def load_records(path: str) -> List[dict]:
+    """Records of a query log (JSONL) or a replay output (JSON), each with an index"""
+    text = Path(path).read_text(encoding="utf-8")
+    if path.endswith(".jsonl"):
+        records = []
+        for index, line in enumerate(text.splitlines()):
+            try:
+                records.append({"index": index, **json.loads(line)})
+            except ValueError:
+                continue
+        return records
+    return json.loads(text)["records"]
+
+
+async def wait_until_ready(client: httpx.AsyncClient, timeout: float):
+    """Replay against warm models only (/ready returns 200 once warm-up finished)"""
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            if (await client.get("/ready")).status_code == 200:
+                return
+        except httpx.HTTPError:
+            pass
+        await asyncio.sleep(1.0)
+    raise SystemExit(f"Target not ready after {timeout:.0f}s")
+
+
+async def replay_one(client: httpx.AsyncClient, entry: dict) -> dict:
+    endpoint = entry["endpoint"]
+    started = time.perf_counter()
+    record = {"index": entry["index"], "endpoint": endpoint, "request": entry["request"]}
+    try:
+        response = await client.post(ENDPOINT_PATHS[endpoint], json=entry["request"])
+        record["duration_ms"] = round((time.perf_counter() - started) * 1000, 3)
+        record["status"] = response.status_code
+        if response.status_code == 200:
+            body = response.json()
+            record["results"] = [recipe["Image_Name"] for recipe in body.get(RESULT_FIELDS[endpoint], [])]
+            record["stage_timings_ms"] = body.get("metadata", {}).get("stage_timings_ms", {})
+    except httpx.HTTPError as e:
+        record["duration_ms"] = round((time.perf_counter() - started) * 1000, 3)
+        record["status"] = type(e).__name__
+    return record
+
+
+async def replay(client: httpx.AsyncClient, entries: List[dict], speed: float, concurrency: int) -> List[dict]:
+    """Original pace / speed (open loop) if speed > 0, else back-to-back with `concurrency` clients"""
+    if speed > 0:
+        first_ts = entries[0]["ts"]
+        started = time.monotonic()
+
+        async def scheduled(entry):
+            await asyncio.sleep(max(0.0, started + (entry["ts"] - first_ts) / speed - time.monotonic()))
+            return await replay_one(client, entry)
+        return list(await asyncio.gather(*(scheduled(entry) for entry in entries)))
+
+    results: List[Optional[dict]] = [None] * len(entries)
+    position = 0
+
+    async def worker():
+        nonlocal position
+        while position < len(entries):
+            i = position
+            position += 1
+            results[i] = await replay_one(client, entries[i])
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    return results
+
+
+async def run_async(args) -> dict:
+    entries = [
+        entry for entry in load_records(args.log)
+        if entry.get("endpoint") in ENDPOINT_PATHS and (not args.endpoints or entry["endpoint"] in args.endpoints)
+    ]
+    if args.limit:
+        entries = entries[:args.limit]
+    if not entries:
+        raise SystemExit("No replayable records in the log")
+
+    if args.in_process:
+        # The replay itself must not be logged, and background pre-warming would skew timings
+        os.environ.setdefault("QUERY_LOG_ENABLED", "false")
+        os.environ.setdefault("CACHE_PREWARM_ENABLED", "false")
+        sys.path.insert(0, str(BACKEND_DIR))
+        from app.main import app
+        await app.router.startup()
+        transport = httpx.ASGITransport(app=app)
+        client = httpx.AsyncClient(transport=transport, base_url="http://replay", timeout=args.timeout)
+        target = "in-process"
+    else:
+        app = None
+        client = httpx.AsyncClient(base_url=args.base_url, timeout=args.timeout)
+        target = args.base_url
+
+    try:
+        await wait_until_ready(client, args.ready_timeout)
+        started = time.perf_counter()
+        records = await replay(client, entries, args.speed, args.concurrency)
+        elapsed = time.perf_counter() - started
+    finally:
+        await client.aclose()
+        if app is not None:
+            await app.router.shutdown()
+
+    return {
+        "meta": {
+            "log": args.log,
+            "target": target,
+            "speed": args.speed,
+            "concurrency": args.concurrency,
+            "elapsed_s": round(elapsed, 3),
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S%z")
+        },
+        "records": records
+    }
+
+
+def run(args) -> int:
+    report = asyncio.run(run_async(args))
+    records = report["records"]
+    errors = sum(1 for record in records if record["status"] != 200)
+    print(f"Replayed {len(records)} requests against {report['meta']['target']} "
+          f"in {report['meta']['elapsed_s']}s ({errors} errors)")
+    print_latencies({"run": records})
+    if args.output:
+        Path(args.output).write_text(json.dumps(report, indent=1) + "\n", encoding="utf-8")
+        print(f"Results written to {args.output}")
+    return 0
+
+
+def percentiles(values: List[float]) -> Dict[str, float]:
+    values = sorted(values)
+    if not values:
+        return {"p50": 0.0, "p90": 0.0, "p99": 0.0}
+    return {
+        name: round(values[min(len(values) - 1, int(len(values) * fraction))], 2)
+        for name, fraction in (("p50", 0.50), ("p90", 0.90), ("p99", 0.99))
+    }
+
+
+def latency_by_endpoint(records: List[dict]) -> Dict[str, Dict[str, float]]:
+    by_endpoint: Dict[str, List[float]] = {}
+    for record in records:
+        if record.get("status") == 200:
+            by_endpoint.setdefault(record["endpoint"], []).append(record["duration_ms"])
+    return {endpoint: {**percentiles(values), "count": len(values)} for endpoint, values in sorted(by_endpoint.items())}
+
+
+def print_latencies(runs: Dict[str, List[dict]]):
+    for name, records in runs.items():
+        for endpoint, stats in latency_by_endpoint(records).items():
+            print(f"  {name:8s} {endpoint:14s} n={stats['count']:<6d} p50={stats['p50']:9.2f}ms "
+                  f"p90={stats['p90']:9.2f}ms p99={stats['p99']:9.2f}ms")
+
+
+def stage_medians(records: List[dict]) -> Dict[str, float]:
+    stages: Dict[str, List[float]] = {}
+    for record in records:
+        for stage, duration_ms in (record.get("stage_timings_ms") or {}).items():
+            stages.setdefault(stage, []).append(duration_ms)
+    return {stage: round(statistics.median(values), 3) for stage, values in sorted(stages.items())}
+
+
+def jaccard(a: List[str], b: List[str]) -> float:
+    set_a, set_b = set(a), set(b)
+    return len(set_a & set_b) / len(set_a | set_b) if set_a | set_b else 1.0
+
+
+def diff(args) -> int:
+    before, after = load_records(args.before), load_records(args.after)
+    failed = False
+
+    print(f"Latency: {args.before} (A) vs {args.after} (B)")
+    latency_a, latency_b = latency_by_endpoint(before), latency_by_endpoint(after)
+    for endpoint in sorted(set(latency_a) & set(latency_b)):
+        a, b = latency_a[endpoint], latency_b[endpoint]
+        ratios = {name: b[name] / a[name] if a[name] else float("inf") for name in ("p50", "p99")}
+        regression = any(ratio > 1 + args.latency_threshold for ratio in ratios.values())
+        failed |= regression
+        print(f"  {endpoint:14s} p50 {a['p50']:9.2f} → {b['p50']:9.2f}ms ({ratios['p50']:.2f}x)  "
+              f"p99 {a['p99']:9.2f} → {b['p99']:9.2f}ms ({ratios['p99']:.2f}x)"
+              f"{'  REGRESSION' if regression else ''}")
+
+    stages_a, stages_b = stage_medians(before), stage_medians(after)
+    if stages_a and stages_b:
+        print("Stage medians (ms):")
+        for stage in sorted(set(stages_a) | set(stages_b)):
+            a, b = stages_a.get(stage), stages_b.get(stage)
+            print(f"  {stage:16s} {a if a is not None else '-':>10} → {b if b is not None else '-':>10}")
+
+    by_index = {record["index"]: record for record in before if record.get("status") == 200}
+    compared = []
+    for record in after:
+        other = by_index.get(record["index"])
+        if other is not None and record.get("status") == 200:
+            compared.append((other, record, jaccard(other.get("results", []), record.get("results", []))))
+    if compared:
+        same_order = sum(1 for a, b, _ in compared if a.get("results") == b.get("results"))
+        same_top1 = sum(1 for a, b, _ in compared if a.get("results", [None])[:1] == b.get("results", [None])[:1])
+        mean_overlap = statistics.fmean(overlap for _, _, overlap in compared)
+        failed |= mean_overlap < args.min_overlap
+        print(f"Results: {len(compared)} requests compared, identical {same_order / len(compared):.1%}, "
+              f"same top-1 {same_top1 / len(compared):.1%}, mean Jaccard overlap {mean_overlap:.3f}"
+              f"{'  BELOW --min-overlap' if mean_overlap < args.min_overlap else ''}")
+        for a, b, overlap in sorted(compared, key=lambda item: item[2])[:args.show]:
+            if overlap < 1.0:
+                print(f"  #{b['index']:<6d} {b['endpoint']:14s} overlap {overlap:.2f} "
+                      f"ingredients={a['request'].get('ingredients')}")
+    return 1 if failed else 0
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Replay a query log and diff runs")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    run_parser = subparsers.add_parser("run", help="Replay a query log against a build")
+    run_parser.add_argument("log", help="Query log (JSONL)")
+    target = run_parser.add_mutually_exclusive_group()
+    target.add_argument("--base-url", default="http://127.0.0.1:8000", help="Replay over HTTP against this API")
+    target.add_argument("--in-process", action="store_true", help="Replay against the app in this process")
+    run_parser.add_argument("--speed", type=float, default=0.0,
+                            help="Pace multiplier of the original timing (1 = original, 0 = back-to-back)")
+    run_parser.add_argument("--concurrency", type=int, default=1, help="Clients for back-to-back replay")
+    run_parser.add_argument("--endpoints", type=lambda value: value.split(","), help="Only these endpoints")
+    run_parser.add_argument("--limit", type=int, help="Replay only the first N records")
+    run_parser.add_argument("--timeout", type=float, default=60.0)
+    run_parser.add_argument("--ready-timeout", type=float, default=300.0, help="Seconds to wait for /ready")
+    run_parser.add_argument("--output", help="Write replay results JSON to this path")
+
+    diff_parser = subparsers.add_parser("diff", help="Diff latency and results of two runs (or a log and a run)")
+    diff_parser.add_argument("before", help="Baseline run JSON or query log JSONL")
+    diff_parser.add_argument("after", help="Candidate run JSON or query log JSONL")
+    diff_parser.add_argument("--latency-threshold", type=float, default=0.10,
+                             help="Allowed p50/p99 slowdown before failing (0.10 = 10%%)")
+    diff_parser.add_argument("--min-overlap", type=float, default=0.99, help="Minimum mean Jaccard overlap of results")
+    diff_parser.add_argument("--show", type=int, default=10, help="Requests with the largest result differences to list")
+
+    args = parser.parse_args()
+    sys.exit(run(args) if args.command == "run" else diff(args))
+
+
+if __name__ == "__main__":
+    main()
@@ -35,6 +35,7 @@ export const getRecipes = async (params?: {
     ingredients?: string[];
     limit?: number;
     offset?: number;
+    cursor?: string;
 }) => {
     try {
         const queryParams = new URLSearchParams();
@@ -48,6 +49,10 @@ export const getRecipes = async (params?: {
         if (params?.offset) {
             queryParams.append('offset', params.offset.toString());
         }
+        if (params?.cursor) {
+            // Opaque cursor from a previous page's next_cursor (ingredient queries only)
+            queryParams.append('cursor', params.cursor);
+        }
 
         const url = `${API_BASE_URL}/recipes/?${queryParams}`;
         const response = await fetch(url);
@@ -93,6 +98,34 @@ export const getRecipeByTitle = async (title: string) => {
     }
 };
 
+/**
+ * Autocomplete ingredient names (ranked by recipe frequency, served by the backend index)
+ */
+export const getIngredientSuggestions = async (query: string, limit: number = 10) => {
+    try {
+        const queryParams = new URLSearchParams({ q: query, limit: limit.toString() });
+        const response = await fetch(`${API_BASE_URL}/ingredients/suggest?${queryParams}`);
+        
+        if (!response.ok) {
+            await handleApiError(response);
+        }
+        
+        return await response.json() as {
+            query: string;
+            suggestions: { name: string; count: number }[];
+            total: number;
+        };
+    } catch (error) {
+        if ((error as ApiError).status) {
+            throw error;
+        }
+        throw {
+            message: 'Network error. Please check if the backend is running.',
+            status: 0
+        } as ApiError;
+    }
+};
+
 /**
  * Get recipe recommendations based on ingredients
  */